@@ -1,7 +1,7 @@
 # models.py
 import uuid
-from datetime import datetime, time
-from sqlalchemy import Integer, String, Float, Boolean, DateTime, Time, UniqueConstraint, ForeignKey, DECIMAL
+from datetime import datetime, time, timedelta
+from sqlalchemy import event, Integer, String, Float, Boolean, DateTime, Time, UniqueConstraint, ForeignKey, DECIMAL
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from flask_sqlalchemy import SQLAlchemy
 
@@ -74,9 +74,9 @@ class Items(db.Model):
     __tablename__ = 'items'
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
-    tipo: Mapped[int] = mapped_column(Integer, default=1)  # 1->snmp, 2->others, 3->Trap(No UI)
+    tipo: Mapped[int] = mapped_column(Integer, default=1)  # 1->snmp, 2->others, 3->Trap(No UI), 4->Tabla SNMP (snmp_oid: columnas separadas por coma), 5->SNMP Delta (tasa por segundo de un contador)
     hostid: Mapped[int] = mapped_column(Integer, ForeignKey('hosts.id', ondelete="CASCADE"), nullable=False)
-    snmp_oid: Mapped[str] = mapped_column(String(100))  # Tiene ser único por host (se puede agregar constraint a nivel de tabla)
+    snmp_oid: Mapped[str] = mapped_column(String(512))  # Tiene ser único por host. 512: un item tabla guarda varias columnas (OIDs enterprise largos) separadas por coma
     acronimo: Mapped[str] = mapped_column(String(100))       # Tiene ser único por host #Cambiar Nombre
     units: Mapped[str] = mapped_column(String(10))
     status_codes: Mapped[int] = mapped_column(Integer, default=200)
@@ -89,7 +89,8 @@ class Items(db.Model):
     factor_multiplicacion: Mapped[float] = mapped_column(Float, default=1.0, nullable=True)
     factor_division: Mapped[float] = mapped_column(Float, default=1.0, nullable=True)
     createdAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.now)
-    updatedAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.now, onupdate=datetime.now)
+    updatedAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.now, onupdate=datetime.now)  # Último sondeo (lo usa /items/core)
+    configuredAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.now, index=True)  # Último cambio de configuración (cursor de /items/monitoring)
 
     __table_args__ = (
         UniqueConstraint('hostid', 'snmp_oid', name='uq_hostid_snmp_oid'),
@@ -99,6 +100,26 @@ class Items(db.Model):
     def __repr__(self):
         return f"<Item {self.id}>"
 
+class ItemTombstones(db.Model):
+    __tablename__ = 'itemtombstones'
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    itemid: Mapped[int] = mapped_column(Integer, nullable=False)  # Sin FK: el item ya no existe
+    tiempo: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.now, index=True)
+
+    def __repr__(self):
+        return f"<ItemTombstone {self.itemid}>"
+
+# Retención de tombstones; un cursor más antiguo recibe un snapshot completo.
+ITEM_TOMBSTONE_RETENTION = timedelta(days=1)
+
+@event.listens_for(Items, "after_delete")
+def record_item_tombstone(mapper, connection, target):
+    """Registra el borrado (directo o en cascada desde host/hostgroup) para el feed incremental."""
+    now = datetime.now()
+    tombstones = ItemTombstones.__table__
+    connection.execute(tombstones.insert().values(itemid=target.id, tiempo=now))
+    connection.execute(tombstones.delete().where(tombstones.c.tiempo < now - ITEM_TOMBSTONE_RETENTION))
+
 class Meterings(db.Model):
     __tablename__ = 'meterings'
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -109,6 +130,19 @@ class Meterings(db.Model):
     def __repr__(self):
         return f"<Metering {self.id}>"
 
+class TableMeterings(db.Model):
+    __tablename__ = 'tablemeterings'
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    itemid: Mapped[int] = mapped_column(Integer, ForeignKey('items.id', ondelete="CASCADE"), nullable=False)
+    indice: Mapped[str] = mapped_column(String(60), nullable=False)   # Índice de la fila (sufijo del OID)
+    oid: Mapped[str] = mapped_column(String(120), nullable=False)     # OID de la columna
+    valor: Mapped[str] = mapped_column(String(60), nullable=False)
+    latencia: Mapped[float] = mapped_column(Float, nullable=True)
+    tiempo: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.now, index=True)
+
+    def __repr__(self):
+        return f"<TableMetering item={self.itemid} index={self.indice}>"
+
 class ReachbilityHistory(db.Model):
     __tablename__ = 'reachbilityhistory'
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -126,7 +160,7 @@ class SNMPFailures(db.Model):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     itemid: Mapped[int] = mapped_column(Integer, ForeignKey('items.id', ondelete="CASCADE"), nullable=False)
     host_ip: Mapped[str] = mapped_column(String(120), nullable=False)
-    oid: Mapped[str] = mapped_column(String(120), nullable=False)
+    oid: Mapped[str] = mapped_column(String(512), nullable=False)  # Como Items.snmp_oid (columnas de un item tabla)
     mensaje: Mapped[str] = mapped_column(String(255), nullable=True)  # Guarda "SNMP error indication: Timeout"
     valor: Mapped[str] = mapped_column(String(30), nullable=True)   # Guarda el valor si llegó algo pero fue None
     tiempo: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.now, index=True)
@@ -1,18 +1,37 @@
 # diagram.py
-from typing import Dict
 import asyncio
+import json
+import threading
+from queue import Queue, Empty
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from collections import defaultdict
-from flask import Blueprint, jsonify, request
-from sqlalchemy import func
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from sqlalchemy import func, insert
 from sqlalchemy.exc import DatabaseError
 from app.models import Diagrams, Shapes, Links_D, ReachbilityHistory, db
 from app.utils import utilities as res
 from app.schemas.schemas import diagram_schema_all, reachbilityhistory_schema_all
-from core.checkers.asynping import AsyPing
+from core.checkers.icmp import PINGER, PingStats
 diagram_bp = Blueprint('diagram', __name__)
 
+# Disponibilidad del diagrama (POST /ping)
+PING_CONCURRENCY = 256  # hosts en curso a la vez por petición
+PING_MAX_TARGETS = 5000
+PING_MAX_COUNT = 20
+PING_MIN_TIMEOUT = 0.1
+PING_MAX_TIMEOUT = 30.0
+PING_MAX_PACKSIZE = 10000
+PING_CANCEL_GRACE = 1.0  # s esperando que terminen los pings cancelados al cortarse el stream
+
+# Event loop de pings compartido por las peticiones del proceso (hilo daemon)
+_ping_loop: Optional[asyncio.AbstractEventLoop] = None
+_ping_loop_lock = threading.Lock()
+
+# Filas por INSERT multi-fila en /ping/bulk
+REACHABILITY_INSERT_CHUNK = 1000
+REACHABILITY_MAX_ROWS = 100000
+
 @diagram_bp.post("/")
 def create_diagram():
     try:
@@ -231,77 +250,217 @@ def delete_diagram(id):
 
 @diagram_bp.post("/ping")
 def get_availability():
+    """
+    Hace ping a los hosts del diagrama, todos a la vez en el event loop de pings del proceso
+    (a lo sumo PING_CONCURRENCY en curso por petición). Con Accept: application/x-ndjson o text/event-stream (o
+    ?stream=ndjson|sse) cada resultado se envía apenas responde su host; si no, se devuelve
+    la lista completa como antes. El historial de alcanzabilidad se guarda en un solo commit.
+    """
     try:
         data = request.get_json()
         if not data or 'ips' not in data:
             return jsonify({"error": "No IPs provided"}), 400
+        if not isinstance(data['ips'], list) or len(data['ips']) > PING_MAX_TARGETS:
+            return jsonify({"error": f"ips must be a list of at most {PING_MAX_TARGETS} targets"}), 400
 
-        ips = data['ips']
-        results_availability = []
-
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_ip = {
-                executor.submit(
-                    lambda ip_data: asyncio.run(AsyPing.get_data({
-                        "host": ip_data.get("host"),
-                        "itemid": ip_data.get("itemid", 0),
-                        "pingcount": ip_data.get("pingcount", 4),
-                        "timeout": ip_data.get("timeout", 1),
-                        "packsize": ip_data.get("packsize", 32)
-                    })), ip_data
-                ): ip_data for ip_data in ips
-            }
-
-            for future in as_completed(future_to_ip):
-                ip_data = future_to_ip[future]
-                try:
-                    result = future.result()
-                    result["host"] = ip_data.get("host")
-                    results_availability.append(result)
-                    insertReachbilityHist(result,True)
-                except Exception as e:
-                    results_availability.append({
-                        "itemid": ip_data.get("itemid", 0),
-                        "host": ip_data.get("host"),
-                        "error": "Exception",
-                        "code": 1,
-                        "message": str(e),
-                        "type": 2
-                    })
-                    insertReachbilityHist(result,False)
-
-
-        return jsonify(results_availability), 200
+        try:
+            targets, settings = ping_targets(data['ips'])
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid pingcount, timeout or packsize"}), 400
+        stream = ping_stream_format()
+        if stream is None:
+            return jsonify(list(ping_results(targets, settings))), 200
+
+        if stream == "sse":
+            def events():
+                total = 0
+                for result in ping_results(targets, settings):
+                    total += 1
+                    yield f"event: ping\ndata: {json.dumps(result)}\n\n"
+                yield f"event: end\ndata: {json.dumps({'total': total})}\n\n"
+            body, mimetype = events(), "text/event-stream"
+        else:
+            body, mimetype = (json.dumps(result) + "\n" for result in ping_results(targets, settings)), "application/x-ndjson"
+        return Response(stream_with_context(body), mimetype=mimetype,
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
     except Exception as e:
         print(e)
         return jsonify({"error": "Internal Server Error"}), 500
 
-def insertReachbilityHist(result:Dict, flagState:bool)->None:
-    if flagState:
-        resReachHist = {
-            "host_ip": result["host"],
-            "alcanzable": True,
-            "ping_min":result["channel"][0]["value"],
-            "ping_avg":result["channel"][1]["value"],
-            "ping_max":result["channel"][2]["value"],
-            "packet_loss":result["channel"][4]["value"],
-            "nota": ""
-        }
-        new_reachHist= ReachbilityHistory(**resReachHist)
-        db.session.add(new_reachHist)
-        db.session.commit()
+def ping_stream_format():
+    """Formato de streaming pedido por el cliente: "ndjson", "sse" o None (lista JSON)."""
+    stream = (request.args.get("stream") or "").lower()
+    if stream in ("ndjson", "sse"):
+        return stream
+    best = request.accept_mimetypes.best_match(["application/json", "application/x-ndjson", "text/event-stream"])
+    return {"application/x-ndjson": "ndjson", "text/event-stream": "sse"}.get(best)
+
+def ping_targets(ips: List[Dict]) -> Tuple[Dict[str, List[Dict]], Dict[str, Tuple[int, float, int]]]:
+    """
+    Agrupa los destinos por host (un host repetido se consulta una sola vez, con el mayor
+    pingcount, timeout y packsize pedidos) y acota los parámetros.
+    """
+    targets: Dict[str, List[Dict]] = {}
+    settings: Dict[str, Tuple[int, float, int]] = {}
+    for ip_data in ips:
+        if not isinstance(ip_data, dict) or not ip_data.get("host"):
+            continue
+        host = str(ip_data["host"])
+        count = min(max(int(ip_data.get("pingcount", 4)), 1), PING_MAX_COUNT)
+        timeout = min(max(float(ip_data.get("timeout", 1)), PING_MIN_TIMEOUT), PING_MAX_TIMEOUT)
+        size = min(max(int(ip_data.get("packsize", 32)), 1), PING_MAX_PACKSIZE)
+        if host in settings:
+            previous = settings[host]
+            count, timeout, size = max(count, previous[0]), max(timeout, previous[1]), max(size, previous[2])
+        settings[host] = (count, timeout, size)
+        targets.setdefault(host, []).append(ip_data)
+    return targets, settings
+
+def ping_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop de pings del proceso, en su propio hilo. Los pings avanzan aunque la respuesta
+    esté bloqueada escribiendo al cliente, así los RTT no se inflan por el streaming.
+    """
+    global _ping_loop
+    with _ping_loop_lock:
+        if _ping_loop is None:
+            _ping_loop = asyncio.new_event_loop()
+            threading.Thread(target=_ping_loop.run_forever, name="diagram-ping", daemon=True).start()
+        return _ping_loop
+
+async def produce_pings(targets: Dict[str, List[Dict]], settings: Dict[str, Tuple[int, float, int]],
+                        results: Queue) -> None:
+    """Corre en el loop de pings: pone (stats, tiempo) en results por host y None al final."""
+    try:
+        async for stats in PINGER.ping_many(list(targets), concurrency=PING_CONCURRENCY, settings=settings):
+            results.put((stats, datetime.now()))
+    finally:
+        results.put(None)
+
+def ping_results(targets: Dict[str, List[Dict]], settings: Dict[str, Tuple[int, float, int]]) -> Iterator[Dict]:
+    """
+    Entrega el resultado de cada destino apenas responde (o vence) su host. Los pings corren
+    en el loop de pings y este generador sólo vacía la cola de resultados. Si el cliente corta
+    el stream, los pendientes se cancelan y se guarda el historial de todo lo ya medido.
+    """
+    results: Queue = Queue()
+    future = asyncio.run_coroutine_threadsafe(produce_pings(targets, settings, results), ping_loop())
+    measured: List[Tuple[PingStats, datetime]] = []
+    finished = False
+    try:
+        while True:
+            entry = results.get()
+            if entry is None:
+                finished = True
+                break
+            measured.append(entry)
+            for ip_data in targets[entry[0].host]:
+                yield ping_result(entry[0], ip_data)
+    finally:
+        try:
+            if not finished:
+                future.cancel()
+                while True:  # Resultados medidos que no llegaron a enviarse
+                    try:
+                        entry = results.get(timeout=PING_CANCEL_GRACE)
+                    except Empty:
+                        break
+                    if entry is None:
+                        break
+                    measured.append(entry)
+        finally:
+            insert_reachability([reachability_row(stats, tiempo) for stats, tiempo in measured])
+
+def ping_result(stats: PingStats, ip_data: Dict) -> Dict:
+    """Resultado de un destino con el formato de AsyPing.get_data."""
+    result = {"itemid": ip_data.get("itemid", 0), "host": stats.host, "type": 2}
+    if stats.reachable:
+        result.update(message="OK", channel=stats.channels())
     else:
-        resReachHist = {
-            "host_ip": result["host"],
-            "alcanzable": False,
-            "nota": "",
-        }
-        new_reachHist= ReachbilityHistory(**resReachHist)
-        db.session.add(new_reachHist)
+        result.update(error="Exception", code=1,
+                      message=f"{stats.host} is Not reachable!" if stats.error is None else "Ping failed.")
+    return result
+
+def reachability_row(stats: PingStats, tiempo: datetime) -> Dict:
+    return {
+        "host_ip": stats.host[:120],
+        "alcanzable": stats.reachable,
+        "ping_min": stats.min,
+        "ping_avg": stats.avg,
+        "ping_max": stats.max,
+        "packet_loss": round(stats.loss),
+        "tiempo": tiempo,
+        "nota": "",
+    }
+
+def insert_reachability(rows: List[Dict]) -> None:
+    """
+    Guarda el historial en un solo commit. Se llama desde el finally del stream (también al
+    cortarse la conexión), por eso ningún error se propaga.
+    """
+    if not rows:
+        return
+    try:
+        for start in range(0, len(rows), REACHABILITY_INSERT_CHUNK):
+            db.session.execute(insert(ReachbilityHistory), rows[start:start + REACHABILITY_INSERT_CHUNK])
         db.session.commit()
+    except Exception as e:
+        print(e)
+        db.session.rollback()
 
+@diagram_bp.post("/ping/bulk")
+def create_reachability_bulk():
+    """
+    Inserta el historial de alcanzabilidad que envía el core ({host_ip, alcanzable, ping_min,
+    ping_avg, ping_max, packet_loss, tiempo}) en INSERTs multi-fila y un único commit.
+    """
+    try:
+        data = request.get_json(silent=True)
+        rows = data.get("rows") if isinstance(data, dict) else data
+        if not rows or not isinstance(rows, list):
+            response = res.generate_failed_params()
+            return jsonify(response), 400
+        if len(rows) > REACHABILITY_MAX_ROWS:
+            return jsonify(res.generate_failed_invalid_fields("ReachbilityHistory")), 413
+
+        now = datetime.now()
+        values = []
+        for row in rows:
+            if not isinstance(row, dict) or not row.get("host_ip") or not isinstance(row.get("alcanzable"), bool):
+                continue
+            try:
+                values.append({
+                    "host_ip": str(row["host_ip"])[:120],
+                    "alcanzable": row["alcanzable"],
+                    "ping_min": float(row["ping_min"]) if row.get("ping_min") is not None else None,
+                    "ping_avg": float(row["ping_avg"]) if row.get("ping_avg") is not None else None,
+                    "ping_max": float(row["ping_max"]) if row.get("ping_max") is not None else None,
+                    "packet_loss": round(float(row["packet_loss"])) if row.get("packet_loss") is not None else None,
+                    "tiempo": datetime.fromisoformat(row["tiempo"]) if row.get("tiempo") else now,
+                    "nota": str(row.get("nota") or "")[:20],
+                })
+            except (TypeError, ValueError):
+                continue
+
+        for start in range(0, len(values), REACHABILITY_INSERT_CHUNK):
+            db.session.execute(insert(ReachbilityHistory), values[start:start + REACHABILITY_INSERT_CHUNK])
+        db.session.commit()
+
+        result = {"inserted": len(values), "rejected": len(rows) - len(values)}
+        response = res.generate_response_create_200(result, "ReachbilityHistory")
+        return jsonify(response), 201
 
+    except DatabaseError as db_error:  # noqa: F841
+        db.session.rollback()
+        response = res.generate_failed_message_dberror()
+        return jsonify(response), 503
+
+    except Exception as e:  # noqa: F841
+        print(e)
+        db.session.rollback()
+        response = res.generate_failed_message_exception()
+        return jsonify(response), 500
 
 @diagram_bp.get("/ping")
 def get_pings_data():
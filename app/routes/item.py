@@ -1,9 +1,10 @@
 # item.py
+import hashlib
 from datetime import datetime, timedelta
-from flask import Blueprint, request, jsonify
-from sqlalchemy import func,text, or_
+from flask import Blueprint, request, jsonify, make_response
+from sqlalchemy import func,text, or_, case, update
 from sqlalchemy.exc import DatabaseError
-from app.models import Items,Hosts,Meterings,db
+from app.models import Items,Hosts,Meterings,ItemTombstones,ITEM_TOMBSTONE_RETENTION,db
 from app.schemas.schemas import item_schema_all
 from app.utils import utilities as res
 
@@ -157,37 +158,111 @@ def get_items_core():
     except Exception as e:
         print(f'Ocurrió un error en la obtención de datos {e}')    
 
+def serialize_monitoring_row(data):
+    return {
+        'id': data.id,
+        'name': data.name,
+        'tipo': data.tipo,
+        'snmp_oid': data.snmp_oid,
+        'enabled': data.enabled,
+        'factor_multiplicacion': data.factor_multiplicacion,
+        'factor_division': data.factor_division,
+        'updateinterval': data.updateinterval.isoformat(),
+        'updatedAt': data.updatedAt.isoformat(),
+        'createdAt': data.createdAt.isoformat(),
+        "host" : {
+            "id": data.hostid,
+            "hostname": data.hostname,
+            "ip": data.ip,
+            'community': data.community
+        }
+    }
+
+def monitoring_state(view: str = ""):
+    """
+    Resumen barato del estado del feed de monitoreo (usado como ETag y cursor). view identifica
+    la respuesta pedida (lista, snapshot o delta desde un cursor), así cada cursor tiene su
+    propio ETag y un 304 nunca oculta un delta que el cliente no recibió.
+
+    El cursor y el ETag siguen configuredAt (cambios de configuración), no updatedAt, que se
+    mueve en cada sondeo. Sólo la lista completa (formato original) incluye además el último
+    updatedAt, porque sus clientes lo leen como hora del último sondeo.
+    """
+    items_state = db.session.query(func.max(Items.configuredAt), func.count(Items.id)).one()
+    hosts_updated = db.session.query(func.max(Hosts.updatedAt)).scalar()
+    tombstones_state = db.session.query(func.max(ItemTombstones.tiempo), func.max(ItemTombstones.id)).one()
+    stamps = [stamp for stamp in (items_state[0], hosts_updated, tombstones_state[0]) if stamp is not None]
+    cursor = max(stamps).isoformat() if stamps else ""
+    polled = db.session.query(func.max(Items.updatedAt)).scalar() if view == "list" else ""
+    raw = f"{view}|{items_state[0]}|{items_state[1]}|{hosts_updated}|{tombstones_state[1]}|{polled}"
+    etag = hashlib.md5(raw.encode()).hexdigest()
+    return cursor, etag
+
 @item_bp.get('/monitoring')
 def get_to_monitoring():
-    stmtcore = (
-        db.session.query(Items.id,Items.name,Items.tipo,Items.snmp_oid, Items.enabled, Items.factor_multiplicacion,
-                        Items.factor_division,
-                        Items.updateinterval,Items.updatedAt,
-                         Items.createdAt,
-                         Hosts.hostname,Hosts.ip,Hosts.community,).join(Hosts, Items.hostid == Hosts.id)
-    )
-    resultquery = stmtcore.all()
-    items_serialized = []
-    for data in resultquery:
-        items_serialized.append({
-            'id': data.id,
-            'name': data.name,
-            'tipo': data.tipo,
-            'snmp_oid': data.snmp_oid,
-            'enabled': data.enabled,
-            'factor_multiplicacion': data.factor_multiplicacion,
-            'factor_division': data.factor_division,
-            'updateinterval': data.updateinterval.isoformat(),
-            'updatedAt': data.updatedAt.isoformat(),
-            'createdAt': data.createdAt.isoformat(),
-            "host" : {
-                "hostname": data.hostname,
-                "ip": data.ip,
-                'community': data.community
-            }
-        })
-    return jsonify(items_serialized), 200
-                      
+    """
+    Feed de items para el core.
+      - Sin parámetros: lista completa (formato original).
+      - ?since=<cursor>: sólo items/hosts creados o modificados desde el cursor y los ids borrados.
+        since=0 (o un cursor más antiguo que la retención de tombstones) devuelve un snapshot completo.
+      - If-None-Match con el ETag anterior: 304 si nada cambió.
+    """
+    try:
+        since_str = request.args.get('since')
+        since = None
+        if since_str and since_str != "0":
+            try:
+                since = datetime.fromisoformat(since_str)
+            except ValueError:
+                return jsonify(res.generate_failed_message_unknown("Items", ["since"])), 400
+            if since < datetime.now() - ITEM_TOMBSTONE_RETENTION:
+                since = None
+
+        if since_str is None:
+            view = "list"
+        else:
+            view = f"since={since.isoformat()}" if since is not None else "full"
+        cursor, etag = monitoring_state(view)
+        if request.if_none_match.contains(etag):
+            response = make_response("", 304)
+            response.set_etag(etag)
+            return response
+
+        stmtcore = (
+            db.session.query(Items.id,Items.name,Items.tipo,Items.snmp_oid, Items.enabled, Items.factor_multiplicacion,
+                            Items.factor_division,
+                            Items.updateinterval,Items.updatedAt,
+                             Items.createdAt, Items.hostid,
+                             Hosts.hostname,Hosts.ip,Hosts.community,).join(Hosts, Items.hostid == Hosts.id)
+        )
+        if since is not None:
+            # >= porque DATETIME guarda segundos; el cliente aplica upserts idempotentes.
+            stmtcore = stmtcore.filter(or_(Items.configuredAt >= since, Hosts.updatedAt >= since))
+        items_serialized = [serialize_monitoring_row(data) for data in stmtcore.all()]
+
+        if since_str is None:
+            response = make_response(jsonify(items_serialized), 200)
+        else:
+            deleted = []
+            if since is not None:
+                deleted = [row.itemid for row in
+                           db.session.query(ItemTombstones.itemid).filter(ItemTombstones.tiempo >= since).all()]
+            response = make_response(jsonify({
+                "cursor": cursor,
+                "full": since is None,
+                "items": items_serialized,
+                "deleted": deleted,
+            }), 200)
+        response.set_etag(etag)
+        return response
+
+    except DatabaseError as db_error:  # noqa: F841
+        response = res.generate_failed_message_dberror()
+        return jsonify(response), 503
+
+    except Exception as e:  # noqa: F841
+        response = res.generate_failed_message_exception()
+        return jsonify(response), 500
 
 @item_bp.get("/")
 def get_items():
@@ -455,6 +530,63 @@ def get_graph(id):
         response = res.generate_failed_message_exception()
         return jsonify(response), 500
 
+# Items por sentencia UPDATE ... CASE en /latest
+LATEST_UPDATE_CHUNK = 1000
+
+@item_bp.put("/latest")
+def update_items_latest():
+    """
+    Actualiza latest_data de muchos items ({id, latest_data, ts}) con un UPDATE ... CASE por
+    bloque y un único commit. Mueve updatedAt (último sondeo, usado por /items/core) pero no
+    configuredAt, así no aparecen en el feed incremental de /monitoring. No devuelve los items
+    serializados.
+    """
+    try:
+        data = request.get_json(silent=True)
+        rows = data.get("rows") if isinstance(data, dict) else data
+        if not rows or not isinstance(rows, list):
+            response = res.generate_failed_params()
+            return jsonify(response), 400
+
+        # Un valor por item: gana el de ts más reciente (o el último recibido si no hay ts)
+        latest = {}
+        for row in rows:
+            if not isinstance(row, dict) or not isinstance(row.get("id"), int) or "latest_data" not in row:
+                continue
+            previous = latest.get(row["id"])
+            if previous is None or str(row.get("ts") or "") >= str(previous.get("ts") or ""):
+                latest[row["id"]] = row
+
+        updated = 0
+        ids = list(latest)
+        for start in range(0, len(ids), LATEST_UPDATE_CHUNK):
+            chunk = ids[start:start + LATEST_UPDATE_CHUNK]
+            stmt = (
+                update(Items)
+                .where(Items.id.in_(chunk))
+                .values(
+                    latest_data=case({item_id: str(latest[item_id]["latest_data"])[:100] for item_id in chunk},
+                                     value=Items.id),
+                    updatedAt=datetime.now(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            updated += db.session.execute(stmt).rowcount
+        db.session.commit()
+
+        response = res.generate_response_update_200({"received": len(rows), "updated": updated}, "Items")
+        return jsonify(response), 200
+
+    except DatabaseError as db_error:  # noqa: F841
+        db.session.rollback()
+        response = res.generate_failed_message_dberror()
+        return jsonify(response), 503
+
+    except Exception as e:  # noqa: F841
+        db.session.rollback()
+        response = res.generate_failed_message_exception()
+        return jsonify(response), 500
+
 @item_bp.put("/<int:id>")
 def update_item(id):
     try:
@@ -521,7 +653,13 @@ def update_item(id):
         if "factor_division" in data:
             item.factor_division= data["factor_division"]
 
-        item.updatedAt = datetime.now() #Only for test (OK!)
+        now = datetime.now()
+        # Datos de monitoreo (latest_data/status_codes) no son cambios de configuración:
+        # sólo mueven updatedAt (último sondeo), no el cursor del feed de /monitoring.
+        runtime_fields = {'latest_data', 'status_codes'}
+        if any(field not in runtime_fields for field in data if field in allowed_fields):
+            item.configuredAt = now
+        item.updatedAt = now #Only for test (OK!)
         db.session.commit()
 
         result = item_schema_all.dump(item)
@@ -1,14 +1,24 @@
 # metering.py
+import json
 from datetime import datetime
 from flask import Blueprint, request, jsonify
-from sqlalchemy import func
+from sqlalchemy import and_, func, insert, or_, select
 from sqlalchemy.exc import DatabaseError
-from app.models import Meterings, Items, SNMPFailures,db
+from app.models import Meterings, Items, Hosts, SNMPFailures, TableMeterings, db
 from app.schemas.schemas import metering_schema_all, item_schema_all, meteringitemschemansksl_schema, snmpfailureschema_schema
 from app.utils import utilities as res
+from core.includes.defines import (WAKE_SERVER_HOST as CORE_CONTROL_HOST, WAKE_SERVER_PORT as CORE_CONTROL_PORT,
+                                   POLL_NOW_MAX_ITEMS, POLL_NOW_DEFAULT_TIMEOUT, POLL_NOW_MAX_TIMEOUT)
 import socket
 metering_bp = Blueprint('metering', __name__)
 
+# Filas por INSERT multi-fila en /bulk
+BULK_INSERT_CHUNK = 1000
+BULK_MAX_ROWS = 100000
+
+# Margen sobre el timeout de poll now para la respuesta del canal de control del core
+CORE_CONTROL_TIMEOUT = 5.0
+
 def convert_to_time(time_str):
     try:
         return datetime.strptime(time_str, "%H:%M:%S").time()
@@ -44,10 +54,17 @@ def create_metering():
         #     return jsonify(response), 400
 
         
+        try:
+            tiempo = parse_tiempo(data.get('tiempo'), datetime.now())
+        except (TypeError, ValueError):
+            response = res.generate_failed_invalid_fields("Metering")
+            return jsonify(response), 400
+
         metering_data = {
             "itemid":data['itemid'],
             "valor":data['valor'],
-            "latencia": data['latencia']
+            "latencia": data['latencia'],
+            "tiempo": tiempo  # Hora de la consulta enviada por el core
         }
 
         new_metering = Meterings(**metering_data)
@@ -68,6 +85,84 @@ def create_metering():
         response = res.generate_failed_message_exception()
         return jsonify(response), 500
 
+def parse_bulk_rows():
+    """
+    Lee las filas de /bulk: JSON ({"rows": [...]} o una lista) o NDJSON (una fila por línea).
+    """
+    if request.mimetype in ("application/x-ndjson", "application/ndjson"):
+        return [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        return data.get("rows")
+    return data
+
+def parse_tiempo(value, default):
+    if value is None:
+        return default
+    return datetime.fromisoformat(value)
+
+@metering_bp.post("/bulk")
+def create_meterings_bulk():
+    """
+    Inserta miles de mediciones {itemid, valor, latencia, tiempo} en INSERTs multi-fila
+    por bloques y un único commit. Se respeta el tiempo de la consulta enviado por el core.
+    """
+    try:
+        try:
+            rows = parse_bulk_rows()
+        except ValueError:
+            return jsonify(res.generate_failed_invalid_post()), 400
+        if not rows or not isinstance(rows, list):
+            response = res.generate_failed_params()
+            return jsonify(response), 400
+        if len(rows) > BULK_MAX_ROWS:
+            return jsonify(res.generate_failed_invalid_fields("Meterings")), 413
+
+        mandatory_fields = {"itemid", "valor"}
+        allowed_fields = mandatory_fields | {"latencia", "tiempo"}
+        # Validación por conjuntos sobre todo el lote (sin consultas por fila)
+        well_formed = [
+            row for row in rows
+            if isinstance(row, dict) and mandatory_fields <= row.keys() <= allowed_fields
+            and isinstance(row["itemid"], int) and row["valor"] is not None
+        ]
+        item_ids = {row["itemid"] for row in well_formed}
+        existing_ids = set(db.session.scalars(select(Items.id).where(Items.id.in_(item_ids)))) if item_ids else set()
+
+        now = datetime.now()
+        values = []
+        for row in well_formed:
+            if row["itemid"] not in existing_ids:
+                continue
+            try:
+                values.append({
+                    "itemid": row["itemid"],
+                    "valor": str(row["valor"])[:60],
+                    "latencia": float(row["latencia"]) if row.get("latencia") is not None else None,
+                    "tiempo": parse_tiempo(row.get("tiempo"), now),
+                })
+            except (TypeError, ValueError):
+                continue
+
+        for start in range(0, len(values), BULK_INSERT_CHUNK):
+            db.session.execute(insert(Meterings), values[start:start + BULK_INSERT_CHUNK])
+        db.session.commit()
+
+        result = {"inserted": len(values), "rejected": len(rows) - len(values)}
+        response = res.generate_response_create_200(result, "Meterings")
+        return jsonify(response), 201
+
+    except DatabaseError as db_error:  # noqa: F841
+        db.session.rollback()
+        response = res.generate_failed_message_dberror()
+        return jsonify(response), 503
+
+    except Exception as e:  # noqa: F841
+        print(e)
+        db.session.rollback()
+        response = res.generate_failed_message_exception()
+        return jsonify(response), 500
+
 @metering_bp.get("/")
 def get_meterings():
     try:
@@ -267,6 +362,130 @@ def delete_metering(id):
         response = res.generate_failed_message_exception()
         return jsonify(response), 500
 
+@metering_bp.post("/table")
+def create_table_meterings():
+    """
+    Inserta las filas de un item tabla (tipo 4) en INSERTs multi-fila por bloques y un único
+    commit, como /bulk. Un item inexistente (borrado mientras el core lo recorría) devuelve 404
+    en lugar de fallar por la FK; los textos largos (ifDescr, ifAlias) se truncan a la columna.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
+            response = res.generate_failed_params()
+            return jsonify(response), 400
+        mandatory_fields = ["itemid", "rows"]
+        optional_fields = ["latencia"]
+        allowed_fields = mandatory_fields + optional_fields
+
+        missing_fields = [field for field in mandatory_fields if field not in data]
+        if missing_fields:
+            response = res.generate_failed_post_missparams(missing_fields)
+            return jsonify(response), 400
+
+        unknown_fields = [field for field in data.keys() if field not in allowed_fields]
+        if unknown_fields:
+            response = res.generate_failed_invalid_params()
+            return jsonify(response), 400
+
+        rows = data['rows']
+        if not isinstance(data['itemid'], int) or not isinstance(rows, list) or any(
+            not isinstance(row, dict) or not {"indice", "oid", "valor"} <= row.keys() for row in rows
+        ):
+            return jsonify(res.generate_failed_invalid_fields("Table meterings")), 400
+        if len(rows) > BULK_MAX_ROWS:
+            return jsonify(res.generate_failed_invalid_fields("Table meterings")), 413
+        try:
+            latencia = float(data['latencia']) if data.get('latencia') is not None else None
+        except (TypeError, ValueError):
+            return jsonify(res.generate_failed_invalid_fields("Table meterings")), 400
+
+        if db.session.scalar(select(Items.id).where(Items.id == data['itemid'])) is None:
+            response = res.generate_failed_msg_not_found_404("Item")
+            return jsonify(response), 404
+
+        now = datetime.now()
+        values = [
+            {
+                "itemid": data['itemid'],
+                "indice": str(row['indice'])[:60],
+                "oid": str(row['oid'])[:120],
+                "valor": str(row['valor'])[:60],
+                "latencia": latencia,
+                "tiempo": now,
+            }
+            for row in rows if row['valor'] is not None
+        ]
+        for start in range(0, len(values), BULK_INSERT_CHUNK):
+            db.session.execute(insert(TableMeterings), values[start:start + BULK_INSERT_CHUNK])
+        db.session.commit()
+        response = res.generate_response_create_200({"itemid": data['itemid'], "rows": len(values)}, "Table meterings")
+        return jsonify(response), 201
+
+    except DatabaseError as db_error:  # noqa: F841
+        db.session.rollback()
+        response = res.generate_failed_message_dberror()
+        return jsonify(response), 503
+
+    except Exception as e:  # noqa: F841
+        print(e)
+        db.session.rollback()
+        response = res.generate_failed_message_exception()
+        return jsonify(response), 500
+
+@metering_bp.get("/table")
+def get_table_meterings():
+    try:
+        valid_params = {'itemid', 'indice', 'oid'}
+        query_params = request.args
+        unknown_params = [param for param in query_params if param not in valid_params]
+        if unknown_params:
+            response = res.generate_failed_message_unknown("Table meterings", unknown_params)
+            return jsonify(response), 400
+
+        itemid = request.args.get('itemid')
+        if not itemid:
+            return jsonify(res.generate_failed_post_missparams(["itemid"])), 400
+        try:
+            itemid_int = int(itemid)
+        except ValueError:
+            return jsonify(res.generate_failed_message_error_id()), 400
+
+        stmt = db.session.query(TableMeterings).filter(TableMeterings.itemid == itemid_int)
+        if request.args.get('indice'):
+            stmt = stmt.filter(TableMeterings.indice == request.args.get('indice'))
+        if request.args.get('oid'):
+            stmt = stmt.filter(TableMeterings.oid == request.args.get('oid'))
+        results = stmt.order_by(TableMeterings.tiempo).all()
+
+        if not results:
+            response = res.generate_failed_msg_not_found_200("Table meterings")
+            return jsonify(response), 200
+
+        # Agrupado por (columna, índice) para graficar cada fila como una serie
+        grouped_data = {}
+        for r in results:
+            serie = grouped_data.setdefault((r.oid, r.indice), {
+                "oid": r.oid,
+                "indice": r.indice,
+                "values": [],
+                "tiempo": []
+            })
+            serie["values"].append(r.valor)
+            serie["tiempo"].append(r.tiempo)
+
+        table_data = list(grouped_data.values())
+        response = res.generate_response_all(table_data, len(table_data))
+        return jsonify(response), 200
+
+    except DatabaseError as db_error:  # noqa: F841
+        response = res.generate_failed_message_dberror()
+        return jsonify(response), 503
+
+    except Exception as e:  # noqa: F841
+        response = res.generate_failed_message_exception()
+        return jsonify(response), 500
+
 @metering_bp.post("/falla")
 def post_metering_fail():
     try:
@@ -289,12 +508,18 @@ def post_metering_fail():
             response = res.generate_failed_invalid_params()
             return jsonify(response), 400
         
+        # Un item borrado mientras el core lo consultaba: 404 (no reintentable) en lugar de un
+        # IntegrityError de la FK que se vería como 503
+        if db.session.scalar(select(Items.id).where(Items.id == data['itemid'])) is None:
+            response = res.generate_failed_msg_not_found_404("Item")
+            return jsonify(response), 404
+
         snmp_failed_data = {
             "itemid":data['itemid'],
-            "valor":data['valor'],
-            "oid":data['oid'],
-            "mensaje":data['mensaje'],
-            "host_ip": data['host_ip']
+            "valor": str(data['valor'])[:30] if data['valor'] is not None else None,
+            "oid": str(data['oid'])[:512],
+            "mensaje": str(data['mensaje'])[:255] if data['mensaje'] is not None else None,
+            "host_ip": str(data['host_ip'])[:120]
         }
 
         new_snmp_failed_data = SNMPFailures(**snmp_failed_data)
@@ -352,20 +577,91 @@ def get_snmp_failed():
         return jsonify({"error": "Internal Server Error"}), 500
 @metering_bp.post("/refresh")
 def refresh_core():
+    """
+    Canal de control del core (CORE_CONTROL_HOST:CORE_CONTROL_PORT, 127.0.0.1:5050 por defecto).
+      - {"wake": "WAKE"}: el core sincroniza los cambios de items de inmediato.
+      - {"items": [ids], "hosts": [ids], "reply": bool, "timeout": s}: el core consulta ya esos
+        items (o todos los items habilitados de esos hosts) con prioridad máxima; con "reply"
+        la respuesta incluye los valores obtenidos antes del timeout.
+    """
     try:
-        data = request.get_json()
-        wake = data["wake"]
-        if not wake:
-            return jsonify({"error": "No se recibió el valor 'wake'"}), 400
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            response = res.generate_failed_params()
+            return jsonify(response), 400
+        if "items" not in data and "hosts" not in data:
+            wake = data.get("wake")
+            if not wake:
+                return jsonify({"error": "No se recibió el valor 'wake'"}), 400
 
-        # --- Equivalente a wake_fetcher.js ---
+            # --- Equivalente a wake_fetcher.js ---
+            try:
+                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                    s.connect((CORE_CONTROL_HOST, CORE_CONTROL_PORT))
+                    s.sendall(wake.encode())
+            except Exception as e:
+                return jsonify({"error": f"No se pudo conectar al fetcher: {e}"}), 500
+
+            return jsonify({"status": "WAKE enviado correctamente"}), 200
+
+        item_ids = [int(i) for i in data.get("items") or []]
+        host_ids = [int(i) for i in data.get("hosts") or []]
+        reply = bool(data.get("reply", False))
+        timeout = min(max(float(data.get("timeout", POLL_NOW_DEFAULT_TIMEOUT)), 0.0), POLL_NOW_MAX_TIMEOUT)
+        if not item_ids and not host_ids:
+            response = res.generate_failed_params()
+            return jsonify(response), 400
+
+        # Payloads armados desde la BD: sirven también para items aún no sincronizados por el core
+        conditions = []
+        if item_ids:
+            conditions.append(Items.id.in_(item_ids))
+        if host_ids:
+            conditions.append(and_(Items.hostid.in_(host_ids), Items.enabled.is_(True)))
+        rows = (db.session.query(Items.id, Items.snmp_oid, Items.tipo, Items.factor_division,
+                                 Items.factor_multiplicacion, Hosts.ip, Hosts.community)
+                .join(Hosts, Items.hostid == Hosts.id)
+                .filter(or_(*conditions))
+                .limit(POLL_NOW_MAX_ITEMS)
+                .all())
+        payloads = [{"id": row.id, "oid": row.snmp_oid, "ip": row.ip, "community": row.community,
+                     "tipo": row.tipo, "factor_division": row.factor_division,
+                     "factor_multiplicacion": row.factor_multiplicacion} for row in rows]
+        found = {row.id for row in rows}
+        missing = [item_id for item_id in item_ids if item_id not in found]
+        if not payloads:
+            response = res.generate_failed_msg_not_found_404("Items")
+            return jsonify(response), 404
+
+        message = {"cmd": "poll", "items": payloads, "reply": reply, "timeout": timeout}
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect(("127.0.0.1", 5050))
-                s.sendall(wake.encode())
+                s.settimeout(timeout + CORE_CONTROL_TIMEOUT)
+                s.connect((CORE_CONTROL_HOST, CORE_CONTROL_PORT))
+                s.sendall(json.dumps(message).encode() + b"\n")
+                answer = b""
+                while not answer.endswith(b"\n"):
+                    chunk = s.recv(65536)
+                    if not chunk:
+                        break
+                    answer += chunk
         except Exception as e:
-            return jsonify({"error": f"No se pudo conectar al fetcher: {e}"}), 500
+            return jsonify({"error": f"No se pudo conectar al core: {e}"}), 503
 
-        return jsonify({"status": "WAKE enviado correctamente"}), 200
+        try:
+            response = json.loads(answer)
+        except ValueError:
+            return jsonify({"error": "Respuesta inválida del core"}), 502
+        if response.get("status") != "ok":
+            return jsonify({"error": response.get("error", "Core error")}), 502
+        response["unknown"] = missing + response.get("unknown", [])
+        return jsonify(response), 200
+    except (ValueError, TypeError):
+        response = res.generate_failed_invalid_params()
+        return jsonify(response), 400
+    except DatabaseError as db_error:  # noqa: F841
+        db.session.rollback()
+        response = res.generate_failed_message_dberror()
+        return jsonify(response), 503
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
@@ -6,12 +6,11 @@ Univalle
 This script is the core of the network monitoring system.
 """
 
-from time import sleep
+from time import sleep, monotonic
 from queue import Queue
 from threading import Event
 
 from core.includes.defines import (
-    DEFAULT_SERVER_PORT,
     LOGGING_FILE,
     THREAD_TYPE_FETCHER,
     SNMP_FEATURE_STATUS,
@@ -21,11 +20,18 @@ from core.includes.defines import (
     ITEMS_URL,
     ITEMS_DATA_URL,
     METERINGS_URL, THREAD_TYPE_SNMPER,
+    SNMP_ENGINE_PROCESS, WRITER_FLUSH_INTERVAL,
 )
 from core.config.utilities import Config
 from core.config.logger import CustomLogger
 from core.fetcher.fetcher_manager import FetcherManager
 from core.snmper.snmper_manager import  SnmperManager
+from core.misc.deadline_queue import DeadlineQueue
+from core.checkers.snmp.delta import DeltaCache
+from core.writer.writer_manager import WriterManager
+from core.misc.fetch_data import FetchData
+from core.metrics.registry import REGISTRY
+from core.metrics.server import MetricsServer
 
 # Server metadata
 title_message: str = "network_monitor_server"
@@ -34,7 +40,7 @@ revision: str = "1"
 
 # Network config (TODO: load from file/env)
 config_listen_ip: str = ""
-config_listen_port: int = DEFAULT_SERVER_PORT
+config_listen_port: int = Config.get_option("METRICS_PORT")
 
 # Fetcher config
 config_forks = {
@@ -42,6 +48,27 @@ config_forks = {
     "SNMPERS": Config.get_thread_num(THREAD_TYPE_SNMPER),
 }
 
+# SNMP engine config
+config_snmp_engine: str = Config.get_option("SNMP_ENGINE")
+config_snmp_workers: int = Config.get_option("SNMP_WORKERS")
+config_max_inflight: int = Config.get_option("SNMP_MAX_INFLIGHT")
+config_max_varbinds: int = Config.get_option("SNMP_MAX_VARBINDS")
+config_snmp_fast_get: bool = Config.get_option("SNMP_FAST_GET")
+config_timeout_min: float = Config.get_option("SNMP_TIMEOUT_MIN")
+config_timeout_max: float = Config.get_option("SNMP_TIMEOUT_MAX")
+config_max_retries: int = Config.get_option("SNMP_MAX_RETRIES")
+config_breaker_threshold: int = Config.get_option("CIRCUIT_FAILURE_THRESHOLD")
+
+# Task queue config
+config_max_staleness: float = Config.get_option("TASK_MAX_STALENESS")
+
+# Writer config
+config_writers: int = Config.get_option("NUM_WRITERS")
+config_writer_batch: int = Config.get_option("WRITER_BATCH_SIZE")
+config_spool_path: str = Config.get_option("SPOOL_PATH")
+config_spool_max_rows: int = Config.get_option("SPOOL_MAX_ROWS")
+config_replay_rate: float = Config.get_option("SPOOL_REPLAY_RATE")
+
 # Intervals threads
 interval_fetchers: float = 30.0
 interval_snmper: float = 0.001
@@ -52,7 +79,7 @@ meterings_url: str = METERINGS_URL
 
 # Shared resources
 logger = CustomLogger(log_file=LOGGING_FILE)
-task_fetcher_queue: Queue[dict] = Queue()
+task_fetcher_queue: DeadlineQueue = DeadlineQueue(max_staleness=config_max_staleness)
 response_snmp_queue: Queue[dict] = Queue()
 stop_event: Event = Event()
 
@@ -78,8 +105,115 @@ def load_config() -> list[dict]:
             "MIN": 1,
             "MAX": 10,  # Test limit
         },
+        {
+            "PARAMETER": "StartWriters",
+            "VAR": config_writers,
+            "TYPE": "int",
+            "MANDATORY": False,
+            "MIN": 1,
+            "MAX": 16,
+        },
+        {
+            "PARAMETER": "WriterBatch",
+            "VAR": config_writer_batch,
+            "TYPE": "int",
+            "MANDATORY": False,
+            "MIN": 1,
+            "MAX": 10000,
+        },
+        {
+            "PARAMETER": "MetricsPort",
+            "VAR": config_listen_port,
+            "TYPE": "int",
+            "MANDATORY": False,
+            "MIN": 0,
+            "MAX": 65535,
+        },
+        {
+            "PARAMETER": "SpoolMaxRows",
+            "VAR": config_spool_max_rows,
+            "TYPE": "int",
+            "MANDATORY": False,
+            "MIN": 1000,
+            "MAX": 100_000_000,
+        },
+        {
+            "PARAMETER": "StartWorkers",
+            "VAR": config_snmp_workers,
+            "TYPE": "int",
+            "MANDATORY": False,
+            "MIN": 1,
+            "MAX": 256,
+        },
+        {
+            "PARAMETER": "MaxInFlight",
+            "VAR": config_max_inflight,
+            "TYPE": "int",
+            "MANDATORY": False,
+            "MIN": 1,
+            "MAX": 20000,
+        },
+        {
+            "PARAMETER": "MaxVarbinds",
+            "VAR": config_max_varbinds,
+            "TYPE": "int",
+            "MANDATORY": False,
+            "MIN": 1,
+            "MAX": 100,
+        },
+        {
+            "PARAMETER": "MaxRetries",
+            "VAR": config_max_retries,
+            "TYPE": "int",
+            "MANDATORY": False,
+            "MIN": 0,
+            "MAX": 10,
+        },
+        {
+            "PARAMETER": "BreakerThreshold",
+            "VAR": config_breaker_threshold,
+            "TYPE": "int",
+            "MANDATORY": False,
+            "MIN": 0,
+            "MAX": 100,
+        },
     ]
 
+def register_metrics(manager_fetchers: FetcherManager, manager_snmper: SnmperManager,
+                     manager_writers: WriterManager) -> None:
+    """
+    Registers the metrics read from shared state at scrape time (queues, RTT estimates,
+    circuit breaker, spool, HTTP client, thread liveness).
+    """
+    REGISTRY.collector("core_task_queue_depth", "Polls waiting in task_fetcher_queue.", "gauge",
+                       lambda: [({}, task_fetcher_queue.qsize())])
+    REGISTRY.collector("core_task_queue_dropped_total", "Polls dropped from task_fetcher_queue for staleness.",
+                       "counter", lambda: [({}, task_fetcher_queue.stats()["dropped"])])
+    REGISTRY.collector("core_task_queue_coalesced_total", "Polls merged with a pending poll of the same item.",
+                       "counter", lambda: [({}, task_fetcher_queue.stats()["coalesced"])])
+    REGISTRY.collector("core_response_queue_depth", "Results waiting in response_snmp_queue for the writers.",
+                       "gauge", lambda: [({}, response_snmp_queue.qsize())])
+    REGISTRY.collector("core_snmp_rtt_seconds", "Per-host smoothed RTT (srtt) and retransmission timeout (rto).",
+                       "gauge", lambda: [({"host": host, "stat": stat}, value)
+                                         for host, state in manager_snmper.rtt.snapshot().items()
+                                         for stat, value in (("srtt", state["srtt"]), ("rto", state["rto"]))
+                                         if value is not None])
+    REGISTRY.collector("core_circuit_open_hosts", "Hosts whose circuit breaker is open or half-open.", "gauge",
+                       lambda: [({}, len(manager_snmper.breaker.open_hosts))])
+    REGISTRY.collector("core_spool_rows", "Rows waiting in the local spool.", "gauge",
+                       lambda: [({}, (manager_writers.spool_backlog() or {}).get("rows", 0))])
+    REGISTRY.collector("core_spool_dropped_rows_total", "Spooled rows dropped because the spool was full.",
+                       "counter", lambda: [({}, (manager_writers.spool_backlog() or {}).get("dropped", 0))])
+    REGISTRY.collector("core_api_requests_total", "API requests made by the core per endpoint.", "counter",
+                       lambda: [({"endpoint": endpoint}, entry["count"]) for endpoint, entry in FetchData.stats().items()])
+    REGISTRY.collector("core_api_errors_total", "Failed API requests per endpoint.", "counter",
+                       lambda: [({"endpoint": endpoint}, entry["errors"]) for endpoint, entry in FetchData.stats().items()])
+    REGISTRY.collector("core_threads_alive", "Alive threads per role.", "gauge", lambda: [
+        ({"role": "fetcher"}, sum(fetcher.is_alive() for fetcher in manager_fetchers.fetchers)),
+        ({"role": "snmper"}, len(manager_snmper.active_snmper_ids)),
+        ({"role": "writer"}, sum(writer.is_alive() for writer in manager_writers.writers)),
+    ])
+
 def on_exit() -> int:
     """
     Cleanup routine called when the server is stopping.
@@ -103,8 +237,22 @@ def server_startup() -> int:
     logger.info(f"ICMP monitoring:  {ICMP_FEATURE_STATUS}")
     logger.info(f"Number of fetchers:  {config_forks['FETCHERS']}")
     logger.info(f"Number of snmpers:  {config_forks['SNMPERS']}")
+    logger.info(f"SNMP engine:  {config_snmp_engine} (max in flight: {config_max_inflight})")
+    if config_snmp_engine == SNMP_ENGINE_PROCESS:
+        logger.info(f"Number of poller workers:  {config_snmp_workers}")
+    logger.info(f"SNMP varbinds per GET:  {config_max_varbinds}")
+    logger.info(f"SNMP raw UDP fast path:  {'enabled' if config_snmp_fast_get else 'disabled'}")
+    logger.info(f"SNMP timeout bounds:  {config_timeout_min}s - {config_timeout_max}s (max retries: {config_max_retries})")
+    logger.info(f"Host circuit breaker threshold:  {config_breaker_threshold}")
+    logger.info(f"Task queue max staleness:  {config_max_staleness}s")
+    logger.info(f"Number of writers:  {config_writers} (batch: {config_writer_batch}, window: {WRITER_FLUSH_INTERVAL}s)")
+    logger.info(f"Result spool:  {config_spool_path or 'disabled'} (max rows: {config_spool_max_rows}, replay: {config_replay_rate} rows/s)")
+    logger.info(f"Metrics endpoint:  {f'port {config_listen_port}' if config_listen_port else 'disabled'}")
     logger.info("******************************")
 
+    # Previous samples of Delta items: written by the snmpers, pruned by the fetchers
+    delta_samples = DeltaCache()
+
     # Create and start fetcher threads
     manager_fetchers = FetcherManager(
         logger=logger,
@@ -113,6 +261,7 @@ def server_startup() -> int:
         stop_event=stop_event,
         num_fetchers=config_forks["FETCHERS"],
         interval=interval_fetchers,
+        deltas=delta_samples,
     )
     manager_fetchers.start_fetchers()
     logger.info("Fetcher threads started.")
@@ -126,18 +275,66 @@ def server_startup() -> int:
         stop_event=stop_event,
         num_snmpers=config_forks["SNMPERS"],
         interval=interval_snmper,
+        engine=config_snmp_engine,
+        max_inflight=config_max_inflight,
+        max_varbinds=config_max_varbinds,
+        timeout_bounds=(config_timeout_min, config_timeout_max),
+        max_retries=config_max_retries,
+        breaker_threshold=config_breaker_threshold,
+        num_workers=config_snmp_workers,
+        fast_get=config_snmp_fast_get,
+        deltas=delta_samples,
     )
     manager_snmper.start_snmpers()
     logger.info("SNMP threads started.")
 
+    # Create and start writer threads (persist response_snmp_queue in bulk)
+    manager_writers = WriterManager(
+        logger=logger,
+        response_queue=response_snmp_queue,
+        stop_event=stop_event,
+        num_writers=config_writers,
+        batch_size=config_writer_batch,
+        flush_interval=WRITER_FLUSH_INTERVAL,
+        spool_path=config_spool_path,
+        spool_max_rows=config_spool_max_rows,
+        replay_rate=config_replay_rate,
+    )
+    manager_writers.start_writers()
+    logger.info("Writer threads started.")
+
+    # Metrics endpoint (Prometheus text on /metrics)
+    register_metrics(manager_fetchers, manager_snmper, manager_writers)
+    metrics_server = MetricsServer(logger, config_listen_ip, config_listen_port)
+    if config_listen_port:
+        metrics_server.start()
+
     # Main loop: wait until stopped or any threads die
+    dropped: int = 0
+    next_report: float = monotonic() + 60
     try:
         while (
             not stop_event.is_set()
             and manager_fetchers.all_fetchers_alive
             and manager_snmper.all_snmpers_alive
+            and manager_writers.all_writers_alive
         ):
             sleep(1)
+            if monotonic() >= next_report:
+                next_report = monotonic() + 60
+                stats = task_fetcher_queue.stats()
+                if stats["dropped"] > dropped:
+                    logger.warning(
+                        f"Task queue overloaded: {stats['dropped'] - dropped} stale polls dropped in the last minute "
+                        f"({stats['pending']} pending, {stats['coalesced']} coalesced in total)."
+                    )
+                    dropped = stats["dropped"]
+                backlog = manager_writers.spool_backlog()
+                if backlog and (backlog["rows"] or backlog["dropped"]):
+                    logger.warning(
+                        f"Result spool backlog: {backlog['rows']} rows in {backlog['entries']} batches "
+                        f"({backlog['dropped']} rows dropped because the spool was full)."
+                    )
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt received, stopping threads...")
         stop_event.set()
@@ -145,6 +342,8 @@ def server_startup() -> int:
         # Stop both sets of threads
         manager_snmper.stop_snmpers()
         manager_fetchers.stop_fetchers()
+        manager_writers.stop_writers()  # Last: flushes the results of the stopped snmpers
+        metrics_server.stop()
         return on_exit()
 
 
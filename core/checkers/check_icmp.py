@@ -1,4 +1,5 @@
-import subprocess
+from .icmp import PINGER
+from .loop import run_sync
 
 def check_icmp_pinger(ip: str) -> bool:
     """
@@ -9,13 +10,6 @@ def check_icmp_pinger(ip: str) -> bool:
         bool: True si el ping fue exitoso, False si falló.
     """
     try:
-        command = ['ping', '-n', '1', ip]
-        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        if result.returncode == 0:  
-            return True
-        else:  
-            return False
-
+        return run_sync(PINGER.ping(ip)).reachable
     except Exception as e:
         return False
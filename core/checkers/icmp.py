@@ -0,0 +1,292 @@
+"""
+icmp.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Pinger ICMP nativo y asíncrono (Linux), sin lanzar el comando ping. Usa sockets ICMP de
+datagrama sin privilegios (SOCK_DGRAM/IPPROTO_ICMP, habilitados por net.ipv4.ping_group_range)
+y, si no están permitidos, un socket raw (requiere CAP_NET_RAW). Un único socket por event
+loop multiplexa todos los destinos: cada echo request se asocia a su respuesta por
+(dirección, secuencia) y, en modo raw, también por identificador.
+
+Por host se calculan min/avg/max/mdev (como iputils) y el porcentaje de pérdida.
+"""
+import asyncio
+import ipaddress
+import math
+import os
+import socket
+import struct
+import threading
+import time
+import weakref
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+ICMP_HEADER = struct.Struct("!BBHHH")  # type, code, checksum, identifier, sequence
+ICMP_MAX_PAYLOAD = 65507 - ICMP_HEADER.size
+
+DEFAULT_TIMEOUT = 1.0  # s por echo request
+DEFAULT_INTERVAL = 0.2  # s entre echo requests al mismo host
+DEFAULT_PACKET_SIZE = 32  # bytes de datos (como ping de Windows)
+DEFAULT_CONCURRENCY = 1000  # hosts en curso a la vez en ping_many
+ICMP_RCVBUF = 4 * 1024 * 1024
+
+
+def checksum(data: bytes) -> int:
+    """Checksum de Internet (RFC 1071)."""
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+class PingStats:
+    """
+    Resultado del ping a un host.
+    """
+    __slots__ = ("host", "sent", "rtts", "error")
+
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self.sent = 0
+        self.rtts: List[float] = []  # ms de las respuestas recibidas
+        self.error: Optional[str] = None
+
+    @property
+    def received(self) -> int:
+        return len(self.rtts)
+
+    @property
+    def reachable(self) -> bool:
+        return bool(self.rtts)
+
+    @property
+    def loss(self) -> float:
+        """Porcentaje de echo requests sin respuesta."""
+        return 100.0 * (self.sent - self.received) / self.sent if self.sent else 100.0
+
+    @property
+    def min(self) -> Optional[float]:
+        return min(self.rtts) if self.rtts else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return max(self.rtts) if self.rtts else None
+
+    @property
+    def avg(self) -> Optional[float]:
+        return sum(self.rtts) / len(self.rtts) if self.rtts else None
+
+    @property
+    def mdev(self) -> Optional[float]:
+        """Desviación media como iputils: sqrt(E[rtt²] - E[rtt]²)."""
+        if not self.rtts:
+            return None
+        avg = self.avg
+        return math.sqrt(max(0.0, sum(rtt * rtt for rtt in self.rtts) / len(self.rtts) - avg * avg))
+
+    def channels(self) -> List[Dict]:
+        """Canales con el mismo formato que devolvía Ping.ping."""
+        return [
+            {"name": "Ping Time Min", "mode": "float", "kind": "TimeResponse", "value": self.min},
+            {"name": "Ping Time Avg", "mode": "float", "kind": "TimeResponse", "value": self.avg},
+            {"name": "Ping Time Max", "mode": "float", "kind": "TimeResponse", "value": self.max},
+            {"name": "Ping Time MDEV", "mode": "float", "kind": "TimeResponse", "value": self.mdev},
+            {"name": "Packet Loss", "mode": "float", "kind": "Percent", "value": self.loss},
+        ]
+
+
+class _IcmpSocket:
+    """
+    Socket ICMP de un event loop y los echo requests pendientes.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        try:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+            self.raw = False
+        except OSError:
+            try:
+                self.sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+            except OSError as e:
+                raise OSError(f"ICMP sockets not permitted (set net.ipv4.ping_group_range or grant CAP_NET_RAW): {e}")
+            self.raw = True
+        self.sock.setblocking(False)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, ICMP_RCVBUF)
+        # En modo datagrama el kernel reemplaza el identificador por el puerto local del socket
+        self.ident = (os.getpid() ^ id(self)) & 0xFFFF
+        self.sequence = 0
+        self.pending: Dict[Tuple[str, int], Tuple[asyncio.Future, float]] = {}
+        self.payloads: Dict[int, bytes] = {}
+        loop.add_reader(self.sock.fileno(), self._readable)
+
+    def close(self) -> None:
+        self.loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+        for future, _ in self.pending.values():
+            if not future.done():
+                future.cancel()
+        self.pending.clear()
+
+    def _packet(self, sequence: int, size: int) -> bytes:
+        payload = self.payloads.get(size)
+        if payload is None:
+            payload = self.payloads[size] = bytes(i & 0xFF for i in range(size))
+        header = ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, self.ident, sequence)
+        return ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, checksum(header + payload), self.ident, sequence) + payload
+
+    def _readable(self) -> None:
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            received = time.perf_counter()
+            if self.raw:
+                data = data[(data[0] & 0x0F) * 4:]  # Se descarta la cabecera IP
+            if len(data) < ICMP_HEADER.size or data[0] != ICMP_ECHO_REPLY:
+                continue
+            _, _, _, ident, sequence = ICMP_HEADER.unpack_from(data)
+            if self.raw and ident != self.ident:
+                continue  # Respuesta a otro proceso (un socket raw recibe todo el ICMP)
+            entry = self.pending.pop((addr[0], sequence), None)
+            if entry is not None and not entry[0].done():
+                entry[0].set_result((received - entry[1]) * 1000)  # ms
+
+    async def _send(self, packet: bytes, ip: str) -> None:
+        while True:
+            try:
+                self.sock.sendto(packet, (ip, 0))
+                return
+            except (BlockingIOError, InterruptedError):
+                await asyncio.sleep(0.001)  # Buffer de envío lleno en ráfagas grandes
+
+    async def echo(self, ip: str, size: int, timeout: float) -> Optional[float]:
+        """
+        Envía un echo request y espera su respuesta.
+
+        Returns:
+            Optional[float]: RTT en ms, o None si no hubo respuesta antes del timeout.
+        """
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        key = (ip, self.sequence)
+        packet = self._packet(self.sequence, size)
+        future = self.loop.create_future()
+        self.pending[key] = (future, time.perf_counter())
+        try:
+            await self._send(packet, ip)
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.pending.pop(key, None)
+
+
+class Pinger:
+    """
+    Pinger nativo, un socket ICMP por event loop.
+    """
+
+    def __init__(self) -> None:
+        self._sockets: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _IcmpSocket]" = weakref.WeakKeyDictionary()
+        self._addresses: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _socket(self) -> _IcmpSocket:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            icmp = self._sockets.get(loop)
+            if icmp is None:
+                icmp = self._sockets[loop] = _IcmpSocket(loop)
+        return icmp
+
+    async def resolve(self, host: str) -> str:
+        """Dirección IPv4 del host (los nombres se resuelven una vez y se cachean)."""
+        try:
+            return str(ipaddress.IPv4Address(host))
+        except ValueError:
+            pass
+        ip = self._addresses.get(host)
+        if ip is None:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, family=socket.AF_INET)
+            ip = self._addresses[host] = infos[0][4][0]
+        return ip
+
+    def forget(self, host: str) -> None:
+        self._addresses.pop(host, None)
+
+    async def ping(self, host: str, count: int = 1, timeout: float = DEFAULT_TIMEOUT,
+                   size: int = DEFAULT_PACKET_SIZE, interval: float = DEFAULT_INTERVAL) -> PingStats:
+        """
+        Envía count echo requests al host (separados por interval) y espera cada uno hasta timeout.
+
+        Returns:
+            PingStats: Estadísticas del host; error con el motivo si no se pudo enviar.
+        """
+        stats = PingStats(host)
+        try:
+            icmp = self._socket()
+            ip = await self.resolve(host)
+        except OSError as e:
+            stats.error = str(e)
+            return stats
+        size = max(0, min(int(size), ICMP_MAX_PAYLOAD))
+        probes: List[asyncio.Future] = []
+        for index in range(max(1, int(count))):
+            if index:
+                await asyncio.sleep(interval)
+            probes.append(asyncio.ensure_future(icmp.echo(ip, size, timeout)))
+            stats.sent += 1
+        for rtt in await asyncio.gather(*probes, return_exceptions=True):
+            if isinstance(rtt, Exception):
+                stats.error = str(rtt)
+            elif rtt is not None:
+                stats.rtts.append(rtt)
+        return stats
+
+    async def ping_many(self, hosts: Iterable[str], count: int = 1, timeout: float = DEFAULT_TIMEOUT,
+                        size: int = DEFAULT_PACKET_SIZE, interval: float = DEFAULT_INTERVAL,
+                        concurrency: int = DEFAULT_CONCURRENCY,
+                        settings: Optional[Dict[str, Tuple[int, float, int]]] = None) -> AsyncIterator[PingStats]:
+        """
+        Hace ping a todos los hosts a la vez (a lo sumo concurrency en curso) y entrega cada
+        resultado apenas termina su host. settings permite dar (count, timeout, size) propios a
+        algunos hosts. Si se deja de iterar antes del final, los pings pendientes se cancelan.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        settings = settings or {}
+
+        async def one(host: str) -> PingStats:
+            async with semaphore:
+                host_count, host_timeout, host_size = settings.get(host, (count, timeout, size))
+                return await self.ping(host, host_count, host_timeout, host_size, interval)
+
+        tasks = [asyncio.ensure_future(one(host)) for host in hosts]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def release(self) -> None:
+        """Cierra el socket del event loop actual."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            icmp = self._sockets.pop(loop, None)
+        if icmp is not None:
+            icmp.close()
+
+
+# Pinger compartido del proceso
+PINGER = Pinger()
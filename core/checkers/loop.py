@@ -0,0 +1,26 @@
+"""
+loop.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Event loop de larga vida por hilo para los wrappers sincrónicos de los checkers. A diferencia
+de asyncio.run, el loop (y los sockets/engines atados a él) sobrevive entre llamadas.
+"""
+import asyncio
+import threading
+
+_thread_state = threading.local()
+
+
+def run_sync(coroutine):
+    """
+    Ejecuta la corrutina en el event loop de larga vida del hilo actual (uno por hilo), de
+    modo que los objetos cacheados por loop se reutilicen entre llamadas sincrónicas.
+    """
+    loop = getattr(_thread_state, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _thread_state.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    return loop.run_until_complete(coroutine)
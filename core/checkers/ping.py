@@ -22,13 +22,17 @@
 """
 ping.py
 
-Módulo para ejecutar el comando ping en Windows y procesar su salida
-en inglés y español.
+Checker de items ICMP (tipo 2) sobre el pinger nativo (checkers/icmp.py); ya no se ejecuta
+el comando ping de Windows. Los items ICMP de un mismo host que vencen juntos comparten una
+sola ronda de echo requests (get_data_host_async), y los hosts de un ciclo se consultan a la vez.
 """
 
-import os
 import gc
 import logging
+from typing import Dict, List, Tuple
+
+from .icmp import PINGER
+from .loop import run_sync
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -90,121 +94,46 @@ class Ping(object):
 
     def ping(self, target, count, timeout, packetsize):
         """
-        Ejecuta el comando ping en Windows y parsea la salida para extraer:
-         - Tiempos de respuesta (mínimo, promedio, máximo)
-         - Pérdida de paquetes
-
-        Soporta salida en inglés y español.
+        Hace ping al target con el pinger nativo (en el event loop de larga vida del hilo) y
+        devuelve los canales de tiempos (mínimo, promedio, máximo, mdev) y pérdida de paquetes.
         """
-        # Generar el comando de ping para Windows:
-        # -n : Número de pings
-        # -l : Tamaño del paquete en bytes
-        # -w : Timeout en milisegundos
-        command = "ping -n {} -l {} -w {} {}".format(count, packetsize, timeout * 1000, target)
-        ret = os.popen(command)
-        pingdata = ret.readlines()
-        ret.close()
-        
-        logging.debug("Salida completa del comando ping: %s", pingdata)
-        
-        tiempos = []
-        pack_loss = None
-
-        # Función auxiliar para extraer el tiempo a partir de una línea dada y un marcador
-        def extraer_tiempo(line_lower, marker):
-            start_idx = line_lower.index(marker) + len(marker)
-            # Buscamos la letra "m" que aparece en "ms" o en "m" (caso de <)
-            end_idx = line_lower.find("m", start_idx)
-            tiempo_str = line_lower[start_idx:end_idx].strip()
-            # Si el valor es de la forma "<1" se asigna un valor fijo de 1 ms
-            if tiempo_str.startswith("<"):
-                return 1
-            # Si se utiliza notación como "1m" (por error, pero se contempla) se convierte
-            if tiempo_str.endswith("m"):
-                try:
-                    return int(tiempo_str[:-1]) * 1000
-                except:
-                    return 1
-            return int(tiempo_str)
-
-        for line in pingdata:
-            line_lower = line.lower()
-
-            # Verificar si la línea es respuesta del ping (inglés o español)
-            if line_lower.startswith("reply from") or line_lower.startswith("respuesta desde"):
-                # Comprobamos múltiples variantes: "time=" o "time<" para inglés y "tiempo=" o "tiempo<" para español
-                marcador = None
-                if "time=" in line_lower:
-                    marcador = "time="
-                elif "time<" in line_lower:
-                    marcador = "time<"
-                elif "tiempo=" in line_lower:
-                    marcador = "tiempo="
-                elif "tiempo<" in line_lower:
-                    marcador = "tiempo<"
-                
-                if marcador:
-                    try:
-                        tiempo = extraer_tiempo(line_lower, marcador)
-                        tiempos.append(tiempo)
-                    except Exception as e:
-                        logging.debug("Error al extraer el tiempo en la línea: %s | %s", line.strip(), e)
-            
-            # Procesar la línea que indica la pérdida de paquetes (inglés o español)
-            if "lost =" in line_lower or "perdidos =" in line_lower:
-                try:
-                    partes = line.split(",")
-                    for part in partes:
-                        part_lower = part.lower()
-                        if "lost =" in part_lower or "perdidos =" in part_lower:
-                            # Extrae el número que sigue al signo "="
-                            lost_str = part.split("=")[1].strip().split(" ")[0]
-                            pack_loss = int(lost_str)
-                except Exception as e:
-                    logging.debug("Error al extraer la pérdida de paquetes en la línea: %s | %s", line.strip(), e)
-
-        # Si no se obtuvieron tiempos o pérdida de paquetes, se considera que el host no es reachable.
-        if not tiempos or pack_loss is None:
+        stats = run_sync(PINGER.ping(target, int(count), float(timeout), int(packetsize)))
+        logging.debug("Ping %s: %s/%s respuestas %s", target, stats.received, stats.sent, stats.error or "")
+        if not stats.reachable:
             return "Not reachable!"
+        return stats.channels()
 
-        tiempo_min = min(tiempos)
-        tiempo_max = max(tiempos)
-        tiempo_avg = sum(tiempos) / len(tiempos)
-        tiempo_mdev = 0  # En Windows se deja en 0
+    @staticmethod
+    def probe_settings(items: List[Dict]) -> Tuple[int, float, int]:
+        """
+        Parámetros de la ronda compartida por los items de un host: la mayor cantidad de echo
+        requests, el mayor timeout y el mayor tamaño de paquete pedidos por sus items.
+        """
+        return (max(int(item['pingcount']) for item in items),
+                max(float(item['timeout']) for item in items),
+                max(int(item['packsize']) for item in items))
 
-        channel_list = [
-            {
-                "name": "Ping Time Min",
-                "mode": "float",
-                "kind": "TimeResponse",
-                "value": float(tiempo_min)
-            },
-            {
-                "name": "Ping Time Avg",
-                "mode": "float",
-                "kind": "TimeResponse",
-                "value": float(tiempo_avg)
-            },
-            {
-                "name": "Ping Time Max",
-                "mode": "float",
-                "kind": "TimeResponse",
-                "value": float(tiempo_max)
-            },
-            {
-                "name": "Ping Time MDEV",
-                "mode": "float",
-                "kind": "TimeResponse",
-                "value": float(tiempo_mdev)
-            },
-            {
-                "name": "Packet Loss",
-                "mode": "integer",
-                "kind": "Percent",
-                "value": pack_loss
-            }
-        ]
-        return channel_list
+    @staticmethod
+    async def get_data_host_async(items: List[Dict]) -> Dict:
+        """
+        Una ronda de ping para todos los items ICMP de un host.
+
+        Returns:
+            Dict: {"host", "message", "channel"} con los canales de Ping (valores None y 100 %
+                de pérdida si no respondió) y "error" si el host no es alcanzable.
+        """
+        host = items[0]['host']
+        count, timeout, size = Ping.probe_settings(items)
+        try:
+            stats = await PINGER.ping(host, count, timeout, size)
+        except Exception as e:
+            logging.error("Ping to %s failed. Error: %s", host, e)
+            return {"host": host, "error": "Exception", "code": 1, "message": "Ping failed.", "type": 2}
+        data_r = {"host": host, "message": "OK", "channel": stats.channels(), "type": 2}
+        if not stats.reachable:
+            data_r.update(error="Exception", code=1,
+                          message=stats.error or f"{host} is Not reachable!")
+        return data_r
 
     @staticmethod
     # def get_data(data, out_queue):
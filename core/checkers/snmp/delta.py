@@ -0,0 +1,82 @@
+"""
+delta.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Cache de la muestra anterior de cada item "Delta" (tipo 5) para emitir tasas por segundo en
+lugar de valores crudos de contadores. Se manejan el desborde de Counter32/Counter64 y los
+reinicios del agente, detectados porque sysUpTime retrocede.
+"""
+from threading import Lock
+from typing import Dict, Optional
+
+SYS_UPTIME_OID = "1.3.6.1.2.1.1.3.0"  # TimeTicks (centésimas de segundo)
+TIMETICKS_PER_SECOND = 100.0
+
+
+class _Sample:
+    __slots__ = ("value", "timestamp", "uptime")
+
+    def __init__(self, value: int, timestamp: float, uptime: Optional[int]) -> None:
+        self.value = value
+        self.timestamp = timestamp
+        self.uptime = uptime
+
+
+class DeltaCache:
+    """
+    Última muestra (valor, instante, sysUpTime) por item, compartida por los snmpers.
+    """
+
+    def __init__(self) -> None:
+        self._samples: Dict[int, _Sample] = {}
+        self._lock = Lock()
+
+    def rate(self, itemid: int, value: int, timestamp: float, uptime: Optional[int] = None,
+             bits: Optional[int] = None) -> Optional[float]:
+        """
+        Guarda la muestra y calcula la tasa respecto a la anterior.
+
+        Args:
+            itemid (int): Identificador del item.
+            value (int): Valor crudo del contador.
+            timestamp (float): Instante de la muestra (reloj monotónico, segundos).
+            uptime (Optional[int]): sysUpTime del agente en TimeTicks, si se consultó.
+            bits (Optional[int]): 32 o 64 para contadores (desborde), None para otros tipos.
+
+        Returns:
+            Optional[float]: Unidades por segundo, o None si no hay tasa válida (primera
+                muestra, reinicio del agente o discontinuidad).
+        """
+        with self._lock:
+            previous = self._samples.get(itemid)
+            self._samples[itemid] = _Sample(value, timestamp, uptime)
+        if previous is None:
+            return None
+        uptime_known = uptime is not None and previous.uptime is not None
+        if uptime_known:
+            if uptime < previous.uptime:
+                return None  # El agente se reinició: los contadores volvieron a cero
+            elapsed = (uptime - previous.uptime) / TIMETICKS_PER_SECOND
+        else:
+            elapsed = timestamp - previous.timestamp
+        if elapsed <= 0:
+            return None
+        delta = value - previous.value
+        if delta < 0 and bits:
+            delta += 1 << bits
+            if not uptime_known and delta >= 1 << (bits - 1):
+                # Sin sysUpTime no se puede descartar un reinicio: más de medio rango en un
+                # intervalo se toma como reinicio no detectado. Con sysUpTime el agente no se
+                # reinició y el desborde es legítimo (Counter32 de un enlace de 10G en < 2 s).
+                return None
+        return delta / elapsed
+
+    def forget(self, itemid: int) -> None:
+        with self._lock:
+            self._samples.pop(itemid, None)
+
+    def __len__(self) -> int:
+        return len(self._samples)
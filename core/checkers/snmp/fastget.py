@@ -0,0 +1,365 @@
+"""
+fastget.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Camino rápido para GET SNMPv2c numéricos sin la pila de pysnmp. Por cada (community, OIDs)
+se codifica una sola vez el mensaje BER del GetRequest con un request-id de 4 bytes fijos, y
+en cada consulta sólo se reemplazan esos 4 bytes. Miles de consultas pendientes comparten
+unos pocos sockets UDP por event loop; las respuestas se asocian por request-id y dirección.
+
+De la respuesta sólo se decodifican los valores numéricos (INTEGER, Counter32, Gauge32,
+TimeTicks, Counter64, Unsigned32). Cualquier otra cosa (error-status, noSuchObject, strings,
+OIDs no numéricos, varbinds que no coinciden) devuelve None y el llamador usa pysnmp.
+"""
+import asyncio
+import random
+import socket
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+
+from .rtt import RttEstimator, DEFAULT_TIMEOUT, DEFAULT_RETRIES
+
+FAST_GET_SOCKETS = 4  # Sockets UDP por event loop
+FAST_GET_RCVBUF = 4 * 1024 * 1024  # Buffer de recepción por socket (ráfagas de respuestas)
+MAX_TEMPLATES = 65536
+MAX_ADDRESSES = 4096  # Direcciones resueltas por event loop (LRU)
+TIMEOUT_ERROR = "SNMP error indication: No SNMP response received before timeout"
+
+# Request-ids de 4 bytes con codificación BER mínima (primer byte entre 0x01 y 0x7F)
+REQUEST_ID_MIN = 0x01000000
+REQUEST_ID_SPAN = 0x7FFFFFFF - REQUEST_ID_MIN
+
+TAG_INTEGER = 0x02
+TAG_OID = 0x06
+TAG_SEQUENCE = 0x30
+TAG_GET_REQUEST = 0xA0
+TAG_RESPONSE = 0xA2
+TAG_COUNTER32 = 0x41
+TAG_GAUGE32 = 0x42
+TAG_TIMETICKS = 0x43
+TAG_COUNTER64 = 0x46
+TAG_UNSIGNED32 = 0x47
+
+
+class Counter32Value(int):
+    """Valor Counter32 decodificado (ancho para el desborde de items Delta)."""
+    bits = 32
+
+
+class Counter64Value(int):
+    bits = 64
+
+
+class _Unusual(Exception):
+    """La respuesta necesita la pila completa de pysnmp."""
+
+
+def _encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes((length,))
+    raw = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes((0x80 | len(raw),)) + raw
+
+
+def _tlv(tag: int, content: bytes) -> bytes:
+    return bytes((tag,)) + _encode_length(len(content)) + content
+
+
+def encode_oid(oid: str) -> bytes:
+    """
+    Contenido BER de un OID numérico ("1.3.6.1.2.1.1.3.0").
+
+    Raises:
+        ValueError: Si el OID no es numérico (nombres de MIB van por pysnmp).
+    """
+    arcs = [int(arc) for arc in oid.strip().strip(".").split(".")]
+    if len(arcs) < 2 or arcs[0] > 2 or (arcs[0] < 2 and arcs[1] > 39) or min(arcs) < 0:
+        raise ValueError(f"Not a numeric OID: {oid}")
+    encoded = bytearray()
+    for arc in [arcs[0] * 40 + arcs[1]] + arcs[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        encoded.extend(reversed(chunk))
+    return bytes(encoded)
+
+
+class GetTemplate:
+    """
+    GetRequest v2c pre-codificado: prefix + request-id (4 bytes) + suffix.
+    """
+    __slots__ = ("prefix", "suffix", "oids")
+
+    def __init__(self, community: str, oids: Tuple[str, ...]) -> None:
+        self.oids: Tuple[bytes, ...] = tuple(encode_oid(oid) for oid in oids)
+        varbinds = _tlv(TAG_SEQUENCE, b"".join(_tlv(TAG_SEQUENCE, _tlv(TAG_OID, oid) + b"\x05\x00")
+                                               for oid in self.oids))
+        # request-id, error-status 0, error-index 0, varbinds
+        pdu_body = b"\x02\x04\x00\x00\x00\x00" + b"\x02\x01\x00\x02\x01\x00" + varbinds
+        message = _tlv(TAG_SEQUENCE, b"\x02\x01\x01" + _tlv(0x04, community.encode()) + _tlv(TAG_GET_REQUEST, pdu_body))
+        offset = len(message) - len(pdu_body) + 2
+        self.prefix = message[:offset]
+        self.suffix = message[offset + 4:]
+
+    def packet(self, request_id: int) -> bytes:
+        return self.prefix + request_id.to_bytes(4, "big") + self.suffix
+
+
+def _read_tlv(data: bytes, position: int) -> Tuple[int, int, int]:
+    """
+    Returns:
+        Tuple[int, int, int]: (tag, inicio del contenido, fin del contenido).
+    """
+    tag = data[position]
+    length = data[position + 1]
+    position += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[position:position + size], "big")
+        position += size
+    end = position + length
+    if end > len(data):
+        raise _Unusual("Truncated BER")
+    return tag, position, end
+
+
+def decode_response(data: bytes) -> Tuple[int, int, List[Tuple[bytes, object]]]:
+    """
+    Decodifica un Response-PDU v2c.
+
+    Returns:
+        Tuple[int, int, List[Tuple[bytes, object]]]: (request-id, error-status,
+            [(contenido del OID, valor)]). Los valores no numéricos lanzan _Unusual.
+    """
+    tag, position, end = _read_tlv(data, 0)
+    if tag != TAG_SEQUENCE:
+        raise _Unusual("Not an SNMP message")
+    tag, start, position = _read_tlv(data, position)  # version
+    if tag != TAG_INTEGER or data[start:position] != b"\x01":
+        raise _Unusual("Not SNMPv2c")
+    _, _, position = _read_tlv(data, position)  # community
+    tag, position, _ = _read_tlv(data, position)
+    if tag != TAG_RESPONSE:
+        raise _Unusual("Not a Response-PDU")
+    _, start, position = _read_tlv(data, position)
+    request_id = int.from_bytes(data[start:position], "big", signed=True)
+    _, start, position = _read_tlv(data, position)
+    error_status = int.from_bytes(data[start:position], "big")
+    _, _, position = _read_tlv(data, position)  # error-index
+    _, position, end = _read_tlv(data, position)  # varbind list
+    varbinds: List[Tuple[bytes, object]] = []
+    while position < end:
+        _, position, varbind_end = _read_tlv(data, position)
+        _, start, position = _read_tlv(data, position)
+        oid = data[start:position]
+        tag, start, position = _read_tlv(data, position)
+        content = data[start:position]
+        if tag == TAG_INTEGER:
+            value: object = int.from_bytes(content, "big", signed=True)
+        elif tag in (TAG_GAUGE32, TAG_TIMETICKS, TAG_UNSIGNED32):
+            value = int.from_bytes(content, "big")
+        elif tag == TAG_COUNTER32:
+            value = Counter32Value(int.from_bytes(content, "big"))
+        elif tag == TAG_COUNTER64:
+            value = Counter64Value(int.from_bytes(content, "big"))
+        else:
+            raise _Unusual(f"Unsupported value type 0x{tag:02x}")
+        varbinds.append((oid, value))
+        position = varbind_end
+    return request_id, error_status, varbinds
+
+
+class _FastProtocol(asyncio.DatagramProtocol):
+    def __init__(self, client: "_FastClient") -> None:
+        self.client = client
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.client.received(data, addr)
+
+
+class _FastClient:
+    """
+    Sockets y consultas pendientes de un event loop.
+    """
+
+    def __init__(self) -> None:
+        self.transports: List[asyncio.DatagramTransport] = []
+        self.pending: Dict[int, Tuple[asyncio.Future, Tuple[str, int]]] = {}
+        self.addresses: OrderedDict = OrderedDict()  # (host, port) -> dirección resuelta
+        self.request_ids = count(random.randrange(REQUEST_ID_SPAN))
+        self.opening: Optional[asyncio.Future] = None
+
+    async def open(self) -> None:
+        if self.transports:
+            return
+        if self.opening is not None:
+            await self.opening
+            return
+        loop = asyncio.get_running_loop()
+        self.opening = loop.create_future()
+        try:
+            for _ in range(FAST_GET_SOCKETS):
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, FAST_GET_RCVBUF)
+                sock.bind(("0.0.0.0", 0))
+                sock.setblocking(False)
+                transport, _ = await loop.create_datagram_endpoint(lambda: _FastProtocol(self), sock=sock)
+                self.transports.append(transport)
+        finally:
+            self.opening.set_result(None)
+            self.opening = None
+
+    def close(self) -> None:
+        for transport in self.transports:
+            transport.close()
+        self.transports.clear()
+        for future, _ in self.pending.values():
+            if not future.done():
+                future.cancel()
+        self.pending.clear()
+
+    async def address(self, host: str, port: int) -> Tuple[str, int]:
+        key = (host, port)
+        address = self.addresses.get(key)
+        if address is not None:
+            self.addresses.move_to_end(key)
+            return address
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, family=socket.AF_INET,
+                                                             type=socket.SOCK_DGRAM)
+        address = self.addresses[key] = infos[0][4][:2]
+        if len(self.addresses) > MAX_ADDRESSES:
+            self.addresses.popitem(last=False)
+        return address
+
+    def next_request_id(self) -> int:
+        return REQUEST_ID_MIN + next(self.request_ids) % REQUEST_ID_SPAN
+
+    def received(self, data: bytes, addr) -> None:
+        try:
+            response = decode_response(data)
+        except (_Unusual, IndexError, ValueError) as e:
+            response = e  # Se resuelve con la excepción si el request-id se puede leer
+            request_id = self._peek_request_id(data)
+        else:
+            request_id = response[0]
+        entry = self.pending.get(request_id)
+        if entry is None or tuple(addr[:2]) != entry[1] or entry[0].done():
+            return
+        entry[0].set_result(response)
+
+    @staticmethod
+    def _peek_request_id(data: bytes) -> Optional[int]:
+        try:
+            _, position, _ = _read_tlv(data, 0)
+            _, _, position = _read_tlv(data, position)
+            _, _, position = _read_tlv(data, position)
+            _, position, _ = _read_tlv(data, position)
+            _, start, position = _read_tlv(data, position)
+            return int.from_bytes(data[start:position], "big", signed=True)
+        except (_Unusual, IndexError):
+            return None
+
+
+class FastGet:
+    """
+    GET v2c por UDP crudo, un cliente por event loop. Las plantillas BER se comparten.
+    """
+
+    def __init__(self) -> None:
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _FastClient]" = weakref.WeakKeyDictionary()
+        self._templates: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _client(self) -> _FastClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                client = self._clients[loop] = _FastClient()
+        return client
+
+    def template(self, community: str, oids: Tuple[str, ...]) -> Optional[GetTemplate]:
+        """Plantilla de (community, OIDs), o None si algún OID no es numérico."""
+        key = (community, oids)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                return template
+        try:
+            template = GetTemplate(community, oids)
+        except ValueError:
+            return None
+        with self._lock:
+            self._templates[key] = template
+            if len(self._templates) > MAX_TEMPLATES:
+                self._templates.popitem(last=False)
+        return template
+
+    async def get_many(self, oids: List[str], target: str, community: str, port: int,
+                       rtt: RttEstimator = None) -> Optional[List[Tuple[object, Optional[str]]]]:
+        """
+        GET de varios OIDs en una PDU, con el timeout/reintentos adaptativos del host.
+
+        Returns:
+            Optional[List[Tuple[object, Optional[str]]]]: (valor, error) por OID como
+                SNMPCustomNumber.snmp_get_many, o None si la consulta debe ir por pysnmp.
+        """
+        template = self.template(community, tuple(oids))
+        if template is None:
+            return None
+        client = self._client()
+        await client.open()
+        if not client.transports:
+            return None
+        address = await client.address(target, port)
+        timeout, retries = rtt.parameters(target) if rtt is not None else (DEFAULT_TIMEOUT, DEFAULT_RETRIES)
+        request_id = client.next_request_id()
+        packet = template.packet(request_id)
+        future = asyncio.get_running_loop().create_future()
+        client.pending[request_id] = (future, address)
+        transport = client.transports[request_id % len(client.transports)]
+        try:
+            for attempt in range(retries + 1):
+                sent = time.perf_counter()
+                transport.sendto(packet, address)
+                try:
+                    response = await asyncio.wait_for(asyncio.shield(future), timeout)
+                    break
+                except asyncio.TimeoutError:
+                    continue
+            else:
+                if rtt is not None:
+                    rtt.timeout(target)
+                return [(None, TIMEOUT_ERROR)] * len(oids)
+        finally:
+            client.pending.pop(request_id, None)
+        if attempt == 0 and rtt is not None:
+            rtt.sample(target, time.perf_counter() - sent)  # Karn: sólo respuestas a la primera transmisión
+        if isinstance(response, Exception):
+            return None
+        _, error_status, varbinds = response
+        if error_status or tuple(oid for oid, _ in varbinds) != template.oids:
+            return None
+        return [(value, None) for _, value in varbinds]
+
+    def release(self) -> None:
+        """Cierra los sockets del event loop actual."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.pop(loop, None)
+        if client is not None:
+            client.close()
+
+
+# Camino rápido compartido por los checkers SNMP del proceso
+FAST_GET = FastGet()
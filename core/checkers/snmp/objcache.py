@@ -0,0 +1,190 @@
+"""
+objcache.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Cache de objetos pysnmp reutilizables entre consultas: un SnmpEngine por event loop, los
+UdpTransportTarget ya resueltos por (host, port, timeout, retries), los CommunityData por
+community y los ObjectType ya resueltos contra el MIB por OID. Construirlos y resolverlos en
+cada consulta cuesta más que la espera de red en equipos de la LAN.
+
+Los objetos se guardan por event loop (el engine y los transportes quedan atados al loop que
+los creó). Los wrappers sincrónicos usan run_sync (checkers/loop.py), que mantiene un loop por
+hilo en lugar de crear uno nuevo con asyncio.run en cada consulta, para que el cache sobreviva
+entre llamadas.
+La invalidación es explícita (invalidate_host / invalidate_oid) cuando cambia un host o un item;
+invalidate_item olvida tanto la dirección y el OID anteriores del item como los actuales.
+"""
+import asyncio
+import copy
+import math
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from pysnmp.hlapi.v3arch.asyncio import SnmpEngine, UdpTransportTarget, CommunityData, ObjectType, ObjectIdentity
+
+# Límites por event loop
+MAX_TARGETS = 4096
+MAX_OIDS = 65536
+MAX_COMMUNITIES = 1024
+# Los timeouts adaptativos (RTT) se redondean hacia arriba a 4 escalones por octava: el engine
+# registra una dirección destino por (host, timeout, retries), así su número queda acotado.
+TIMEOUT_STEPS_PER_OCTAVE = 4
+
+
+def quantize_timeout(timeout: float) -> float:
+    """Redondea el timeout hacia arriba al escalón geométrico más cercano."""
+    if timeout <= 0:
+        return timeout
+    return round(2 ** (math.ceil(math.log2(timeout) * TIMEOUT_STEPS_PER_OCTAVE) / TIMEOUT_STEPS_PER_OCTAVE), 3)
+
+
+def _remember(cache: OrderedDict, key, value, limit: int):
+    cache[key] = value
+    if len(cache) > limit:
+        cache.popitem(last=False)
+    return value
+
+
+class _LoopObjects:
+    __slots__ = ("engine", "targets", "addresses", "communities", "oids")
+
+    def __init__(self) -> None:
+        self.engine: Optional[SnmpEngine] = None
+        self.targets: OrderedDict = OrderedDict()  # (host, port, timeout, retries) -> UdpTransportTarget
+        self.addresses: OrderedDict = OrderedDict()  # (host, port) -> primer target resuelto
+        self.communities: OrderedDict = OrderedDict()  # community -> CommunityData
+        self.oids: OrderedDict = OrderedDict()  # oid -> ObjectType resuelto
+
+
+class SnmpObjects:
+    """
+    Objetos pysnmp por event loop, compartidos por todas las consultas que corren en él.
+    """
+
+    def __init__(self) -> None:
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopObjects]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _objects(self) -> _LoopObjects:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            objects = self._loops.get(loop)
+            if objects is None:
+                objects = self._loops[loop] = _LoopObjects()
+        return objects
+
+    def engine(self) -> SnmpEngine:
+        """SnmpEngine del event loop actual (se crea una vez y no se cierra tras cada consulta)."""
+        objects = self._objects()
+        if objects.engine is None:
+            objects.engine = SnmpEngine()
+        return objects.engine
+
+    async def target(self, host: str, port: int, timeout: float, retries: int) -> UdpTransportTarget:
+        """
+        UdpTransportTarget del host. La dirección se resuelve una sola vez por (host, port); los
+        demás timeouts/reintentos son copias del target ya resuelto.
+        """
+        objects = self._objects()
+        key = (host, port, timeout, retries)
+        with self._lock:
+            target = objects.targets.get(key)
+            if target is not None:
+                objects.targets.move_to_end(key)
+                return target
+            resolved = objects.addresses.get((host, port))
+            if resolved is not None:
+                objects.addresses.move_to_end((host, port))
+        if resolved is None:
+            target = await UdpTransportTarget.create((host, port), timeout=timeout, retries=retries)
+        else:
+            target = copy.copy(resolved)
+            target.timeout, target.retries = timeout, retries
+        with self._lock:
+            if (host, port) not in objects.addresses:
+                _remember(objects.addresses, (host, port), target, MAX_TARGETS)
+            return _remember(objects.targets, key, target, MAX_TARGETS)
+
+    def auth(self, community: str) -> CommunityData:
+        """CommunityData SNMPv2c de la community."""
+        objects = self._objects()
+        with self._lock:
+            auth = objects.communities.get(community)
+            if auth is None:
+                auth = _remember(objects.communities, community, CommunityData(community, mpModel=1), MAX_COMMUNITIES)
+            return auth
+
+    def object_type(self, oid: str) -> ObjectType:
+        """
+        ObjectType del OID. pysnmp lo resuelve contra el MIB en el primer uso y lo marca como
+        resuelto, así las consultas siguientes no vuelven a pasar por el MIB.
+        """
+        objects = self._objects()
+        with self._lock:
+            object_type = objects.oids.get(oid)
+            if object_type is None:
+                object_type = _remember(objects.oids, oid, ObjectType(ObjectIdentity(oid)), MAX_OIDS)
+            else:
+                objects.oids.move_to_end(oid)
+            return object_type
+
+    def invalidate_host(self, host: str) -> None:
+        """Olvida los targets del host (cambió su dirección o se eliminó) en todos los loops."""
+        with self._lock:
+            for objects in list(self._loops.values()):
+                for key in [key for key in objects.targets if key[0] == host]:
+                    del objects.targets[key]
+                for key in [key for key in objects.addresses if key[0] == host]:
+                    del objects.addresses[key]
+
+    def invalidate_community(self, community: str) -> None:
+        with self._lock:
+            for objects in list(self._loops.values()):
+                objects.communities.pop(community, None)
+
+    def invalidate_oid(self, oid: str) -> None:
+        with self._lock:
+            for objects in list(self._loops.values()):
+                objects.oids.pop(oid, None)
+
+    def invalidate_item(self, data: dict) -> None:
+        """
+        Invalidación pedida por el fetcher para un item cuyo host u OID cambió. "refresh" trae
+        los pares (ip, oid) anteriores del item: se olvidan sus objetos y los de la dirección y
+        el OID actuales, así no quedan targets de una IP que el item ya no usa.
+        """
+        previous = data.get('refresh')
+        pairs = [(data['host'], data['oid'])] + [tuple(pair) for pair in (previous if isinstance(previous, (list, tuple)) else ())]
+        for host, oid in pairs:
+            self.invalidate_host(host)
+            oid = str(oid)
+            self.invalidate_oid(oid)
+            for column in oid.split(","):  # Items tabla: columnas separadas por coma
+                self.invalidate_oid(column.strip().strip("."))
+
+    def release(self) -> None:
+        """Cierra el engine del event loop actual y olvida sus objetos (al terminar el loop)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            objects = self._loops.pop(loop, None)
+        if objects is not None and objects.engine is not None:
+            objects.engine.close_dispatcher()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            loops = list(self._loops.values())
+            return {
+                "loops": len(loops),
+                "targets": sum(len(objects.targets) for objects in loops),
+                "communities": sum(len(objects.communities) for objects in loops),
+                "oids": sum(len(objects.oids) for objects in loops),
+            }
+
+
+# Cache compartido por los checkers SNMP del proceso
+SNMP_OBJECTS = SnmpObjects()
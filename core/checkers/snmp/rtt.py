@@ -0,0 +1,126 @@
+"""
+rtt.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Estimador de RTT por host (RFC 6298, el mismo cálculo del RTO de TCP). A partir del RTT
+suavizado (SRTT) y su variación (RTTVAR) se derivan el timeout y los reintentos que se
+pasan a UdpTransportTarget, dentro de los límites configurados.
+"""
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+# Ganancias de RFC 6298
+RTT_ALPHA = 1 / 8
+RTT_BETA = 1 / 4
+RTT_K = 4
+RTT_CLOCK_GRANULARITY = 0.01  # s
+
+# Valores por defecto (iguales a los fijos anteriores para hosts sin muestras)
+DEFAULT_TIMEOUT = 1.5
+DEFAULT_RETRIES = 1
+DEFAULT_MIN_TIMEOUT = 0.2
+DEFAULT_MAX_TIMEOUT = 5.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_WAIT_BUDGET = 3.0  # Peor caso por petición: timeout * (retries + 1)
+
+
+class _HostRtt:
+    __slots__ = ("srtt", "rttvar", "rto")
+
+    def __init__(self) -> None:
+        self.srtt: Optional[float] = None
+        self.rttvar: float = 0.0
+        self.rto: float = DEFAULT_TIMEOUT
+
+
+class RttEstimator:
+    """
+    Mantiene SRTT/RTTVAR por host y devuelve (timeout, retries) para el próximo pedido.
+
+    Es compartido por todos los snmpers, por eso cada operación toma el lock.
+    """
+
+    def __init__(self, min_timeout: float = DEFAULT_MIN_TIMEOUT, max_timeout: float = DEFAULT_MAX_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES, wait_budget: float = DEFAULT_WAIT_BUDGET) -> None:
+        """
+        Args:
+            min_timeout (float): Límite inferior del timeout (s).
+            max_timeout (float): Límite superior del timeout (s).
+            max_retries (int): Máximo de reintentos.
+            wait_budget (float): Tiempo máximo que un pedido puede bloquear (s); los reintentos
+                se ajustan para que timeout * (retries + 1) no lo supere.
+        """
+        self.min_timeout = min_timeout
+        self.max_timeout = max(min_timeout, max_timeout)
+        self.max_retries = max(0, max_retries)
+        self.wait_budget = wait_budget
+        self._hosts: Dict[str, _HostRtt] = {}
+        self._lock = Lock()
+
+    def _clamp(self, value: float) -> float:
+        return min(self.max_timeout, max(self.min_timeout, value))
+
+    def sample(self, host: str, rtt: float) -> None:
+        """
+        Registra una muestra de RTT (s). Solo deben pasarse respuestas a la primera
+        transmisión (algoritmo de Karn); el llamador descarta las que superan el timeout.
+        """
+        with self._lock:
+            state = self._hosts.setdefault(host, _HostRtt())
+            if state.srtt is None:
+                state.srtt = rtt
+                state.rttvar = rtt / 2
+            else:
+                state.rttvar = (1 - RTT_BETA) * state.rttvar + RTT_BETA * abs(state.srtt - rtt)
+                state.srtt = (1 - RTT_ALPHA) * state.srtt + RTT_ALPHA * rtt
+            state.rto = self._clamp(state.srtt + max(RTT_CLOCK_GRANULARITY, RTT_K * state.rttvar))
+
+    def timeout(self, host: str) -> None:
+        """
+        Registra un timeout: duplica el RTO (backoff) hasta la próxima muestra válida.
+        """
+        with self._lock:
+            state = self._hosts.setdefault(host, _HostRtt())
+            state.rto = self._clamp(state.rto * 2)
+
+    def parameters(self, host: str) -> Tuple[float, int]:
+        """
+        Returns:
+            Tuple[float, int]: (timeout, retries) para el próximo pedido al host.
+        """
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                return self._clamp(DEFAULT_TIMEOUT), min(DEFAULT_RETRIES, self.max_retries)
+            rto = state.rto
+        retries = int(self.wait_budget / rto) - 1
+        return rto, min(self.max_retries, max(0, retries))
+
+    def host_state(self, host: str) -> Optional[Dict[str, Optional[float]]]:
+        """Estado de un host, o None si no tiene muestras ni timeouts."""
+        with self._lock:
+            state = self._hosts.get(host)
+            return None if state is None else {"srtt": state.srtt, "rttvar": state.rttvar, "rto": state.rto}
+
+    def restore(self, host: str, values: Dict[str, Optional[float]]) -> None:
+        """
+        Reemplaza el estado de un host por uno calculado en otro proceso (los workers del
+        motor de procesos devuelven el de sus hosts junto con cada resultado).
+        """
+        with self._lock:
+            state = self._hosts.setdefault(host, _HostRtt())
+            state.srtt = values.get("srtt")
+            state.rttvar = values.get("rttvar", 0.0)
+            state.rto = values.get("rto", DEFAULT_TIMEOUT)
+
+    def forget(self, host: str) -> None:
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def snapshot(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Estado actual por host (para logs y métricas)."""
+        with self._lock:
+            return {host: {"srtt": s.srtt, "rttvar": s.rttvar, "rto": s.rto} for host, s in self._hosts.items()}
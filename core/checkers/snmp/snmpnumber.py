@@ -27,6 +27,21 @@ from pysnmp.proto.rfc1902 import (
     Integer, OctetString, ObjectIdentifier, IpAddress,
     Counter32, Counter64, Gauge32, TimeTicks, Unsigned32, Null
 )
+from pysnmp.proto.rfc1905 import NoSuchObject, NoSuchInstance, EndOfMibView
+from pysnmp.proto import errind
+
+from .rtt import RttEstimator, DEFAULT_TIMEOUT, DEFAULT_RETRIES
+from .delta import SYS_UPTIME_OID
+from .objcache import SNMP_OBJECTS, quantize_timeout
+from ..loop import run_sync
+from .fastget import FAST_GET
+
+# Límites de lote para GET con varios varbinds
+SNMP_MAX_PDU_BYTES = 1400  # Por debajo de una MTU Ethernet
+VARBIND_OVERHEAD_BYTES = 24  # Cabecera del varbind + valor típico
+SNMP_ERROR_TOO_BIG = 1
+SNMP_ERROR_NO_SUCH_NAME = 2
+VALUE_TYPE_DELTA = 5  # Item tipo 5: tasa por segundo de un contador
 
 class SNMPCustomNumber:
     @staticmethod
@@ -123,99 +138,320 @@ class SNMPCustomNumber:
         }
         return sensordefinition
 
+    @staticmethod
+    def error_channel(unit: str, error: str) -> dict:
+        return {
+        "name": "Value",
+        "mode": "string",
+        "kind": "custom",
+        "customunit": str(unit),
+        "value": None,
+        "error": error
+        }
+
+    @staticmethod
+    def process_value(raw_value, multiplication: int = 1, division: int = 1):
+        """
+        Convierte el valor SNMP crudo a número (aplicando factores) o a texto.
+        """
+        processed_value = None
+
+        try:
+            numeric_value = float(raw_value)
+            processed_value = (numeric_value * multiplication) / division
+        except (ValueError, TypeError):
+            if isinstance(raw_value, (Integer, Unsigned32, Counter32, Counter64, Gauge32, TimeTicks)):
+                try:
+                    numeric_value = int(raw_value)
+                    processed_value = (numeric_value * multiplication) / division
+                except Exception:
+                    processed_value = int(raw_value)
+            elif isinstance(raw_value, OctetString):
+                try:
+                    processed_value = raw_value.prettyPrint()
+                except Exception:
+                    processed_value = str(raw_value)
+            elif isinstance(raw_value, ObjectIdentifier):
+                processed_value = raw_value.prettyPrint()
+            elif isinstance(raw_value, IpAddress):
+                processed_value = str(raw_value)
+            elif isinstance(raw_value, Null):
+                processed_value = None
+            else:
+                try:
+                    processed_value = raw_value.prettyPrint()
+                except Exception:
+                    processed_value = str(raw_value)
+        return processed_value
+
+    @staticmethod
+    def build_channel(processed_value, snmp_type: str, unit: str) -> dict:
+        if snmp_type == "1":
+            channel = {
+                "name": "Value",
+                "mode": "integer" if isinstance(processed_value, (int, float)) else "string",
+                "kind": "custom",
+                "customunit": str(unit),
+                "value": processed_value
+            }
+        else:
+            channel = {
+                "name": "Value",
+                "mode": "counter" if isinstance(processed_value, (int, float)) else "string",
+                "kind": "custom",
+                "customunit": str(unit),
+                "value": processed_value
+            }
+        return channel
+
+    @staticmethod
+    def counter_channel(raw_value, unit: str) -> dict:
+        """
+        Canal de un item Delta: el valor crudo como entero y el ancho del contador (32/64 bits)
+        para manejar el desborde; None si el tipo no es un contador (p. ej. Gauge32).
+        """
+        try:
+            value = int(raw_value)
+        except (ValueError, TypeError):
+            return SNMPCustomNumber.error_channel(unit, f"SNMP value is not numeric: {raw_value}")
+        if hasattr(raw_value, "bits"):  # Counter32Value / Counter64Value del camino rápido
+            bits = raw_value.bits
+        elif isinstance(raw_value, Counter64):
+            bits = 64
+        elif isinstance(raw_value, Counter32):
+            bits = 32
+        else:
+            bits = None
+        return {
+            "name": "Value",
+            "mode": "counter",
+            "kind": "custom",
+            "customunit": str(unit),
+            "value": value,
+            "bits": bits
+        }
+
+    @staticmethod
+    async def transport_target(target: str, port: int, rtt: RttEstimator = None):
+        """
+        UdpTransportTarget (del cache) con el timeout/reintentos derivados del RTT del host,
+        o con los valores fijos si no hay estimador.
+
+        Returns:
+            tuple: (UdpTransportTarget, timeout en segundos)
+        """
+        timeout, retries = rtt.parameters(target) if rtt is not None else (DEFAULT_TIMEOUT, DEFAULT_RETRIES)
+        timeout = quantize_timeout(timeout)
+        return await SNMP_OBJECTS.target(target, port, timeout, retries), timeout
+
+    @staticmethod
+    def record_rtt(rtt: RttEstimator, target: str, elapsed: float, timeout: float, error_indication) -> None:
+        """
+        Alimenta el estimador: los timeouts hacen backoff y solo se muestrean respuestas a la
+        primera transmisión (elapsed < timeout), como en el algoritmo de Karn.
+        """
+        if rtt is None:
+            return
+        if isinstance(error_indication, errind.RequestTimedOut):
+            rtt.timeout(target)
+        elif not error_indication and elapsed < timeout:
+            rtt.sample(target, elapsed)
+
     async def snmp_get(self, oid: str, target: str, snmp_type: str, community: str,
-                       port: int, unit: str, multiplication: int = 1, division: int = 1) -> dict:
+                       port: int, unit: str, multiplication: int = 1, division: int = 1,
+                       engine: SnmpEngine = None, rtt: RttEstimator = None) -> dict:
         """
         Realiza una consulta SNMP de manera asíncrona, y retorna la respuesta procesada.
+        Si se pasa engine se usa ese; si no, el SnmpEngine cacheado del event loop actual
+        (SNMP_OBJECTS). Con rtt el timeout se adapta al host.
         """
-        snmpEngine = SnmpEngine()
+        snmpEngine = engine if engine is not None else SNMP_OBJECTS.engine()
         try:
             # transport_target = await UdpTransportTarget.create((target, port))
-            transport_target = await UdpTransportTarget.create((target, port), timeout=1.5, retries=1)
+            transport_target, timeout = await self.transport_target(target, port, rtt)
             iterator = get_cmd(
                 snmpEngine,
-                CommunityData(community, mpModel=1),
+                SNMP_OBJECTS.auth(community),
                 transport_target,
                 ContextData(),
-                ObjectType(ObjectIdentity(oid))
+                SNMP_OBJECTS.object_type(oid)
             )
             
+            sent = time.perf_counter()
             error_indication, error_status, error_index, var_binds = await iterator
+            self.record_rtt(rtt, target, time.perf_counter() - sent, timeout, error_indication)
 
             if error_indication:
-                return {
-                "name": "Value",
-                "mode": "string",
-                "kind": "custom",
-                "customunit": str(unit),
-                "value": None,
-                "error": f"SNMP error indication: {error_indication}"
-                }
+                return self.error_channel(unit, f"SNMP error indication: {error_indication}")
             if error_status:
-                return {
-                "name": "Value",
-                "mode": "string",
-                "kind": "custom",
-                "customunit": str(unit),
-                "value": None,
-                "error": f"SNMP error status: {error_status.prettyPrint()} at {error_index}"
-                }
+                return self.error_channel(unit, f"SNMP error status: {error_status.prettyPrint()} at {error_index}")
 
             raw_value = var_binds[0][1]
+            processed_value = self.process_value(raw_value, multiplication, division)
+            return self.build_channel(processed_value, snmp_type, unit)
+        except Exception as e:
+            logging.error(f"SNMP GET {oid} on {target} failed: {e}")
+            return self.error_channel(unit, f"SNMP exception: {e}")
 
-            processed_value = None
+    @staticmethod
+    def batch_key(data: dict) -> tuple:
+        """Items con la misma clave pueden viajar en un único GET."""
+        return (data['host'], int(data['port']), data['community'])
 
-            try:
-                numeric_value = float(raw_value)
-                processed_value = (numeric_value * multiplication) / division
-            except (ValueError, TypeError):
-                if isinstance(raw_value, (Integer, Unsigned32, Counter32, Counter64, Gauge32, TimeTicks)):
-                    try:
-                        numeric_value = int(raw_value)
-                        processed_value = (numeric_value * multiplication) / division
-                    except Exception:
-                        processed_value = int(raw_value)
-                elif isinstance(raw_value, OctetString):
-                    try:
-                        processed_value = raw_value.prettyPrint()
-                    except Exception:
-                        processed_value = str(raw_value)
-                elif isinstance(raw_value, ObjectIdentifier):
-                    processed_value = raw_value.prettyPrint()
-                elif isinstance(raw_value, IpAddress):
-                    processed_value = str(raw_value)
-                elif isinstance(raw_value, Null):
-                    processed_value = None
-                else:
-                    try:
-                        processed_value = raw_value.prettyPrint()
-                    except Exception:
-                        processed_value = str(raw_value)
+    @staticmethod
+    def chunk_items(items: list, max_varbinds: int, max_pdu_bytes: int = SNMP_MAX_PDU_BYTES) -> list:
+        """
+        Divide items de un mismo host en lotes que respetan el máximo de varbinds y un
+        tamaño estimado de PDU (OID + cabecera de varbind + valor típico).
+        """
+        chunks, current, current_bytes = [], [], 0
+        for data in items:
+            size = len(str(data['oid'])) + VARBIND_OVERHEAD_BYTES
+            if current and (len(current) >= max_varbinds or current_bytes + size > max_pdu_bytes):
+                chunks.append(current)
+                current, current_bytes = [], 0
+            current.append(data)
+            current_bytes += size
+        if current:
+            chunks.append(current)
+        return chunks
 
-            if snmp_type == "1":
-                channel = {
-                    "name": "Value",
-                    "mode": "integer" if isinstance(processed_value, (int, float)) else "string",
-                    "kind": "custom",
-                    "customunit": str(unit),
-                    "value": processed_value
-                }
+    async def snmp_get_many(self, oids: list, target: str, community: str, port: int,
+                            engine: SnmpEngine, rtt: RttEstimator = None) -> list:
+        """
+        GET con varios varbinds en una sola PDU.
+          - tooBig: se divide el lote en mitades y se reintenta.
+          - noSuchName (v1 / agentes antiguos): se marca el OID de error_index y se reintenta el resto.
+          - Otro error de estado: se consulta cada OID por separado.
+
+        Returns:
+            list: (valor crudo, error) por OID, en el mismo orden.
+        """
+        if not oids:
+            return []
+        transport_target, timeout = await self.transport_target(target, port, rtt)
+        sent = time.perf_counter()
+        error_indication, error_status, error_index, var_binds = await get_cmd(
+            engine,
+            SNMP_OBJECTS.auth(community),
+            transport_target,
+            ContextData(),
+            *[SNMP_OBJECTS.object_type(oid) for oid in oids]
+        )
+        self.record_rtt(rtt, target, time.perf_counter() - sent, timeout, error_indication)
+
+        if error_indication:
+            return [(None, f"SNMP error indication: {error_indication}")] * len(oids)
+
+        if error_status:
+            status = int(error_status)
+            if len(oids) == 1:
+                return [(None, f"SNMP error status: {error_status.prettyPrint()} at {error_index}")]
+            if status == SNMP_ERROR_TOO_BIG:
+                middle = len(oids) // 2
+                return (await self.snmp_get_many(oids[:middle], target, community, port, engine, rtt)
+                        + await self.snmp_get_many(oids[middle:], target, community, port, engine, rtt))
+            if status == SNMP_ERROR_NO_SUCH_NAME and 0 < int(error_index) <= len(oids):
+                bad = int(error_index) - 1
+                rest = await self.snmp_get_many(oids[:bad] + oids[bad + 1:], target, community, port, engine, rtt)
+                rest.insert(bad, (None, f"SNMP error status: {error_status.prettyPrint()} at {error_index}"))
+                return rest
+            results = []
+            for oid in oids:
+                results.extend(await self.snmp_get_many([oid], target, community, port, engine, rtt))
+            return results
+
+        results = []
+        for _, raw_value in var_binds:
+            if isinstance(raw_value, (NoSuchObject, NoSuchInstance, EndOfMibView)):
+                results.append((None, f"SNMP error status: {raw_value.prettyPrint()}"))
             else:
-                channel = {
-                    "name": "Value",
-                    "mode": "counter" if isinstance(processed_value, (int, float)) else "string",
-                    "kind": "custom",
-                    "customunit": str(unit),
-                    "value": processed_value
-                }
+                results.append((raw_value, None))
+        return results
 
-            return channel
+    async def get_data_batch_async(self, items: list, engine: SnmpEngine = None, rtt: RttEstimator = None,
+                                   fast: bool = False) -> list:
+        """
+        Consulta en un único GET todos los items de un mismo (host, port, community).
+        Si el lote tiene items Delta (tipo 5) se agrega sysUpTime al GET; esos items devuelven
+        el contador crudo (sin factores) con su ancho en bits y el uptime del agente, y la
+        tasa se calcula en el snmper. Los items marcados "refresh" (su host u OID cambió)
+        invalidan antes sus objetos cacheados. Con fast el GET va primero por el camino rápido
+        de UDP crudo (FAST_GET) y sólo lo que éste no resuelve pasa por pysnmp.
+
+        Returns:
+            list: Un resultado por item con el mismo formato que get_data_async.
+        """
+        for data in items:
+            if data.get('refresh'):
+                SNMP_OBJECTS.invalidate_item(data)
+        snmpEngine = engine if engine is not None else SNMP_OBJECTS.engine()
+        first = items[0]
+        oids = [str(data['oid']) for data in items]
+        with_uptime = any(int(data['value_type']) == VALUE_TYPE_DELTA for data in items)
+        if with_uptime:
+            oids.append(SYS_UPTIME_OID)
+        start_time = time.perf_counter()
+        try:
+            values = None
+            if fast:
+                values = await FAST_GET.get_many(oids, first['host'], first['community'], int(first['port']), rtt)
+            if values is None:
+                values = await self.snmp_get_many(oids, first['host'], first['community'], int(first['port']),
+                                                  snmpEngine, rtt)
         except Exception as e:
-            print(e)
-        finally:
-            snmpEngine.close_dispatcher()
+            logging.error(f"SNMP batch GET on {first['host']} failed: {e}")
+            values = [(None, f"SNMP exception: {e}")] * len(oids)
+        response_time = (time.perf_counter() - start_time) * 1000 #ms
+        uptime = None
+        if with_uptime:
+            raw_uptime, uptime_error = values.pop()
+            uptime = int(raw_uptime) if uptime_error is None and raw_uptime is not None else None
+
+        results = []
+        for data, (raw_value, error) in zip(items, values):
+            delta = int(data['value_type']) == VALUE_TYPE_DELTA
+            if error:
+                channel_data = self.error_channel(data['unit'], error)
+            elif delta:
+                channel_data = self.counter_channel(raw_value, data['unit'])
+            else:
+                processed_value = self.process_value(raw_value, int(data['multiplication']), int(data['division']))
+                channel_data = self.build_channel(processed_value, data['value_type'], data['unit'])
+            result = {
+                "itemid": int(data['itemid']),
+                "message": "OK",
+                "type": 1,
+                "channel": [channel_data, {
+                    "name": "Response Time",
+                    "mode": "float",
+                    "kind": "TimeResponse",
+                    "value": response_time
+                }]
+            }
+            if delta:
+                result["uptime"] = uptime
+            results.append(result)
+        return results
+
+    @staticmethod
+    def get_data_batch(items: list, rtt: RttEstimator = None, fast: bool = False) -> list:
+        """
+        Envoltorio sincrónico de get_data_batch_async (un lote de un mismo host), sobre el
+        event loop de larga vida del hilo.
+        """
+        try:
+            return run_sync(SNMPCustomNumber().get_data_batch_async(items, rtt=rtt, fast=fast))
+        except Exception as run_error:
+            logging.error("Error running asyncio loop: %s", run_error)
+            return [{
+                "itemid": int(data.get('itemid', -1)),
+                "error": "Exception",
+                "code": 1,
+                "message": "Failed to run the async SNMP request."
+            } for data in items]
 
-    async def get_data_async(self, data: dict) -> dict:
+    async def get_data_async(self, data: dict, engine: SnmpEngine = None, rtt: RttEstimator = None) -> dict:
         """
         Versión asíncrona que recopila y retorna lo1s datos SNMP junto con el tiempo de respuesta.
         """
@@ -232,7 +468,9 @@ class SNMPCustomNumber:
                 port=int(data['port']),
                 unit=data['unit'],
                 multiplication=int(data['multiplication']),
-                division=int(data['division'])
+                division=int(data['division']),
+                engine=engine,
+                rtt=rtt
             )
             # standard
             # end_time = time.monotonic()
@@ -266,13 +504,13 @@ class SNMPCustomNumber:
         return result
 
     # def get_data(data: dict, out_queue) -> int:
-    def get_data(data: dict) -> int:
+    def get_data(data: dict, rtt: RttEstimator = None) -> int:
         """
         Función sincrónica que actúa como envoltorio para la versión asíncrona.
         Ejecuta get_data_async y envía el resultado a out_queue.
         """
         try:
-            result = asyncio.run(SNMPCustomNumber().get_data_async(data))
+            result = run_sync(SNMPCustomNumber().get_data_async(data, rtt=rtt))
         except Exception as run_error:
             logging.error("Error running asyncio loop: %s", run_error)
             result = {
@@ -0,0 +1,165 @@
+"""
+snmptable.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Checker para items de tipo tabla (tipo 4). El snmp_oid del item contiene una o varias
+columnas separadas por coma (p. ej. ifInOctets,ifOutOctets de ifTable). Cada columna se
+recorre con GETBULK (todas en paralelo) y las filas se devuelven por índice, de modo que
+un único item programado reemplaza a cientos de items de un solo OID.
+"""
+import asyncio
+import logging
+import time
+from pysnmp.hlapi.v3arch.asyncio import *
+
+from .snmpnumber import SNMPCustomNumber
+from .rtt import RttEstimator
+from .objcache import SNMP_OBJECTS
+from ..loop import run_sync
+
+# Filas pedidas por cada GETBULK
+SNMP_BULK_MAX_REPETITIONS = 25
+
+
+class SNMPTable:
+    @staticmethod
+    def get_sensordef():
+        """
+        Definición del item y los datos a mostrar.
+        """
+        sensordefinition = {
+            "name": "SNMP Table",
+            "description": "Monitors every row of one or more SNMP table columns using GETBULK",
+            "help": "Enter the column OIDs separated by commas (e.g. 1.3.6.1.2.1.2.2.1.10,1.3.6.1.2.1.2.2.1.16)",
+            "tag": "snmptable",
+            "groups": [
+                {
+                    "name": "Table columns",
+                    "caption": "Table columns",
+                    "fields": [
+                        {
+                            "type": "edit",
+                            "name": "oid",
+                            "caption": "Column OIDs",
+                            "required": "1",
+                            "help": "Comma separated column OIDs of the table."
+                        },
+                        {
+                            "type": "integer",
+                            "name": "max_repetitions",
+                            "caption": "Max repetitions",
+                            "default": SNMP_BULK_MAX_REPETITIONS,
+                            "help": "Rows requested per GETBULK."
+                        }
+                    ]
+                }
+            ]
+        }
+        return sensordefinition
+
+    @staticmethod
+    def parse_columns(oids: str) -> list:
+        return [oid.strip().strip(".") for oid in str(oids).split(",") if oid.strip()]
+
+    async def walk_column(self, column: str, target: str, community: str, port: int,
+                          engine: SnmpEngine, max_repetitions: int = SNMP_BULK_MAX_REPETITIONS,
+                          rtt: RttEstimator = None) -> list:
+        """
+        Recorre una columna con GETBULK sin salir de su subárbol.
+
+        Returns:
+            list: (índice, valor crudo) por fila.
+        """
+        transport_target, timeout = await SNMPCustomNumber.transport_target(target, port, rtt)
+        prefix = column + "."
+        rows = []
+        sent = time.perf_counter()
+        async for error_indication, error_status, error_index, var_binds in bulk_walk_cmd(
+            engine,
+            SNMP_OBJECTS.auth(community),
+            transport_target,
+            ContextData(),
+            0, max_repetitions,
+            SNMP_OBJECTS.object_type(column),
+            lexicographicMode=False
+        ):
+            SNMPCustomNumber.record_rtt(rtt, target, time.perf_counter() - sent, timeout, error_indication)
+            sent = time.perf_counter()
+            if error_indication:
+                raise RuntimeError(f"SNMP error indication: {error_indication}")
+            if error_status:
+                raise RuntimeError(f"SNMP error status: {error_status.prettyPrint()} at {error_index}")
+            for var_bind in var_binds:
+                # Según la versión de pysnmp cada respuesta es plana o una fila de varbinds.
+                for oid, raw_value in (var_bind if not isinstance(var_bind, ObjectType) else [var_bind]):
+                    oid_str = str(oid)
+                    if oid_str.startswith(prefix):
+                        rows.append((oid_str[len(prefix):], raw_value))
+        return rows
+
+    async def get_data_async(self, data: dict, engine: SnmpEngine = None, rtt: RttEstimator = None) -> dict:
+        """
+        Recorre todas las columnas del item en paralelo y devuelve las filas por índice.
+        """
+        if data.get('refresh'):
+            SNMP_OBJECTS.invalidate_item(data)
+        snmpEngine = engine if engine is not None else SNMP_OBJECTS.engine()
+        start_time = time.perf_counter()
+        try:
+            columns = self.parse_columns(data['oid'])
+            walked = await asyncio.gather(*[
+                self.walk_column(column, data['host'], data['community'], int(data['port']), snmpEngine,
+                                 int(data.get('max_repetitions', SNMP_BULK_MAX_REPETITIONS)), rtt)
+                for column in columns
+            ])
+            rows = []
+            for column, column_rows in zip(columns, walked):
+                for index, raw_value in column_rows:
+                    rows.append({
+                        "index": index,
+                        "oid": column,
+                        "valor": SNMPCustomNumber.process_value(raw_value, int(data['multiplication']),
+                                                                int(data['division']))
+                    })
+            response_time = (time.perf_counter() - start_time) * 1000 #ms
+            result = {
+                "itemid": int(data['itemid']),
+                "message": "OK",
+                "type": 4,
+                "rows": rows,
+                "channel": [
+                    {"name": "Rows", "mode": "integer", "kind": "custom", "customunit": "", "value": len(rows)},
+                    {"name": "Response Time", "mode": "float", "kind": "TimeResponse", "value": response_time}
+                ]
+            }
+        except Exception as e:
+            logging.error(f"Something went wrong with table item {data['itemid']}. Error: {e}")
+            result = {
+                "itemid": int(data['itemid']),
+                "error": "Exception",
+                "code": 1,
+                "type": 4,
+                "message": str(e),
+                "channel": [SNMPCustomNumber.error_channel("", str(e))]
+            }
+        return result
+
+    @staticmethod
+    def get_data(data: dict, rtt: RttEstimator = None) -> dict:
+        """
+        Envoltorio sincrónico de get_data_async.
+        """
+        try:
+            return run_sync(SNMPTable().get_data_async(data, rtt=rtt))
+        except Exception as run_error:
+            logging.error("Error running asyncio loop: %s", run_error)
+            return {
+                "itemid": int(data.get('itemid', -1)),
+                "error": "Exception",
+                "code": 1,
+                "type": 4,
+                "message": "Failed to run the async SNMP table request."
+            }
@@ -8,10 +8,18 @@ Univalle
 This script is a collection of classes,functions(utilities) used in the main script
 
 """
+from os import cpu_count
 from random import choices
 from string import ascii_letters, digits
 from argparse import ArgumentParser
-from ..includes.defines import THREAD_TYPE_FETCHER, NUM_FETCHERS, NUM_SNMPERS, THREAD_TYPE_SNMPER
+from typing import Any
+from ..includes.defines import (
+    THREAD_TYPE_FETCHER, NUM_FETCHERS, NUM_SNMPERS, THREAD_TYPE_SNMPER,
+    SNMP_ENGINE_THREAD, SNMP_ENGINES, SNMP_MAX_INFLIGHT, SNMP_MAX_VARBINDS,
+    SNMP_TIMEOUT_MIN, SNMP_TIMEOUT_MAX, SNMP_MAX_RETRIES, CIRCUIT_FAILURE_THRESHOLD,
+    TASK_MAX_STALENESS, NUM_WRITERS, WRITER_BATCH_SIZE, SPOOL_PATH, SPOOL_MAX_ROWS, SPOOL_REPLAY_RATE,
+    DEFAULT_SERVER_PORT,
+)
 
 
 class Config(object):
@@ -22,6 +30,7 @@ class Config(object):
     to different types of tasks in the application.
     """
     _threads: dict = {}
+    _options: dict = {}
 
     @staticmethod
     def set_thread_num(task_type: str, value: int) -> None:
@@ -47,6 +56,31 @@ class Config(object):
         """
         return Config._threads.get(task_type, 0)
 
+    @staticmethod
+    def set_option(name: str, value: Any) -> None:
+        """
+        Sets a runtime option (engine mode, limits, ...).
+
+        Args:
+            name (str): Option name (e.g., 'SNMP_ENGINE').
+            value (Any): Option value.
+        """
+        Config._options[name] = value
+
+    @staticmethod
+    def get_option(name: str, default: Any = None) -> Any:
+        """
+        Gets a runtime option.
+
+        Args:
+            name (str): Option name.
+            default (Any): Value returned if the option is not set.
+
+        Returns:
+            Any: The option value or default.
+        """
+        return Config._options.get(name, default)
+
 
 # Command-line arguments processing
 parser = ArgumentParser(description="Configure the number of threads for each task.")
@@ -58,11 +92,92 @@ parser.add_argument(
     '-s', '--startsnmpers', default=NUM_SNMPERS, type=int,
     help='Number of snmpers threads to launch.'
 )
+parser.add_argument(
+    '-w', '--startworkers', default=cpu_count() or 1, type=int,
+    help='Number of poller worker processes for the process engine (default: one per core).'
+)
+parser.add_argument(
+    '--startwriters', default=NUM_WRITERS, type=int,
+    help='Number of result writer threads to launch.'
+)
+parser.add_argument(
+    '--writerbatch', default=WRITER_BATCH_SIZE, type=int,
+    help='Maximum results per bulk API call of a writer.'
+)
+parser.add_argument(
+    '--spoolpath', default=SPOOL_PATH, type=str,
+    help='SQLite file where results are spooled while the API is unreachable (empty disables the spool).'
+)
+parser.add_argument(
+    '--spoolmaxrows', default=SPOOL_MAX_ROWS, type=int,
+    help='Maximum spooled rows; the oldest batches are dropped beyond it.'
+)
+parser.add_argument(
+    '--replayrate', default=SPOOL_REPLAY_RATE, type=float,
+    help='Maximum spooled rows per second sent to the API once it recovers.'
+)
+parser.add_argument(
+    '--snmpengine', default=SNMP_ENGINE_THREAD, choices=SNMP_ENGINES,
+    help='SNMP polling engine: one blocking request per snmper thread, one asyncio event loop, '
+         'or one event loop per worker process.'
+)
+parser.add_argument(
+    '--maxinflight', default=SNMP_MAX_INFLIGHT, type=int,
+    help='Maximum SNMP requests in flight on the asyncio engine.'
+)
+parser.add_argument(
+    '--maxvarbinds', default=SNMP_MAX_VARBINDS, type=int,
+    help='Maximum varbinds per SNMP GET when batching items of the same host (1 disables batching).'
+)
+parser.add_argument(
+    '--snmpfast', action='store_true',
+    help='Send numeric SNMPv2c GETs over the raw UDP fast path (pre-encoded BER, pysnmp fallback).'
+)
+parser.add_argument(
+    '--timeoutmin', default=SNMP_TIMEOUT_MIN, type=float,
+    help='Lower bound (seconds) of the adaptive per-host SNMP timeout.'
+)
+parser.add_argument(
+    '--timeoutmax', default=SNMP_TIMEOUT_MAX, type=float,
+    help='Upper bound (seconds) of the adaptive per-host SNMP timeout.'
+)
+parser.add_argument(
+    '--maxretries', default=SNMP_MAX_RETRIES, type=int,
+    help='Upper bound of the adaptive per-host SNMP retries.'
+)
+parser.add_argument(
+    '--breakerthreshold', default=CIRCUIT_FAILURE_THRESHOLD, type=int,
+    help='Consecutive unreachable SNMP requests that open a host circuit (0 disables the breaker).'
+)
+parser.add_argument(
+    '--maxstaleness', default=TASK_MAX_STALENESS, type=float,
+    help='Seconds past its deadline after which a queued poll is dropped (0 disables dropping).'
+)
+parser.add_argument(
+    '--metricsport', default=DEFAULT_SERVER_PORT, type=int,
+    help='Port of the Prometheus /metrics endpoint of the core (0 disables it).'
+)
 
 args = parser.parse_args()
 
 Config.set_thread_num(THREAD_TYPE_FETCHER, args.startfetchers)
 Config.set_thread_num(THREAD_TYPE_SNMPER, args.startsnmpers)
+Config.set_option("SNMP_ENGINE", args.snmpengine)
+Config.set_option("SNMP_WORKERS", args.startworkers)
+Config.set_option("SNMP_MAX_INFLIGHT", args.maxinflight)
+Config.set_option("SNMP_MAX_VARBINDS", args.maxvarbinds)
+Config.set_option("SNMP_FAST_GET", args.snmpfast)
+Config.set_option("SNMP_TIMEOUT_MIN", args.timeoutmin)
+Config.set_option("SNMP_TIMEOUT_MAX", args.timeoutmax)
+Config.set_option("SNMP_MAX_RETRIES", args.maxretries)
+Config.set_option("CIRCUIT_FAILURE_THRESHOLD", args.breakerthreshold)
+Config.set_option("TASK_MAX_STALENESS", args.maxstaleness)
+Config.set_option("NUM_WRITERS", args.startwriters)
+Config.set_option("WRITER_BATCH_SIZE", args.writerbatch)
+Config.set_option("SPOOL_PATH", args.spoolpath)
+Config.set_option("SPOOL_MAX_ROWS", args.spoolmaxrows)
+Config.set_option("SPOOL_REPLAY_RATE", args.replayrate)
+Config.set_option("METRICS_PORT", args.metricsport)
 
 # Random ID generator
 def random_string(length: int = 8) -> str:
@@ -9,11 +9,18 @@ This script defines the Fetchermanager class, which is responsible for managing
 The Fetchermanager starts, stops, and monitors the fetchers, including checking if they are still alive
 and terminating them if necessary.
 """
-from typing import List
+import json
+import socket
+from typing import Any, Dict, List, Optional, Tuple
 from queue import Queue
-from threading import Event
+from threading import Event, Lock, Thread
 from .fetcher_thread import Fetcher
+from .sharding import HashRing
+from ..checkers.snmp.delta import DeltaCache
 from ..config.logger import CustomLogger
+from ..includes.defines import (WAKE_SERVER_HOST, WAKE_SERVER_PORT, CONTROL_READ_TIMEOUT, CONTROL_MAX_MESSAGE,
+                                POLL_NOW_MAX_ITEMS, POLL_NOW_DEFAULT_TIMEOUT, POLL_NOW_MAX_TIMEOUT)
+from ..misc.poll_requests import POLL_REQUESTS
 
 
 class FetcherManager:
@@ -23,7 +30,7 @@ class FetcherManager:
     """
 
     def __init__(self, logger: CustomLogger, api_url: str, task_queue: Queue, stop_event: Event, num_fetchers: int = 1,
-                 interval: float = 10) -> None:
+                 interval: float = 10, deltas: Optional[DeltaCache] = None) -> None:
         self.logger = logger
         self.api_url = api_url
         self.num_fetchers = num_fetchers
@@ -31,27 +38,199 @@ class FetcherManager:
         self.task_queue = task_queue
         self.stop_event = stop_event
         self.interval = interval
+        self.deltas = deltas
+        self.ring = HashRing(range(num_fetchers))
+        self._lock = Lock()
 
-    def _create_fetchers(self) -> Fetcher:
+    def _create_fetchers(self, shard: int) -> Fetcher:
         """
         Factory method to create a fetcher with the specified configurations.
 
+        Args:
+            shard (int): Shard id the fetcher owns in the hash ring.
+
         Returns:
             Fetcher: A new fetcher instance.
         """
-        return Fetcher(self.logger, self.api_url, self.task_queue, self.stop_event, self.interval)
+        return Fetcher(self.logger, self.api_url, self.task_queue, self.stop_event, self.interval,
+                       shard=shard, ring=self.ring, deltas=self.deltas)
 
     def start_fetchers(self) -> None:
         """
-        Starts all the fetcher threads.
+        Starts all the fetcher threads and the shared wake server.
 
-        This method initializes each fetcher and starts them.
+        Each fetcher owns the items that hash to its shard, so no item is enqueued twice.
         """
         self.logger.debug("Manager starting fetchers...")
-        for _ in range(self.num_fetchers):
-            fetcher = self._create_fetchers()
-            self.fetchers.append(fetcher)
-            fetcher.start()
+        with self._lock:
+            for shard in range(self.num_fetchers):
+                fetcher = self._create_fetchers(shard)
+                self.fetchers.append(fetcher)
+                fetcher.start()
+        self._start_wake_server()
+
+    def resize(self, num_fetchers: int) -> None:
+        """
+        Changes the number of fetchers and rebalances item ownership.
+
+        Only the items of the added/removed shards change owner (consistent hashing);
+        every fetcher notices the new ring version and resyncs its registry.
+
+        Args:
+            num_fetchers (int): New number of fetcher threads (>= 1).
+        """
+        num_fetchers = max(1, num_fetchers)
+        with self._lock:
+            if num_fetchers == self.num_fetchers:
+                return
+            self.logger.info(f"Rebalancing fetchers: {self.num_fetchers} -> {num_fetchers}")
+            self.ring.set_nodes(range(num_fetchers))
+            retired = [fetcher for fetcher in self.fetchers if fetcher.shard >= num_fetchers]
+            self.fetchers = [fetcher for fetcher in self.fetchers if fetcher.shard < num_fetchers]
+            for fetcher in retired:
+                fetcher.retire()
+            for shard in range(self.num_fetchers, num_fetchers):
+                fetcher = self._create_fetchers(shard)
+                self.fetchers.append(fetcher)
+                fetcher.start()
+            self.num_fetchers = num_fetchers
+        for fetcher in retired:
+            fetcher.join(timeout=5)
+
+    def wake_fetchers(self) -> None:
+        """Wakes every fetcher so it syncs item changes immediately."""
+        for fetcher in self.fetchers:
+            fetcher.wake_event.set()
+
+    def poll_now(self, items: List[Any], host_ids: List[int], request_id: Optional[str] = None) -> Tuple[List[int], List[int]]:
+        """
+        Enqueues items at top priority, ahead of every scheduled poll.
+
+        Args:
+            items (List[Any]): Full task payloads (dicts with id, oid, ip, community, tipo, ...)
+                or bare item ids, resolved from the registry of the fetcher that owns them.
+            host_ids (List[int]): Hosts whose enabled items are polled.
+            request_id (Optional[str]): On-demand request the snmpers answer to.
+
+        Returns:
+            Tuple[List[int], List[int]]: Ids of the queued items and ids that are unknown to
+                the core (not in any registry) or cannot be polled on demand (traps).
+        """
+        payloads: Dict[int, Dict[str, Any]] = {}
+        unknown: List[int] = []
+        with self._lock:
+            fetchers = {fetcher.shard: fetcher for fetcher in self.fetchers}
+        for item in items:
+            if isinstance(item, dict):
+                payloads[int(item["id"])] = dict(item)
+                continue
+            fetcher = fetchers.get(self.ring.owner(int(item)))
+            record = fetcher.items.get(int(item)) if fetcher else None
+            if record is None:
+                unknown.append(int(item))
+            else:
+                payloads[record.id] = fetcher._build_payload(record)
+        if host_ids:
+            for fetcher in fetchers.values():
+                for record in fetcher.items.of_hosts(host_ids):
+                    if record.enabled:
+                        payloads[record.id] = fetcher._build_payload(record)
+
+        queued: List[int] = []
+        for item_id, payload in payloads.items():
+            if payload.get("tipo") == 3:
+                unknown.append(item_id)
+                continue
+            payload["priority"] = True
+            if request_id:
+                payload["requests"] = (request_id,)
+            self.task_queue.put(payload)
+            queued.append(item_id)
+        return queued, unknown
+
+    def _handle_control(self, conn: socket.socket) -> None:
+        """
+        Serves one control connection: a legacy b"WAKE" or one JSON line
+
+            {"cmd": "wake"}
+            {"cmd": "poll", "items": [...], "hosts": [...], "reply": false, "timeout": 5}
+
+        and answers with one JSON line. With "reply" the connection stays open until every
+        queued item has been polled or the timeout expires.
+        """
+        with conn:
+            try:
+                conn.settimeout(CONTROL_READ_TIMEOUT)
+                data = b""
+                while not data.endswith(b"\n") and len(data) < CONTROL_MAX_MESSAGE:
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+                    if data == b"WAKE":
+                        break
+                if data.strip() == b"WAKE":
+                    self.logger.info("[FetcherManager] Wake signal received")
+                    self.wake_fetchers()
+                    return
+                message = json.loads(data)
+                cmd = message.get("cmd")
+                if cmd == "wake":
+                    self.logger.info("[FetcherManager] Wake signal received")
+                    self.wake_fetchers()
+                    response: Dict[str, Any] = {"status": "ok"}
+                elif cmd == "poll":
+                    response = self._control_poll(message)
+                else:
+                    response = {"status": "error", "error": f"Unknown command: {cmd}"}
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                response = {"status": "error", "error": f"Invalid control message: {e}"}
+            except OSError as e:
+                self.logger.error(f"[FetcherManager] Control connection error: {e}")
+                return
+            try:
+                conn.sendall(json.dumps(response).encode() + b"\n")
+            except OSError as e:
+                self.logger.error(f"[FetcherManager] Control reply could not be sent: {e}")
+
+    def _control_poll(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Runs a "poll" control command, waiting for the results if a reply was requested."""
+        items: List[Any] = list(message.get("items") or [])[:POLL_NOW_MAX_ITEMS]
+        host_ids: List[int] = [int(host_id) for host_id in message.get("hosts") or []]
+        reply = bool(message.get("reply"))
+        timeout = min(float(message.get("timeout", POLL_NOW_DEFAULT_TIMEOUT)), POLL_NOW_MAX_TIMEOUT)
+        request_id = POLL_REQUESTS.open([]) if reply else None
+        queued, unknown = self.poll_now(items, host_ids, request_id)
+        self.logger.info(f"[FetcherManager] Poll now: {len(queued)} items queued, {len(unknown)} unknown")
+        response: Dict[str, Any] = {"status": "ok", "queued": queued, "unknown": unknown}
+        if request_id:
+            POLL_REQUESTS.expect(request_id, queued)
+            results, pending = POLL_REQUESTS.wait(request_id, timeout)
+            response["results"] = {str(item_id): result for item_id, result in results.items()}
+            response["pending"] = pending
+        return response
+
+    def _start_wake_server(self) -> None:
+        """
+        Servidor TCP único (canal de control) para recibir señales de despertar y pedidos de
+        consulta inmediata desde otro proceso. Cada conexión se atiende en su propio hilo.
+        """
+        def server():
+            try:
+                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                    s.bind((WAKE_SERVER_HOST, WAKE_SERVER_PORT))
+                    s.listen(16)
+                    s.settimeout(1.0)
+                    while not self.stop_event.is_set():
+                        try:
+                            conn, _ = s.accept()
+                        except socket.timeout:
+                            continue
+                        Thread(target=self._handle_control, args=(conn,), daemon=True).start()
+            except OSError as e:
+                self.logger.error(f"[FetcherManager] Wake server could not bind {WAKE_SERVER_HOST}:{WAKE_SERVER_PORT}: {e}")
+        Thread(target=server, daemon=True).start()
 
     def stop_fetchers(self) -> None:
         """
@@ -61,6 +240,8 @@ class FetcherManager:
         and then waits for each fetcher to finish.
         """
         self.stop_event.set()
+        for fetcher in self.fetchers:
+            fetcher.wake_event.set()
         for fetcher in self.fetchers:
             fetcher.join(timeout=5)
             self.logger.debug(f"Fetcher-{fetcher.thread_id} stopped")
@@ -8,10 +8,9 @@ Univalle
 This script is the definition of the fetcher thread. This module is responsible for
     fetching data request form active hosts and placing them in the queue.
 """
-from time import monotonic
+from time import monotonic, time
 from datetime import datetime, timedelta
 from queue import Queue
-import socket 
 from threading import Thread, Event, get_ident
 from typing import Optional, Dict, List, Any
 import pymysql
@@ -20,7 +19,15 @@ from ..includes import defines as defines
 from ..misc.fetch_data import FetchData
 from ..misc.ItemMapper import ItemMapper
 from ..misc.ItemInterface import Item
+from .scheduler import PollScheduler
+from .registry import ItemRegistry, ItemRecord
+from .sharding import HashRing
+from ..checkers.snmp.delta import DeltaCache
+from ..metrics.registry import REGISTRY
 
+POLL_LATENESS = REGISTRY.histogram("core_poll_lateness_seconds", "Delay between an item's due time and its enqueue.")
+FETCHER_CYCLE = REGISTRY.histogram("core_fetcher_cycle_seconds", "Work of one fetcher wake-up (sync plus enqueue).")
+FETCHER_SYNC = REGISTRY.histogram("core_fetcher_sync_seconds", "Duration of one item feed sync with the API.")
 
 
 class Fetcher(Thread):
@@ -29,7 +36,8 @@ class Fetcher(Thread):
     from an API and places each request into a queue to be processed by other threads.
     """
 
-    def __init__(self, logger: CustomLogger, api_url: str, task_queue: Queue, stop_event: Event, interval: float = 30 ) -> None:
+    def __init__(self, logger: CustomLogger, api_url: str, task_queue: Queue, stop_event: Event, interval: float = 30,
+                 shard: int = 0, ring: Optional[HashRing] = None, deltas: Optional[DeltaCache] = None) -> None:
         """
         Initializes the fetcher threads.
 
@@ -39,6 +47,11 @@ class Fetcher(Thread):
             task_queue (Queue): The queue where items data will be placed for processing.
             interval (float): The interval in seconds for making the task. Default is 30.
             stop_event (Event): Event that signals when to stop the thread. Default is None.
+            shard (int): Shard id of this fetcher in the ring. Default is 0.
+            ring (Optional[HashRing]): Ring shared by all fetchers; the fetcher only schedules
+                the items it owns. Default is a single-shard ring.
+            deltas (Optional[DeltaCache]): Previous samples of Delta items shared with the
+                snmpers; dropped items forget theirs. Default is None (nothing to forget).
         """
         super().__init__()
         self.api_url = api_url
@@ -49,8 +62,19 @@ class Fetcher(Thread):
         self.thread_id: Optional[int] = None
         self.last_enqueued: dict[int, datetime] = {} #Third approach
         self.wake_event = Event() #Signal new values(Last approach)
+        self.items = ItemRegistry() #Heap scheduler approach
+        self.scheduler = PollScheduler()
+        self.traps_enqueued: set[int] = set()
+        self.refresh: dict[int, list[tuple[str, str]]] = {} #Items whose host/OID changed -> previous (ip, oid): snmpers drop their cached pysnmp objects
+        self.cursor: str = "0" #Incremental sync
+        self.etag: Optional[str] = None
+        self.shard = shard #Sharding
+        self.ring: HashRing = ring if ring is not None else HashRing([shard])
+        self.ring_version: int = self.ring.version
+        self.retired = Event()
+        self.deltas = deltas
     
-    def _fetch_data(self, api_url: str) -> List[Item]:
+    def _fetch_items(self, api_url: str) -> List[Item]:
         """
         Fetches the list of request data (items) hosts from the API.
 
@@ -76,13 +100,14 @@ class Fetcher(Thread):
         # self._run_approach1()
         # self._run_approach2()
         # self._run_approach3()
-        self._start_wake_server()
-        self._run_approach4()
+        # self._start_wake_server()  # Moved to FetcherManager (one server for all fetchers)
+        # self._run_approach4()
+        self._run_approach5()
 
     def _run_approach1(self)-> None:
         """
         Main fetcher thread. Each iteration:
-          - Calls self._fetch_data()
+          - Calls self._fetch_items()
           - Enqueues items whose update interval has expired or that are just created.
           - Sleeps exactly until the next due update, compensating for processing latency.
         Loop exits when self.stop_event is set.
@@ -98,7 +123,7 @@ class Fetcher(Thread):
             start_monotonic: float = monotonic()
             next_interval: float = default_interval
 
-            items: List[Item] = self._fetch_data(self.api_url)
+            items: List[Item] = self._fetch_items(self.api_url)
 
             next_intervals: List[float] = []
             for item in items:
@@ -202,7 +227,7 @@ class Fetcher(Thread):
         """
             Main fetcher thread with deduplication.
             Each iteration:
-            - Calls self._fetch_data()
+            - Calls self._fetch_items()
             - Enqueues items only if:
                 1. Update interval has expired, AND
                 2. The updatedAt is newer than the last time it was enqueued, OR it's just created
@@ -220,7 +245,7 @@ class Fetcher(Thread):
             start_monotonic: float = monotonic()
             next_interval: float = default_interval
 
-            items: List[Item] = self._fetch_data(self.api_url)
+            items: List[Item] = self._fetch_items(self.api_url)
 
             next_intervals: List[float] = []
             for item in items:
@@ -254,6 +279,12 @@ class Fetcher(Thread):
 
                 next_intervals.append(delay)
 
+            if items:
+                # Los items borrados en el servidor no deben quedar en last_enqueued
+                live_ids: set[int] = {item.id for item in items}
+                for item_id in [item_id for item_id in self.last_enqueued if item_id not in live_ids]:
+                    del self.last_enqueued[item_id]
+
             if next_intervals:
                 next_interval = max(0.1, min(next_intervals) - latency_compensation)
 
@@ -263,25 +294,6 @@ class Fetcher(Thread):
 
         self.logger.info(f"[Fetcher-{self.thread_id}] Thread stopped")
 
-    #Handler new values(Last approach)
-    def _start_wake_server(self):
-        """Servidor TCP para recibir señal de despertar desde otro proceso/script."""
-        def server():
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                s.bind(('127.0.0.1', 5050))  # Cambiar puerto(si es necesario)
-                s.listen(1)
-                while not self.stop_event.is_set():
-                    try:
-                        conn, _ = s.accept()
-                        with conn:
-                            data = conn.recv(16)
-                            if data == b"WAKE":
-                                self.logger.info(f"[Fetcher-{self.thread_id}] Wake signal received")
-                                self.wake_event.set()
-                    except Exception as e:
-                        self.logger.error(f"[Fetcher-{self.thread_id}] Wake server error: {e}")
-        Thread(target=server, daemon=True).start()
     def _run_approach4(self) -> None:
         """
         Main fetcher thread with deduplication and external wake-up support.
@@ -302,7 +314,7 @@ class Fetcher(Thread):
             start_monotonic: float = monotonic()
             next_interval: float = default_interval
 
-            items: List[Item] = self._fetch_data(self.api_url)
+            items: List[Item] = self._fetch_items(self.api_url)
 
             next_intervals: List[float] = []
             for item in items:
@@ -334,6 +346,12 @@ class Fetcher(Thread):
 
                 next_intervals.append(delay)
 
+            if items:
+                # Los items borrados en el servidor no deben quedar en last_enqueued
+                live_ids: set[int] = {item.id for item in items}
+                for item_id in [item_id for item_id in self.last_enqueued if item_id not in live_ids]:
+                    del self.last_enqueued[item_id]
+
             if next_intervals:
                 next_interval = max(0.1, min(next_intervals) - latency_compensation)
 
@@ -351,6 +369,173 @@ class Fetcher(Thread):
 
         self.logger.info(f"[Fetcher-{self.thread_id}] Thread stopped")
 
+    def _build_payload(self, item: ItemRecord) -> Dict[str, Any]:
+        """
+        Builds the task_queue payload of an item. The first payload after its host or OID
+        changed carries "refresh" (the previous (ip, oid) pairs of the item) so the snmper
+        invalidates the cached pysnmp objects of both the old and the new address and OID.
+        """
+        payload: Dict[str, Any] = {
+            "id": item.id,
+            "oid": item.snmp_oid,
+            "ip": item.host.ip,
+            "community": item.host.community,
+            "tipo": item.tipo,
+            "factor_division": item.factor_division,
+            "factor_multiplicacion": item.factor_multiplicacion,
+        }
+        previous = self.refresh.pop(item.id, None)
+        if previous:
+            payload["refresh"] = previous
+        return payload
+
+    def _initial_due(self, item: ItemRecord, natural_due: float) -> float:
+        """
+        Snaps the due time of a newly seen item (updatedAt + interval on the monotonic clock,
+        see ItemRegistry.due_times) to its phase slot nearest to it, never in the past, so
+        items created or reloaded together are spread over their interval.
+        """
+        interval: float = max(0.1, item.interval)
+        return self.scheduler.next_slot(item.id, interval, max(monotonic(), natural_due - interval / 2))
+
+    def _fetch_data(self, api_url: str) -> bool:
+        """
+        Pulls the changes since self.cursor from the monitoring feed and applies them to the
+        in-memory registry and scheduler. Sends the last ETag so an unchanged feed costs a 304.
+
+        Args:
+            api_url (str): The URL of the monitoring feed.
+
+        Returns:
+            bool: True if the registry is in sync with the API, False if the request failed.
+        """
+        self.logger.debug(f"[Fetcher-{self.thread_id}] Fetching item changes since {self.cursor}")
+        status, delta, etag = FetchData.get_items_delta(api_url, self.cursor, self.etag)
+        if status == 304:
+            return True
+        if status != 200 or not isinstance(delta, dict):
+            self.logger.error(f"[Fetcher-{self.thread_id}] Error fetching items from {api_url}")
+            return False
+
+        rows: List[Dict[str, Any]] = []
+        foreign: List[int] = []
+        for row in delta.get("items", []):
+            if self.ring.owner(int(row["id"])) == self.shard:
+                rows.append(row)
+            else:
+                foreign.append(int(row["id"]))
+        self._drop_items(foreign)
+        changes = self.items.upsert_many(rows)
+        dues: List[float] = ItemRegistry.due_times([record for record, _ in changes], monotonic(), time())
+        for (record, previous), natural_due in zip(changes, dues):
+            self._apply_item(record, previous, natural_due)
+        if delta.get("full"):
+            self._forget(self.items.retain(record.id for record, _ in changes))
+        self._drop_items(delta.get("deleted", []))
+
+        self.cursor = delta.get("cursor") or self.cursor
+        self.etag = etag
+        self.logger.debug(
+            f"[Fetcher-{self.thread_id}] Applied {len(changes)} changed and {len(delta.get('deleted', []))} "
+            f"deleted items ({len(self.items)} in registry, {self.items.host_count} hosts)"
+        )
+        return True
+
+    def _apply_item(self, item: ItemRecord, previous: Optional[ItemRecord], natural_due: float) -> None:
+        """
+        Applies an inserted or updated registry record to the scheduler.
+        """
+        if previous is not None and (previous.host is not item.host or previous.snmp_oid != item.snmp_oid):
+            self.refresh.setdefault(item.id, []).append((previous.host.ip, previous.snmp_oid))
+        if not item.enabled:
+            self.scheduler.remove(item.id)
+            self.traps_enqueued.discard(item.id)
+            return
+        if item.tipo == 3:
+            # Traps only need their listener registered once (or again after an edit).
+            if item.id not in self.traps_enqueued or (previous and previous.snmp_oid != item.snmp_oid):
+                self.task_queue.put(self._build_payload(item))
+                self.traps_enqueued.add(item.id)
+            return
+        interval: float = max(0.1, item.interval)
+        if item.id not in self.scheduler:
+            self.scheduler.schedule(item.id, interval, self._initial_due(item, natural_due))
+        else:
+            self.scheduler.update_interval(item.id, interval)
+
+    def _drop_items(self, item_ids: List[int]) -> None:
+        """
+        Forgets items that were deleted on the server or moved to another shard.
+        """
+        if item_ids:
+            self._forget(self.items.delete_many(item_ids))
+
+    def _forget(self, item_ids: List[int]) -> None:
+        """
+        Removes from the scheduler items that are no longer in the registry, and their
+        previous Delta sample (a deleted item id is never polled again; a moved one starts a
+        new baseline).
+        """
+        for item_id in item_ids:
+            self.scheduler.remove(item_id)
+            self.traps_enqueued.discard(item_id)
+            self.refresh.pop(item_id, None)
+            if self.deltas is not None:
+                self.deltas.forget(item_id)
+
+    def _run_approach5(self) -> None:
+        """
+        Main fetcher thread driven by an in-memory min-heap (PollScheduler).
+
+        Variaciones respecto a _run_approach4:
+        1. Los cambios de items se sincronizan (delta + ETag) cada self.interval o al
+           recibir wake_event, no en cada ciclo.
+        2. Los items esperan en un heap ordenado por su próximo vencimiento en reloj
+           monotónico; cada despertar sólo extrae los items vencidos (O(log n)).
+        3. El hilo duerme exactamente hasta la cabeza del heap y registra el retraso
+           (lateness) de cada item.
+        """
+        self.thread_id = get_ident()
+        self.logger.info(f"[Fetcher-{self.thread_id}] Thread started")
+
+        next_reload: float = monotonic()
+
+        while not self.stop_event.is_set() and not self.retired.is_set():
+            if self.ring.version != self.ring_version:
+                # Rebalance: a full snapshot drops the items we lost and picks up the new ones.
+                self.logger.info(f"[Fetcher-{self.thread_id}] Shard {self.shard} rebalancing")
+                self.ring_version = self.ring.version
+                self.cursor, self.etag = "0", None
+                next_reload = monotonic()
+            cycle_start: float = monotonic()
+            if self.wake_event.is_set() or cycle_start >= next_reload:
+                self.wake_event.clear()
+                self._fetch_data(self.api_url)
+                FETCHER_SYNC.observe(monotonic() - cycle_start)
+                next_reload = monotonic() + self.interval
+
+            now: float = monotonic()
+            for item_id, due in self.scheduler.pop_due(now):
+                POLL_LATENESS.observe(now - due)
+                item: Optional[ItemRecord] = self.items.get(item_id)
+                if item is None:
+                    continue
+                payload: Dict[str, Any] = self._build_payload(item)
+                payload["due"] = due  # Deadline para la cola de prioridad de los snmpers
+                self.task_queue.put(payload)
+                self.logger.debug(
+                    f"[Fetcher-{self.thread_id}] Enqueued item {item_id} for SNMP check "
+                    f"(late {self.scheduler.lateness[item_id] * 1000:.1f} ms)"
+                )
+                self.scheduler.reschedule(item_id, due, now)
+            FETCHER_CYCLE.observe(monotonic() - cycle_start)
+
+            head: Optional[float] = self.scheduler.next_due()
+            wake_at: float = next_reload if head is None else min(head, next_reload)
+            self.wake_event.wait(timeout=max(0.0, wake_at - monotonic()))
+
+        self.logger.info(f"[Fetcher-{self.thread_id}] Thread stopped")
+
     def stop(self) -> None:
         """
         Stops the fetcher thread by setting the stop event.
@@ -362,3 +547,11 @@ class Fetcher(Thread):
         else:
             self.logger.info(f"[Fetcher-{self.thread_id}] Stopping thread.")
         self.stop_event.set()
+        self.wake_event.set()
+
+    def retire(self) -> None:
+        """
+        Stops only this fetcher (used when the manager shrinks the number of shards).
+        """
+        self.retired.set()
+        self.wake_event.set()
@@ -0,0 +1,186 @@
+"""
+registry.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script defines the ItemRegistry class, the fetcher's in-memory copy of the monitored
+items. Items are compact __slots__ records parsed straight from the monitoring feed (no
+pydantic models), and hosts are interned: every item of a host shares one HostRecord.
+Updates and deletions are applied in bulk, and due times are computed for a whole batch
+with NumPy array operations.
+"""
+import sys
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+HostKey = Tuple[int, str, str, str]
+
+
+@lru_cache(maxsize=256)
+def parse_interval(value: Any) -> float:
+    """
+    Seconds of an updateinterval ("HH:MM:SS[.ffffff]" as serialized by the API, or a number).
+    Cached: there are only a handful of distinct intervals.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    hours, minutes, seconds = str(value).split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def parse_timestamp(value: Any) -> float:
+    """Epoch seconds of an ISO datetime from the API (0.0 if missing)."""
+    if not value:
+        return 0.0
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(str(value)).timestamp()
+
+
+class HostRecord:
+    __slots__ = ("id", "hostname", "ip", "community", "refs")
+
+    def __init__(self, id: int, hostname: str, ip: str, community: str) -> None:
+        self.id = id
+        self.hostname = hostname
+        self.ip = ip
+        self.community = community
+        self.refs = 0
+
+
+class ItemRecord:
+    __slots__ = ("id", "name", "tipo", "snmp_oid", "enabled", "interval", "factor_multiplicacion",
+                 "factor_division", "updated_at", "created_at", "host")
+
+    def __init__(self, id: int, name: str, tipo: int, snmp_oid: str, enabled: bool, interval: float,
+                 factor_multiplicacion: int, factor_division: int, updated_at: float, created_at: float,
+                 host: HostRecord) -> None:
+        self.id = id
+        self.name = name
+        self.tipo = tipo
+        self.snmp_oid = snmp_oid
+        self.enabled = enabled
+        self.interval = interval  # s
+        self.factor_multiplicacion = factor_multiplicacion
+        self.factor_division = factor_division
+        self.updated_at = updated_at  # epoch s
+        self.created_at = created_at  # epoch s
+        self.host = host
+
+
+class ItemRegistry:
+    """
+    Items by id, with interned hosts.
+    """
+
+    def __init__(self) -> None:
+        self._items: Dict[int, ItemRecord] = {}
+        self._hosts: Dict[HostKey, HostRecord] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._items
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self._items))
+
+    def get(self, item_id: int) -> Optional[ItemRecord]:
+        return self._items.get(item_id)
+
+    def of_hosts(self, host_ids: Iterable[int]) -> List[ItemRecord]:
+        """Records of the items that belong to the given hosts (used by on-demand polls)."""
+        wanted = set(host_ids)
+        return [record for record in list(self._items.values()) if record.host.id in wanted]
+
+    @property
+    def host_count(self) -> int:
+        return len(self._hosts)
+
+    def _intern_host(self, id: int, hostname: str, ip: str, community: str) -> HostRecord:
+        key = (id, hostname, ip, community)
+        host = self._hosts.get(key)
+        if host is None:
+            host = self._hosts[key] = HostRecord(id, sys.intern(hostname), sys.intern(ip), sys.intern(community))
+        host.refs += 1
+        return host
+
+    def _release_host(self, host: HostRecord) -> None:
+        host.refs -= 1
+        if host.refs <= 0:
+            self._hosts.pop((host.id, host.hostname, host.ip, host.community), None)
+
+    def _record(self, row: Dict[str, Any]) -> ItemRecord:
+        host = row["host"]
+        return ItemRecord(
+            int(row["id"]),
+            row["name"],
+            int(row["tipo"]),
+            sys.intern(str(row["snmp_oid"])),  # Los mismos OIDs se repiten en muchos hosts
+            bool(row["enabled"]),
+            parse_interval(row["updateinterval"]),
+            row["factor_multiplicacion"],
+            row["factor_division"],
+            parse_timestamp(row["updatedAt"]),
+            parse_timestamp(row["createdAt"]),
+            self._intern_host(int(host["id"]), host["hostname"], host["ip"], host["community"]),
+        )
+
+    def upsert_many(self, rows: Iterable[Dict[str, Any]]) -> List[Tuple[ItemRecord, Optional[ItemRecord]]]:
+        """
+        Inserts or replaces items from monitoring feed rows.
+
+        Returns:
+            List[Tuple[ItemRecord, Optional[ItemRecord]]]: (new record, previous record or None) per row.
+        """
+        changes: List[Tuple[ItemRecord, Optional[ItemRecord]]] = []
+        items = self._items
+        for row in rows:
+            record = self._record(row)
+            previous = items.get(record.id)
+            items[record.id] = record
+            if previous is not None:
+                self._release_host(previous.host)
+            changes.append((record, previous))
+        return changes
+
+    def delete_many(self, item_ids: Iterable[int]) -> List[int]:
+        """
+        Returns:
+            List[int]: Ids that were present and have been removed.
+        """
+        removed: List[int] = []
+        for item_id in item_ids:
+            record = self._items.pop(item_id, None)
+            if record is not None:
+                self._release_host(record.host)
+                removed.append(item_id)
+        return removed
+
+    def retain(self, item_ids: Iterable[int]) -> List[int]:
+        """
+        Keeps only the given ids (applies a full snapshot).
+
+        Returns:
+            List[int]: Removed ids.
+        """
+        keep = set(item_ids)
+        return self.delete_many([item_id for item_id in self._items if item_id not in keep])
+
+    @staticmethod
+    def due_times(records: List[ItemRecord], now_monotonic: float, now_wall: float) -> List[float]:
+        """
+        Monotonic due times (updatedAt + interval, clamped to [now, now + interval]) of a batch
+        of records, computed over float arrays (a full snapshot is tens of thousands of records).
+        """
+        count = len(records)
+        intervals = np.fromiter((r.interval for r in records), dtype=np.float64, count=count)
+        updated = np.fromiter((r.updated_at for r in records), dtype=np.float64, count=count)
+        due = updated + intervals + (now_monotonic - now_wall)
+        return np.clip(due, now_monotonic, now_monotonic + intervals).tolist()
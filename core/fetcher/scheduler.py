@@ -0,0 +1,158 @@
+"""
+scheduler.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script defines the PollScheduler class, an in-memory min-heap of items keyed by
+their next due time on the monotonic clock. The fetcher sleeps until the head of the
+heap is due and pops only the items that are due, so each wake-up costs O(log n).
+
+Every item polls on a fixed phase within its interval, derived from its id, so items with
+the same interval (e.g. created in bulk) come due spread over the interval instead of all
+at the same instant.
+"""
+import heapq
+import math
+from itertools import count
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+# Fracción áurea: los ids consecutivos quedan repartidos casi uniformemente en [0, 1)
+PHASE_MULTIPLIER = 0.6180339887498949
+
+
+class PollScheduler:
+    """
+    Min-heap scheduler for periodic polls.
+
+    Entries are (due, seq, item_id). Rescheduling or removing an item does not touch the
+    heap: the authoritative due time lives in self._due and stale heap entries are
+    discarded lazily when they reach the head.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, int]] = []
+        self._due: Dict[int, float] = {}
+        self._interval: Dict[int, float] = {}
+        self._seq = count()
+        self.lateness: Dict[int, float] = {}
+
+    @staticmethod
+    def phase(item_id: int, interval: float) -> float:
+        """
+        Stable offset of an item within its interval (Fibonacci hashing of the id). Any run
+        of consecutive ids, such as a bulk creation, is spread evenly over the interval
+        without re-assigning the phases of existing items.
+        """
+        return ((item_id * PHASE_MULTIPLIER) % 1.0) * interval
+
+    def next_slot(self, item_id: int, interval: float, not_before: float) -> float:
+        """
+        Returns:
+            float: First monotonic time >= not_before that falls on the item's phase.
+        """
+        phase = self.phase(item_id, interval)
+        return phase + math.ceil((not_before - phase) / interval) * interval
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._due
+
+    def schedule(self, item_id: int, interval: float, due: Optional[float] = None) -> None:
+        """
+        Adds or re-keys an item.
+
+        Args:
+            item_id (int): Item identifier.
+            interval (float): Poll interval in seconds.
+            due (Optional[float]): Monotonic due time. Default is the next phase slot.
+        """
+        if due is None:
+            due = self.next_slot(item_id, interval, monotonic())
+        self._due[item_id] = due
+        self._interval[item_id] = interval
+        heapq.heappush(self._heap, (due, next(self._seq), item_id))
+
+    def update_interval(self, item_id: int, interval: float) -> None:
+        """
+        Changes the interval of a scheduled item. The next due time is pulled in to the
+        item's phase slot if the new interval is shorter than the remaining wait.
+        """
+        if item_id not in self._due:
+            return
+        previous = self._interval[item_id]
+        if previous == interval:
+            return
+        due = min(self._due[item_id], self.next_slot(item_id, interval, monotonic()))
+        self.schedule(item_id, interval, due)
+
+    def remove(self, item_id: int) -> None:
+        """Removes an item; its heap entry is dropped lazily."""
+        self._due.pop(item_id, None)
+        self._interval.pop(item_id, None)
+        self.lateness.pop(item_id, None)
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._due.clear()
+        self._interval.clear()
+        self.lateness.clear()
+
+    def _discard_stale(self) -> None:
+        heap = self._heap
+        while heap:
+            due, _, item_id = heap[0]
+            if self._due.get(item_id) == due:
+                return
+            heapq.heappop(heap)
+
+    def next_due(self) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: Monotonic time of the earliest due item, or None if empty.
+        """
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        Pops every item due at or before now and records its lateness.
+        Popped items stay registered but off the heap until reschedule() is called.
+
+        Returns:
+            List[Tuple[int, float]]: (item_id, due) pairs in due order.
+        """
+        if now is None:
+            now = monotonic()
+        heap = self._heap
+        due_items: List[Tuple[int, float]] = []
+        while heap:
+            due, _, item_id = heap[0]
+            if self._due.get(item_id) != due:
+                heapq.heappop(heap)
+                continue
+            if due > now:
+                break
+            heapq.heappop(heap)
+            self.lateness[item_id] = now - due
+            due_items.append((item_id, due))
+        return due_items
+
+    def reschedule(self, item_id: int, due: float, now: Optional[float] = None) -> None:
+        """
+        Puts a popped item back on the phase slot one interval after its previous due time.
+        A due time off the item's phase (after an interval change) snaps to the nearest slot,
+        and if the poller fell behind, missed slots are skipped instead of bursting.
+        """
+        interval = self._interval.get(item_id)
+        if interval is None:
+            return
+        if now is None:
+            now = monotonic()
+        next_due = self.next_slot(item_id, interval, max(now, due + interval / 2))
+        self._due[item_id] = next_due
+        heapq.heappush(self._heap, (next_due, next(self._seq), item_id))
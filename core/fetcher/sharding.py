@@ -0,0 +1,69 @@
+"""
+sharding.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script defines the HashRing class used to partition items between fetcher threads.
+Each item id is owned by exactly one shard; when the number of shards changes only the
+items of the added/removed shards move.
+"""
+import hashlib
+from bisect import bisect
+from threading import Lock
+from typing import Iterable, List, Tuple
+
+
+def _hash(key: str) -> int:
+    """Stable 64-bit hash (Python's hash() is salted per process for str)."""
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hashing ring with virtual nodes.
+
+    Attributes:
+        version (int): Incremented on every change of the node set, so fetchers can
+            detect a rebalance cheaply.
+    """
+
+    def __init__(self, nodes: Iterable[int] = (), replicas: int = 160) -> None:
+        self.replicas = replicas
+        self.version = 0
+        self._lock = Lock()
+        self._ring: Tuple[List[int], List[int]] = ([], [])
+        self.set_nodes(nodes)
+
+    def set_nodes(self, nodes: Iterable[int]) -> None:
+        """
+        Rebuilds the ring for a new set of shard ids.
+
+        Args:
+            nodes (Iterable[int]): Shard identifiers (fetcher indexes).
+        """
+        points = sorted(
+            (_hash(f"{node}-{replica}"), node)
+            for node in set(nodes)
+            for replica in range(self.replicas)
+        )
+        with self._lock:
+            # Single assignment so readers never see a half-built ring.
+            self._ring = ([point for point, _ in points], [node for _, node in points])
+            self.version += 1
+
+    @property
+    def nodes(self) -> List[int]:
+        return sorted(set(self._ring[1]))
+
+    def owner(self, item_id: int) -> int:
+        """
+        Returns:
+            int: Shard id owning the item, or -1 if the ring is empty.
+        """
+        keys, nodes = self._ring
+        if not keys:
+            return -1
+        index = bisect(keys, _hash(str(item_id)))
+        return nodes[index % len(nodes)]
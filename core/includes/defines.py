@@ -10,11 +10,17 @@ the project for managing thread types, network configurations,
 and other system-wide settings.
 
 """
+import os
 
 # URL fetch
 ITEMS_URL="https://mwinsight-backend.onrender.com/api/v1/items/"
 ITEMS_DATA_URL="https://mwinsight-backend.onrender.com/api/v1/items/monitoring"
 METERINGS_URL= "https://mwinsight-backend.onrender.com/api/v1/meterings/"
+TABLE_METERINGS_URL= "https://mwinsight-backend.onrender.com/api/v1/meterings/table"
+FAILURES_URL= "https://mwinsight-backend.onrender.com/api/v1/meterings/falla"
+METERINGS_BULK_URL= "https://mwinsight-backend.onrender.com/api/v1/meterings/bulk"
+ITEMS_LATEST_URL= "https://mwinsight-backend.onrender.com/api/v1/items/latest"
+REACHABILITY_BULK_URL= "https://mwinsight-backend.onrender.com/api/v1/diagrams/ping/bulk"
 # Available services
 SNMP_FEATURE_STATUS = 'YES'  # Enables or disables SNMP feature
 ICMP_FEATURE_STATUS = 'YES'  # Enables or disables ICMP feature
@@ -59,6 +65,14 @@ HTTP_SERVER_PORT = 80  # HTTP server port
 SNMP_QUERY_PORT = 161  # SNMP query port
 VITE_PORT = 5173  # Vite development server port
 FLASK_PORT = 5000  # Flask development server port
+# Control channel address, shared with the API (app/routes/metering.py) through the environment
+WAKE_SERVER_HOST = os.getenv("CORE_CONTROL_HOST", "127.0.0.1")  # Fetchers wake server (one per core process)
+WAKE_SERVER_PORT = int(os.getenv("CORE_CONTROL_PORT", "5050"))  # Fetchers control (wake / poll now) server port
+CONTROL_READ_TIMEOUT = 5.0  # s to receive a control message
+CONTROL_MAX_MESSAGE = 4 * 1024 * 1024  # Max bytes of a control message
+POLL_NOW_MAX_ITEMS = 5000  # Max items per poll now request
+POLL_NOW_DEFAULT_TIMEOUT = 5.0  # s waiting for the results of a poll now request
+POLL_NOW_MAX_TIMEOUT = 30.0  # Upper bound of the poll now timeout
 
 # Server flags status
 SERVER_STOPPED = 1
@@ -67,3 +81,49 @@ SERVER_RUNNING = 0
 # Number threads
 NUM_FETCHERS = 1 #OK! 
 NUM_SNMPERS = 2
+
+# SNMP polling engines
+SNMP_ENGINE_THREAD = "thread"  # One blocking request per snmper thread
+SNMP_ENGINE_ASYNCIO = "asyncio"  # One long-lived event loop with a shared SnmpEngine
+SNMP_ENGINE_PROCESS = "process"  # One event loop per worker process (uses every core)
+SNMP_ENGINES = (SNMP_ENGINE_THREAD, SNMP_ENGINE_ASYNCIO, SNMP_ENGINE_PROCESS)
+SNMP_MAX_INFLIGHT = 1000  # Requests in flight on the asyncio engine
+SNMP_MAX_VARBINDS = 20  # Varbinds per GET when batching items of the same host
+SNMP_TIMEOUT_MIN = 0.2  # Lower bound of the adaptive per-host timeout (s)
+SNMP_TIMEOUT_MAX = 5.0  # Upper bound of the adaptive per-host timeout (s)
+SNMP_MAX_RETRIES = 3  # Upper bound of the adaptive retries
+SNMP_WAIT_BUDGET = 3.0  # Worst case a request may block: timeout * (retries + 1) (s)
+
+# ICMP items (tipo 2)
+ICMP_PING_COUNT = 4  # Echo requests per host and cycle
+ICMP_ECHO_TIMEOUT = 2.0  # s waiting for each echo reply (a probe run lasts at most ~2.6 s)
+ICMP_PACKET_SIZE = 100  # Bytes of echo payload
+ICMP_MAX_INFLIGHT = 1000  # Hosts probed at once by the thread engine
+
+# Task queue
+TASK_MAX_STALENESS = 60.0  # Polls later than this (s) are dropped instead of executed (0 disables)
+
+# HTTP client (FetchData)
+HTTP_POOL_SIZE = 16  # Keep-alive connections per thread session
+HTTP_CONNECT_TIMEOUT = 3.05  # s
+HTTP_READ_TIMEOUT = 15.0  # s
+HTTP_RETRIES = 3  # Retries on connection errors and 502/503/504
+HTTP_BACKOFF_BASE = 0.5  # First retry delay (s), doubled per attempt with jitter
+HTTP_BACKOFF_MAX = 10.0  # Max retry delay (s)
+
+# Result writers
+NUM_WRITERS = 2  # Writer threads draining response_snmp_queue
+WRITER_BATCH_SIZE = 500  # Records per bulk call
+WRITER_FLUSH_INTERVAL = 1.0  # Max seconds a record waits in a writer batch
+
+# Local spool (results the API could not take)
+SPOOL_PATH = "spool/results.db"  # SQLite file; empty disables the spool
+SPOOL_MAX_ROWS = 5_000_000  # Oldest batches are dropped beyond this
+SPOOL_REPLAY_RATE = 2000.0  # Max rows per second replayed once the API is back
+SPOOL_REPLAY_BATCH = 20  # Spooled batches read per replay round
+SPOOL_MAX_ATTEMPTS = 20  # Failed replays of one batch before it is moved to the dead-letter table
+
+# Per-host circuit breaker
+CIRCUIT_FAILURE_THRESHOLD = 3  # Consecutive unreachable requests that open a host (0 disables)
+CIRCUIT_BACKOFF_BASE = 30.0  # Seconds before the first probe of an open host
+CIRCUIT_BACKOFF_MAX = 600.0  # Upper bound of the probe backoff (s)
@@ -0,0 +1,88 @@
+"""
+server.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script defines the metrics HTTP server of the core process. It serves the registry in
+the Prometheus text format on GET /metrics (and a liveness answer on GET /health) from a
+daemon thread, so a scrape never blocks polling.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from typing import Optional
+
+from ..config.logger import CustomLogger
+from .registry import MetricsRegistry, REGISTRY
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """
+    Minimal HTTP server exposing a MetricsRegistry.
+    """
+
+    def __init__(self, logger: CustomLogger, host: str = "", port: int = 10000,
+                 registry: MetricsRegistry = REGISTRY) -> None:
+        self.logger = logger
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self.httpd: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[Thread] = None
+
+    def _handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                path = self.path.split("?", 1)[0]
+                if path == "/metrics":
+                    body = registry.render().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", CONTENT_TYPE)
+                elif path == "/health":
+                    body = b"ok\n"
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain")
+                else:
+                    body = b"not found\n"
+                    self.send_response(404)
+                    self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                # Los scrapes periódicos no van al log del core
+                pass
+
+        return Handler
+
+    def start(self) -> bool:
+        """
+        Binds the port and starts serving in a daemon thread.
+
+        Returns:
+            bool: False if the port could not be bound (the core keeps running without metrics).
+        """
+        try:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), self._handler())
+        except OSError as e:
+            self.logger.error(f"[Metrics] Could not bind {self.host or '0.0.0.0'}:{self.port}: {e}")
+            return False
+        self.httpd.daemon_threads = True
+        self.thread = Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 1.0},
+                             name="metrics-server", daemon=True)
+        self.thread.start()
+        self.logger.info(f"[Metrics] Serving /metrics on {self.host or '0.0.0.0'}:{self.port}")
+        return True
+
+    def stop(self) -> None:
+        if self.httpd is None:
+            return
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.httpd = None
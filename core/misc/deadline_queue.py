@@ -0,0 +1,140 @@
+"""
+deadline_queue.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script defines DeadlineQueue, the task queue between fetchers and snmpers. Payloads
+are keyed by item id and popped in deadline order (most overdue first). Re-enqueueing an
+item that is still pending updates the pending entry instead of adding a duplicate, and
+polls older than max_staleness are dropped and counted instead of being executed late.
+On-demand polls ("priority" payloads) go ahead of everything and never expire; when several
+of them hit the same pending item, their request ids ("requests") are merged so every
+waiting caller gets the result.
+"""
+import heapq
+from itertools import count
+from queue import Empty
+from threading import Condition
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
+
+PRIORITY_DEADLINE = float("-inf")
+
+
+class DeadlineQueue:
+    """
+    Queue-compatible (put/get/get_nowait/qsize/empty) priority queue ordered by deadline.
+
+    The deadline of a payload is its "due" key (monotonic time set by the fetcher). Payloads
+    without "due" (e.g. trap registrations) are ordered by arrival and never expire. Payloads
+    with a true "priority" key are popped before any scheduled poll.
+
+    Attributes:
+        max_staleness (float): Seconds past its deadline after which a poll is dropped
+            (0 disables dropping).
+        dropped (int): Polls dropped for being stale.
+        coalesced (int): Re-enqueues merged into an already pending entry.
+    """
+
+    def __init__(self, max_staleness: float = 0.0) -> None:
+        self.max_staleness = max_staleness
+        self.dropped = 0
+        self.coalesced = 0
+        self._heap: List[Tuple[float, int, Any]] = []
+        # key -> [deadline, seq, payload]
+        self._pending: Dict[Any, list] = {}
+        self._seq = count()
+        self._not_empty = Condition()
+
+    @staticmethod
+    def _key(payload: Dict) -> Any:
+        return payload.get("id", id(payload)) if isinstance(payload, dict) else id(payload)
+
+    @staticmethod
+    def _due(payload: Dict) -> Optional[float]:
+        return payload.get("due") if isinstance(payload, dict) else None
+
+    def put(self, payload: Dict, block: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Adds a payload, or updates the pending one of the same item (keeping the earliest
+        deadline). block/timeout are accepted for Queue compatibility; the queue is unbounded.
+        """
+        due = self._due(payload)
+        priority = isinstance(payload, dict) and bool(payload.get("priority"))
+        deadline = PRIORITY_DEADLINE if priority else (due if due is not None else monotonic())
+        key = self._key(payload)
+        with self._not_empty:
+            entry = self._pending.get(key)
+            if entry is not None:
+                self.coalesced += 1
+                if not priority and isinstance(entry[2], dict) and entry[2].get("priority"):
+                    return  # Una consulta a pedido pendiente cubre también la programada
+                if priority and isinstance(entry[2], dict) and entry[2].get("requests"):
+                    # Se responde a todos los pedidos pendientes del item, no sólo al último
+                    requests = tuple(dict.fromkeys(tuple(entry[2]["requests"]) + tuple(payload.get("requests", ()))))
+                    payload = dict(payload, requests=requests)
+                entry[2] = payload
+                if deadline >= entry[0]:
+                    return
+                entry[1] = next(self._seq)
+                entry[0] = deadline
+            else:
+                entry = [deadline, next(self._seq), payload]
+                self._pending[key] = entry
+            heapq.heappush(self._heap, (deadline, entry[1], key))
+            self._not_empty.notify()
+
+    def put_nowait(self, payload: Dict) -> None:
+        self.put(payload, block=False)
+
+    def _pop(self, now: float) -> Optional[Dict]:
+        """Pops the most overdue live payload; drops stale ones. Caller holds the lock."""
+        while self._heap:
+            deadline, seq, key = heapq.heappop(self._heap)
+            entry = self._pending.get(key)
+            if entry is None or entry[1] != seq:
+                continue  # superseded by a later put
+            del self._pending[key]
+            # Staleness is measured against the newest poll of the item, not the coalesced one.
+            due = self._due(entry[2])
+            if deadline != PRIORITY_DEADLINE and due is not None and self.max_staleness > 0 and now - due > self.max_staleness:
+                self.dropped += 1
+                continue
+            return entry[2]
+        return None
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Dict:
+        """
+        Removes and returns the payload with the earliest deadline.
+
+        Raises:
+            Empty: If no payload is available (immediately when block is False, or after timeout).
+        """
+        with self._not_empty:
+            end = None if timeout is None else monotonic() + timeout
+            while True:
+                payload = self._pop(monotonic())
+                if payload is not None:
+                    return payload
+                if not block:
+                    raise Empty
+                remaining = None if end is None else end - monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise Empty
+                self._not_empty.wait(remaining)
+
+    def get_nowait(self) -> Dict:
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        with self._not_empty:
+            return len(self._pending)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._not_empty:
+            return {"pending": len(self._pending), "dropped": self.dropped, "coalesced": self.coalesced}
@@ -1,12 +1,90 @@
+import re
+import random
+from urllib.parse import urlparse
 import requests
-from typing import Optional,Dict
+from time import perf_counter, sleep
+from threading import Lock, local
+from typing import Any, Optional, Dict, List, Tuple
+from requests.adapters import HTTPAdapter
 from .ItemInterface import ItemPut, ItemPutWithStatusCode
 from .MeteringInterface import MeteringPost
+from ..includes.defines import (
+    HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX,
+    ICMP_PING_COUNT, ICMP_ECHO_TIMEOUT, ICMP_PACKET_SIZE,
+)
+
+# Respuestas de gateway típicas de un redeploy: la petición no llegó a procesarse
+RETRY_STATUS = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE", "HEAD"}
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+# Una sesión (pool keep-alive) por hilo: requests.Session no es thread-safe
+_sessions = local()
+# Latencia por endpoint: "METHOD /ruta" -> {count, errors, total_ms, max_ms}
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = Lock()
+
 class FetchData(object):
     @staticmethod
+    def session() -> requests.Session:
+        """
+        Devuelve la sesión HTTP del hilo actual (se crea la primera vez), con un pool de
+        conexiones persistentes para no repetir el handshake TCP+TLS en cada petición.
+        """
+        session = getattr(_sessions, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions.session = session
+        return session
+    @staticmethod
+    def _record(method: str, url: str, elapsed_ms: float, error: bool) -> None:
+        path = _ID_SEGMENT.sub("/{id}", urlparse(url).path)
+        key = f"{method} {path}"
+        with _stats_lock:
+            entry = _stats.setdefault(key, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["errors"] += int(error)
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+    @staticmethod
+    def stats() -> Dict[str, Dict[str, float]]:
+        """Copia de los contadores de latencia por endpoint."""
+        with _stats_lock:
+            return {key: dict(entry) for key, entry in _stats.items()}
+    @staticmethod
+    def request(method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Petición HTTP con la sesión del hilo, timeouts (connect, read) y reintentos con
+        backoff exponencial con jitter ante errores de conexión y 502/503/504. Los timeouts
+        de lectura sólo se reintentan en métodos idempotentes (un POST pudo haberse aplicado).
+
+        Raises:
+            requests.exceptions.RequestException: Si se agotan los reintentos sin respuesta.
+        """
+        kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        attempt = 0
+        while True:
+            start = perf_counter()
+            try:
+                response = FetchData.session().request(method, url, **kwargs)
+                FetchData._record(method, url, (perf_counter() - start) * 1000, response.status_code >= 500)
+                if response.status_code not in RETRY_STATUS or attempt >= HTTP_RETRIES:
+                    return response
+            except requests.exceptions.RequestException as e:
+                FetchData._record(method, url, (perf_counter() - start) * 1000, True)
+                retriable = isinstance(e, requests.exceptions.ConnectionError) or (
+                    isinstance(e, requests.exceptions.Timeout) and method in IDEMPOTENT_METHODS)
+                if not retriable or attempt >= HTTP_RETRIES:
+                    raise
+            sleep(min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5))
+            attempt += 1
+    @staticmethod
     def get_items(url: str):
         try:
-            response= requests.get(url)
+            response= FetchData.request("GET", url)
             response_json=response.json()
             return response_json
         except requests.exceptions.RequestException as e:
@@ -15,12 +93,24 @@ class FetchData(object):
     @staticmethod
     def get_items_params(url: str, **params):
         try:
-            response = requests.get(url, params=params or None)
+            response = FetchData.request("GET", url, params=params or None)
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"Error: {e}")
             return None
     @staticmethod
+    def get_items_delta(url: str, since: str, etag: Optional[str] = None) -> Tuple[int, Any, Optional[str]]:
+        """Incremental monitoring feed: returns (status_code, json, etag). 304 means no changes."""
+        try:
+            headers = {"If-None-Match": etag} if etag else None
+            response = FetchData.request("GET", url, params={"since": since}, headers=headers)
+            if response.status_code == 304:
+                return 304, None, etag
+            return response.status_code, response.json(), response.headers.get("ETag")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"[GetItemsDelta] An error occurred: {e}")
+            return 0, None, None
+    @staticmethod
     def serializer_snmp(data: dict)-> dict:
         return ({
             'oid':data["oid"],
@@ -37,10 +127,11 @@ class FetchData(object):
     def serializer_icmp(data: dict)-> dict:
         return ({
             'host': data["ip"],
+            'oid': data.get("oid") or "",
             'value_type': data["tipo"],
-            'pingcount': 4,
-            'timeout': 30,
-            'packsize': 100,
+            'pingcount': ICMP_PING_COUNT,
+            'timeout': ICMP_ECHO_TIMEOUT, # s por echo request
+            'packsize': ICMP_PACKET_SIZE,
             'itemid': data["id"]
         })
 
@@ -49,7 +140,7 @@ class FetchData(object):
         try:
             full_url = f"{url}{data.id}"
             payload = {"latest_data": data.latest_data}
-            response = requests.put(full_url, json=payload)
+            response = FetchData.request("PUT", full_url, json=payload)
             response.raise_for_status()  
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -60,27 +151,110 @@ class FetchData(object):
         try:
             full_url = f"{url}{data.id}"
             payload = {"status_codes": data.status_codes}
-            response = requests.put(full_url, json=payload)
+            response = FetchData.request("PUT", full_url, json=payload)
             response.raise_for_status()  
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"[PutItemWithStatusCode] An error occurred: {e}")
             return None
     @staticmethod
-    def post_metering(url:str, data: MeteringPost)-> Optional[Dict]:
+    def post_metering(url:str, data: MeteringPost, tiempo: Optional[str] = None) -> Tuple[int, Optional[Dict]]:
+        """
+        Envía una medición; tiempo es la hora de la consulta (la API usa la actual si falta).
+
+        Returns:
+            Tuple[int, Optional[Dict]]: (status HTTP, respuesta); status 0 si no hubo respuesta.
+        """
         try:
             full_url = f"{url}"
             payload = {"itemid": data.id,
                        "valor": data.latest_data,
                        "latencia": data.latencia} #Added latency
-            response = requests.post(full_url, json=payload)
-            response.raise_for_status()  
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            if tiempo is not None:
+                payload["tiempo"] = tiempo
+            response = FetchData.request("POST", full_url, json=payload)
+            if response.status_code >= 400:
+                return response.status_code, None
+            return response.status_code, response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"[PostMetering] An error occurred: {e}")
-            return None
+            return 0, None
     @staticmethod
-    def post_snmp_failures(url: str, data: Dict)-> Optional[Dict]:
+    def post_meterings_bulk(url: str, rows: List[Dict]) -> Tuple[int, Optional[Dict]]:
+        """
+        Envía muchas mediciones ({itemid, valor, latencia, tiempo}) en una sola petición.
+
+        Returns:
+            Tuple[int, Optional[Dict]]: (status HTTP, respuesta); status 0 si no hubo respuesta.
+        """
+        try:
+            response = FetchData.request("POST", url, json={"rows": rows})
+            if response.status_code >= 400:
+                return response.status_code, None
+            return response.status_code, response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"[PostMeteringsBulk] An error occurred: {e}")
+            return 0, None
+    @staticmethod
+    def put_items_latest(url: str, rows: List[Dict]) -> Tuple[int, Optional[Dict]]:
+        """
+        Actualiza latest_data de muchos items ({id, latest_data, ts}) en una sola petición.
+
+        Returns:
+            Tuple[int, Optional[Dict]]: (status HTTP, respuesta); status 0 si no hubo respuesta.
+        """
+        try:
+            response = FetchData.request("PUT", url, json={"rows": rows})
+            if response.status_code >= 400:
+                return response.status_code, None
+            return response.status_code, response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"[PutItemsLatest] An error occurred: {e}")
+            return 0, None
+    @staticmethod
+    def post_reachability_bulk(url: str, rows: List[Dict]) -> Tuple[int, Optional[Dict]]:
+        """
+        Envía muchas filas de historial de alcanzabilidad ({host_ip, alcanzable, ping_min,
+        ping_avg, ping_max, packet_loss, tiempo}) en una sola petición.
+
+        Returns:
+            Tuple[int, Optional[Dict]]: (status HTTP, respuesta); status 0 si no hubo respuesta.
+        """
+        try:
+            response = FetchData.request("POST", url, json={"rows": rows})
+            if response.status_code >= 400:
+                return response.status_code, None
+            return response.status_code, response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"[PostReachabilityBulk] An error occurred: {e}")
+            return 0, None
+    @staticmethod
+    def post_table_meterings(url: str, itemid: int, rows: List[Dict], latencia: Optional[float] = None) -> Tuple[int, Optional[Dict]]:
+        """
+        Envía las filas de un recorrido de tabla.
+
+        Returns:
+            Tuple[int, Optional[Dict]]: (status HTTP, respuesta); status 0 si no hubo respuesta.
+        """
+        try:
+            payload = {"itemid": itemid,
+                       "latencia": latencia,
+                       "rows": [{"indice": row["index"], "oid": row["oid"], "valor": row["valor"]} for row in rows]}
+            response = FetchData.request("POST", url, json=payload)
+            if response.status_code >= 400:
+                return response.status_code, None
+            return response.status_code, response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"[PostTableMeterings] An error occurred: {e}")
+            return 0, None
+    @staticmethod
+    def post_snmp_failures(url: str, data: Dict) -> Tuple[int, Optional[Dict]]:
+        """
+        Registra una falla SNMP/ICMP de un item.
+
+        Returns:
+            Tuple[int, Optional[Dict]]: (status HTTP, respuesta); status 0 si no hubo respuesta.
+        """
         try:
             full_url = url
             payload = {'itemid': data['itemid'],
@@ -88,9 +262,10 @@ class FetchData(object):
                        'oid': data['oid'],
                        'mensaje': data['mensaje'],
                        "valor": data['valor']}
-            response = requests.post(full_url, json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            response = FetchData.request("POST", full_url, json=payload)
+            if response.status_code >= 400:
+                return response.status_code, None
+            return response.status_code, response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f'[PostSNMPFailure] An error ocurred: {e}')
-            return None
\ No newline at end of file
+            return 0, None
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+poll_requests.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script defines PollRequests, the rendezvous between an on-demand "poll now" request
+received on the control channel and the snmpers that execute it. The request id travels in
+the task payload ("requests", a tuple: on-demand polls of the same pending item are merged
+by the task queue); the snmper that handles the item resolves each of them with a compact
+result, and the control connection waits for all its items or a timeout.
+"""
+from itertools import count
+from threading import Condition
+from time import monotonic
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+class PollRequests:
+    """
+    Pending on-demand polls: request id -> expected item ids and results received so far.
+    """
+
+    def __init__(self) -> None:
+        self._requests: Dict[str, Tuple[set, Dict[int, Dict[str, Any]]]] = {}
+        self._ids = count(1)
+        self._changed = Condition()
+
+    def open(self, item_ids: Iterable[int]) -> str:
+        """
+        Registers a request that waits for the given items.
+
+        Returns:
+            str: Request id to put in the task payloads.
+        """
+        request_id = f"req-{next(self._ids)}"
+        with self._changed:
+            self._requests[request_id] = (set(item_ids), {})
+        return request_id
+
+    def expect(self, request_id: str, item_ids: Iterable[int]) -> None:
+        """Adds items to an open request (results that arrived before are kept)."""
+        with self._changed:
+            request = self._requests.get(request_id)
+            if request is not None:
+                request[0].update(int(item_id) for item_id in item_ids)
+
+    def resolve(self, request_id: str, itemid: int, result: Dict[str, Any]) -> None:
+        """Stores the result of one item; ignored if the request already finished."""
+        with self._changed:
+            request = self._requests.get(request_id)
+            if request is None:
+                return
+            request[1][int(itemid)] = result
+            self._changed.notify_all()
+
+    def wait(self, request_id: str, timeout: float) -> Tuple[Dict[int, Dict[str, Any]], List[int]]:
+        """
+        Waits until every item of the request has a result or the timeout expires, and closes it.
+
+        Returns:
+            Tuple[Dict[int, Dict[str, Any]], List[int]]: Results by item id, and ids still pending.
+        """
+        end = monotonic() + max(0.0, timeout)
+        with self._changed:
+            while True:
+                expected, results = self._requests.get(request_id, (set(), {}))
+                remaining = end - monotonic()
+                if expected.issubset(results) or remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            self._requests.pop(request_id, None)
+        return results, sorted(expected.difference(results))
+
+    def close(self, request_id: str) -> None:
+        with self._changed:
+            self._requests.pop(request_id, None)
+
+    def pending(self) -> int:
+        with self._changed:
+            return len(self._requests)
+
+
+# Registro compartido por el canal de control y los snmpers del proceso core
+POLL_REQUESTS = PollRequests()
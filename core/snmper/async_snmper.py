@@ -0,0 +1,198 @@
+"""
+async_snmper.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script is the definition of the asyncio snmper thread. A single long-lived event loop
+with a shared SnmpEngine consumes task_queue, batches items of the same host into one GET
+and keeps up to max_inflight requests outstanding at the same time, instead of one
+blocking request per thread.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty
+from threading import Event, get_ident
+from typing import Dict, List, Optional, Set
+
+from pysnmp.hlapi.v3arch.asyncio import SnmpEngine
+
+from ..config.logger import CustomLogger
+from ..includes.defines import SNMP_MAX_INFLIGHT, SNMP_MAX_VARBINDS
+from ..checkers.snmp.snmpnumber import SNMPCustomNumber
+from ..checkers.snmp.snmptable import SNMPTable
+from ..checkers.snmp.rtt import RttEstimator
+from ..checkers.snmp.objcache import SNMP_OBJECTS
+from ..checkers.snmp.fastget import FAST_GET
+from ..checkers.snmp.delta import DeltaCache
+from ..checkers.icmp import PINGER
+from .circuit_breaker import CircuitBreaker
+from .snmper_thread import Snmper, SNMP_GET_TYPES
+
+# Items taken from task_queue per wake-up of the feeder
+FEED_BATCH_SIZE = 256
+
+
+class AsyncSnmper(Snmper):
+    """
+    Snmper variant that runs every SNMP GET as a coroutine on one event loop.
+
+    Results are handed to the writers through response_queue. ICMP items run on the loop too
+    (one native probe per host); the remaining blocking work (trap listener registration) runs
+    in a small thread pool so it never stalls the loop.
+    """
+
+    def __init__(
+        self,
+        logger: CustomLogger,
+        api_url: str,
+        task_queue: Queue,
+        response_queue: Queue,
+        stop_event: Event,
+        interval: float = 0.001,
+        max_inflight: int = SNMP_MAX_INFLIGHT,
+        max_varbinds: int = SNMP_MAX_VARBINDS,
+        rtt: Optional[RttEstimator] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        deltas: Optional[DeltaCache] = None,
+        fast_get: bool = False
+    ) -> None:
+        """
+        Initializes the asyncio snmper thread.
+
+        Args:
+            logger (CustomLogger): Custom logger instance for logging events.
+            api_url (str): The URL of the API for item definitions.
+            task_queue (Queue): Queue where items data is placed for processing.
+            response_queue (Queue): Queue where SNMP results are placed.
+            stop_event (Event): Event signaling when to stop the thread.
+            interval (float): Kept for compatibility with Snmper. Default is 0.001s.
+            max_inflight (int): Maximum number of requests (PDUs) outstanding at once.
+            max_varbinds (int): Maximum varbinds per GET when batching items of the same host.
+            rtt (Optional[RttEstimator]): Shared per-host RTT estimator for adaptive timeouts.
+            breaker (Optional[CircuitBreaker]): Shared per-host circuit breaker.
+            deltas (Optional[DeltaCache]): Shared previous samples of Delta (tipo 5) items.
+            fast_get (bool): Send numeric v2c GETs over the raw UDP fast path (pysnmp fallback).
+        """
+        super().__init__(logger, api_url, task_queue, response_queue, stop_event, interval, max_varbinds, rtt,
+                         breaker, deltas, fast_get)
+        self.max_inflight = max(1, max_inflight)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.engine: Optional[SnmpEngine] = None
+        self.feeder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snmper-feeder")
+        self.executor = ThreadPoolExecutor(max_workers=min(32, self.max_inflight), thread_name_prefix="snmper-io")
+
+    def run(self) -> None:
+        """
+        Runs the event loop until stop_event is set.
+        """
+        self.thread_id = get_ident()
+        self.logger.info(f"[Snmper-{self.thread_id}] Asyncio engine started (max in flight: {self.max_inflight}).")
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main())
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+            self.feeder.shutdown(wait=False)
+            self.executor.shutdown(wait=False)
+        self.logger.info(f"[Snmper-{self.thread_id}] Thread exiting.")
+
+    async def _next_items_async(self) -> List[Dict]:
+        """
+        Waits (off-loop) for the next payload and drains whatever else is already queued.
+
+        Returns:
+            List[Dict]: Formatted items, empty on timeout.
+        """
+        try:
+            raw_items: List[Dict] = [await self.loop.run_in_executor(self.feeder, self.task_queue.get, True, 1)]
+        except Empty:
+            return []
+        while len(raw_items) < FEED_BATCH_SIZE:
+            try:
+                raw_items.append(self.task_queue.get_nowait())
+            except Empty:
+                break
+        return [self._format_item(raw) for raw in raw_items]
+
+    async def _main(self) -> None:
+        self.engine = SNMP_OBJECTS.engine()
+        semaphore = asyncio.Semaphore(self.max_inflight)
+        tasks: Set[asyncio.Task] = set()
+
+        def spawn(coroutine) -> None:
+            task = asyncio.create_task(coroutine)
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        try:
+            while not self.stop_event.is_set():
+                items_formated = await self._next_items_async()
+                snmp_items = [item for item in items_formated if item.get("value_type") in SNMP_GET_TYPES]
+                for batch in self._snmp_batches(snmp_items):
+                    if not self._admit(batch):
+                        continue
+                    await semaphore.acquire()
+                    spawn(self._poll_snmp_batch(batch, semaphore))
+                for icmp_items in self._icmp_groups(items_formated):
+                    await semaphore.acquire()
+                    spawn(self._poll_icmp(icmp_items, semaphore))
+                for item_formated in items_formated:
+                    if item_formated.get("value_type") not in SNMP_GET_TYPES + (2,):
+                        if item_formated.get("value_type") == 4 and not self._admit([item_formated]):
+                            continue
+                        await semaphore.acquire()
+                        spawn(self._poll(item_formated, semaphore))
+            if tasks:
+                await asyncio.wait(tasks, timeout=5)
+        finally:
+            SNMP_OBJECTS.release()
+            FAST_GET.release()
+            PINGER.release()
+
+    async def _poll_snmp_batch(self, batch: List[Dict], semaphore: asyncio.Semaphore) -> None:
+        """
+        Polls the items of one host with a single GET and hands each result to the result handler.
+        """
+        try:
+            snmp_responses: List[Dict] = await SNMPCustomNumber().get_data_batch_async(batch, engine=self.engine, rtt=self.rtt,
+                                                                                    fast=self.fast_get)
+            if not self._track_host(batch[0], snmp_responses):
+                return
+            for item_formated, snmp_response in zip(batch, snmp_responses):
+                self._process_snmp_response(item_formated, snmp_response)
+        except Exception as e:
+            self.logger.error(f"[Snmper-{self.thread_id}] Error polling batch for {batch[0].get('host')}: {e}")
+        finally:
+            semaphore.release()
+
+    async def _poll_icmp(self, icmp_items: List[Dict], semaphore: asyncio.Semaphore) -> None:
+        """
+        Probes one host on this loop (see Snmper._probe_icmp) and frees its in-flight slot.
+        """
+        try:
+            await self._probe_icmp(icmp_items)
+        finally:
+            semaphore.release()
+
+    async def _poll(self, item_formated: Dict, semaphore: asyncio.Semaphore) -> None:
+        """
+        Polls one table or trap item. Table walks run on the loop; trap registration uses the
+        blocking trap manager.
+        """
+        try:
+            value_type = item_formated.get("value_type")
+            if value_type == 3: ##Trap
+                await self.loop.run_in_executor(self.executor, self.handle_trap, item_formated)
+            elif value_type == 4: ##Tabla SNMP
+                table_response: Dict = await SNMPTable().get_data_async(item_formated, engine=self.engine, rtt=self.rtt)
+                if not self._track_host(item_formated, [table_response]):
+                    return
+                self._process_table_response(item_formated, table_response)
+        except Exception as e:
+            self.logger.error(f"[Snmper-{self.thread_id}] Error polling item {item_formated.get('itemid')}: {e}")
+        finally:
+            semaphore.release()
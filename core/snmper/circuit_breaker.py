@@ -0,0 +1,117 @@
+"""
+circuit_breaker.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script defines the per-host circuit breaker shared by the snmpers. After a number of
+consecutive unreachable responses (timeouts) a host is opened and its items are skipped
+without touching the network; once per backoff period a single probe is let through
+(half-open) to decide whether to close it again or keep it open with a longer backoff.
+"""
+from time import monotonic
+from threading import Lock
+from typing import Dict, Optional
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half-open"
+
+
+class _HostCircuit:
+    __slots__ = ("state", "failures", "backoff", "retry_at")
+
+    def __init__(self, backoff: float) -> None:
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.backoff = backoff
+        self.retry_at = 0.0
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker keyed by host.
+
+    Attributes:
+        threshold (int): Consecutive failures that open the circuit (0 disables the breaker).
+        base_backoff (float): Seconds an open host waits before the first probe.
+        max_backoff (float): Upper bound of the exponential backoff.
+    """
+
+    def __init__(self, threshold: int, base_backoff: float, max_backoff: float) -> None:
+        self.threshold = threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max(base_backoff, max_backoff)
+        self._hosts: Dict[str, _HostCircuit] = {}
+        self._lock = Lock()
+
+    def allow(self, host: str, now: Optional[float] = None) -> bool:
+        """
+        Decides whether a request to host may be sent.
+
+        Returns:
+            bool: True if closed, or if this call is the probe of an open host whose backoff
+                has elapsed (the host moves to half-open). False while open, or while the
+                half-open probe is still pending.
+        """
+        if self.threshold <= 0:
+            return True
+        now = monotonic() if now is None else now
+        with self._lock:
+            circuit = self._hosts.get(host)
+            if circuit is None or circuit.state == CIRCUIT_CLOSED:
+                return True
+            if now < circuit.retry_at:
+                return False
+            # Backoff cumplido (o probe perdido): un único probe por periodo.
+            circuit.state = CIRCUIT_HALF_OPEN
+            circuit.retry_at = now + circuit.backoff
+            return True
+
+    def record_success(self, host: str) -> bool:
+        """
+        Closes the circuit of host.
+
+        Returns:
+            bool: True if the host was open or half-open (it just recovered).
+        """
+        with self._lock:
+            circuit = self._hosts.pop(host, None)
+        return circuit is not None and circuit.state != CIRCUIT_CLOSED
+
+    def record_failure(self, host: str, now: Optional[float] = None) -> bool:
+        """
+        Counts an unreachable response for host.
+
+        Returns:
+            bool: True only when this failure opens a closed circuit, so the caller records a
+                single "host unreachable" failure instead of one per item.
+        """
+        if self.threshold <= 0:
+            return False
+        now = monotonic() if now is None else now
+        with self._lock:
+            circuit = self._hosts.setdefault(host, _HostCircuit(self.base_backoff))
+            circuit.failures += 1
+            if circuit.state == CIRCUIT_HALF_OPEN:
+                # Probe fallido: se reabre con el doble de espera.
+                circuit.state = CIRCUIT_OPEN
+                circuit.backoff = min(self.max_backoff, circuit.backoff * 2)
+                circuit.retry_at = now + circuit.backoff
+                return False
+            if circuit.state == CIRCUIT_CLOSED and circuit.failures >= self.threshold:
+                circuit.state = CIRCUIT_OPEN
+                circuit.retry_at = now + circuit.backoff
+                return True
+            return False
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            circuit = self._hosts.get(host)
+            return circuit.state if circuit is not None else CIRCUIT_CLOSED
+
+    @property
+    def open_hosts(self) -> list:
+        with self._lock:
+            return [host for host, circuit in self._hosts.items() if circuit.state != CIRCUIT_CLOSED]
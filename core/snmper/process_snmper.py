@@ -0,0 +1,188 @@
+"""
+process_snmper.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script is the definition of the process-pool snmper. One dispatcher thread in the core
+process drains task_queue, applies the circuit breaker and sends host batches to worker
+processes (snmp_worker.py) over multiprocessing queues. Every host is pinned to one worker,
+so its batches and RTT estimate stay in the same process. Results come back over a shared
+queue, together with the worker's RTT estimate of the host (mirrored into self.rtt for the
+metrics), and are handed to the writers (response_queue) by a collector thread.
+"""
+import multiprocessing
+import zlib
+from queue import Queue, Empty
+from threading import Event, Thread, get_ident
+from typing import Dict, List, Optional, Tuple
+
+from ..config.logger import CustomLogger
+from ..includes.defines import (
+    SNMP_MAX_INFLIGHT, SNMP_MAX_VARBINDS, SNMP_TIMEOUT_MIN, SNMP_TIMEOUT_MAX, SNMP_MAX_RETRIES, SNMP_WAIT_BUDGET,
+)
+from ..checkers.snmp.rtt import RttEstimator
+from ..checkers.snmp.delta import DeltaCache
+from .circuit_breaker import CircuitBreaker
+from .snmper_thread import Snmper, SNMP_GET_TYPES
+from .snmp_worker import worker_main, WORKER_JOB_SNMP, WORKER_JOB_TABLE, WORKER_JOB_ICMP
+
+# Items taken from task_queue per dispatch round
+DISPATCH_BATCH_SIZE = 512
+
+
+class ProcessSnmper(Snmper):
+    """
+    Snmper variant that fans polls out to worker processes so polling scales with cores.
+    """
+
+    def __init__(
+        self,
+        logger: CustomLogger,
+        api_url: str,
+        task_queue: Queue,
+        response_queue: Queue,
+        stop_event: Event,
+        interval: float = 0.001,
+        num_workers: int = 1,
+        max_inflight: int = SNMP_MAX_INFLIGHT,
+        max_varbinds: int = SNMP_MAX_VARBINDS,
+        timeout_bounds: Tuple[float, float] = (SNMP_TIMEOUT_MIN, SNMP_TIMEOUT_MAX),
+        max_retries: int = SNMP_MAX_RETRIES,
+        rtt: Optional[RttEstimator] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        deltas: Optional[DeltaCache] = None,
+        fast_get: bool = False
+    ) -> None:
+        """
+        Initializes the dispatcher thread (workers are started in run()).
+
+        Args:
+            logger (CustomLogger): Custom logger instance for logging events.
+            api_url (str): The URL of the API for item definitions.
+            task_queue (Queue): Queue where items data is placed for processing.
+            response_queue (Queue): Queue where SNMP results are placed.
+            stop_event (Event): Event signaling when to stop the thread.
+            interval (float): Kept for compatibility with Snmper. Default is 0.001s.
+            num_workers (int): Number of worker processes.
+            max_inflight (int): Maximum requests in flight per worker.
+            max_varbinds (int): Maximum varbinds per GET when batching items of the same host.
+            timeout_bounds (Tuple[float, float]): Bounds of the adaptive SNMP timeout in the workers.
+            max_retries (int): Upper bound of the adaptive SNMP retries in the workers.
+            rtt (Optional[RttEstimator]): Mirror of the workers' estimates (each worker keeps its own
+                estimator and sends the host state back with every result); not used for polling.
+            breaker (Optional[CircuitBreaker]): Shared per-host circuit breaker.
+            deltas (Optional[DeltaCache]): Shared previous samples of Delta (tipo 5) items.
+            fast_get (bool): Numeric v2c GETs of the workers go over the raw UDP fast path.
+        """
+        super().__init__(logger, api_url, task_queue, response_queue, stop_event, interval, max_varbinds, rtt,
+                         breaker, deltas, fast_get)
+        self.num_workers = max(1, num_workers)
+        self.max_inflight = max(1, max_inflight)
+        self.timeout_bounds = timeout_bounds
+        self.max_retries = max_retries
+        # spawn: los workers no heredan locks ni hilos del proceso principal
+        self.context = multiprocessing.get_context("spawn")
+        self.worker_stop = self.context.Event()
+        self.result_queue = self.context.Queue()
+        self.job_queues: List = [self.context.Queue() for _ in range(self.num_workers)]
+        self.workers: List = [None] * self.num_workers
+        self.collector: Optional[Thread] = None
+
+    def _start_worker(self, index: int) -> None:
+        worker = self.context.Process(
+            target=worker_main,
+            args=(index, self.job_queues[index], self.result_queue, self.worker_stop, self.max_inflight,
+                  self.timeout_bounds, self.max_retries, SNMP_WAIT_BUDGET, self.fast_get),
+            name=f"snmp-worker-{index}",
+            daemon=True,
+        )
+        worker.start()
+        self.workers[index] = worker
+
+    def _worker_for(self, host: str) -> int:
+        """Stable host -> worker assignment (crc32 is not salted per process)."""
+        return zlib.crc32(str(host).encode()) % self.num_workers
+
+    def _dispatch(self, kind: str, items: List[Dict]) -> None:
+        self.job_queues[self._worker_for(items[0]['host'])].put((kind, items))
+
+    def run(self) -> None:
+        """
+        Starts the workers and dispatches items until stop_event is set.
+        """
+        self.thread_id = get_ident()
+        self.logger.info(f"[Snmper-{self.thread_id}] Process engine started ({self.num_workers} workers).")
+        for index in range(self.num_workers):
+            self._start_worker(index)
+        self.collector = Thread(target=self._collect, name="snmper-collector", daemon=True)
+        self.collector.start()
+
+        while not self.stop_event.is_set():
+            self._respawn_dead_workers()
+            try:
+                items_formated = self._next_items(DISPATCH_BATCH_SIZE)
+            except Empty:
+                continue
+            snmp_items = [item for item in items_formated if item.get("value_type") in SNMP_GET_TYPES]
+            for batch in self._snmp_batches(snmp_items):
+                if self._admit(batch):
+                    self._dispatch(WORKER_JOB_SNMP, batch)
+            for icmp_items in self._icmp_groups(items_formated): ## ICMP: una ronda por host
+                self._dispatch(WORKER_JOB_ICMP, icmp_items)
+            for item_formated in items_formated:
+                value_type = item_formated.get("value_type")
+                if value_type == 3: ##Trap (el listener vive en el proceso principal)
+                    self.handle_trap(item_formated)
+                elif value_type == 4 and self._admit([item_formated]): ##Tabla SNMP
+                    self._dispatch(WORKER_JOB_TABLE, [item_formated])
+
+        self._stop_workers()
+        self.logger.info(f"[Snmper-{self.thread_id}] Thread exiting.")
+
+    def _respawn_dead_workers(self) -> None:
+        for index, worker in enumerate(self.workers):
+            if worker is not None and not worker.is_alive() and not self.worker_stop.is_set():
+                self.logger.error(
+                    f"[Snmper-{self.thread_id}] Worker {index} died (exit code {worker.exitcode}), restarting."
+                )
+                self._start_worker(index)
+
+    def _collect(self) -> None:
+        """
+        Receives worker results and hands them to the writers off the dispatcher thread.
+        """
+        while not self.stop_event.is_set() or not self.result_queue.empty():
+            try:
+                kind, items, responses, host_rtt = self.result_queue.get(timeout=1)
+            except Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self._store(kind, items, responses, host_rtt)
+
+    def _store(self, kind: str, items: List[Dict], responses: List[Dict],
+               host_rtt: Optional[Dict[str, Optional[float]]] = None) -> None:
+        try:
+            if host_rtt is not None:
+                self.rtt.restore(items[0]['host'], host_rtt)
+            if kind == WORKER_JOB_ICMP:
+                self._process_icmp_response(items, responses[0])
+            elif self._track_host(items[0], responses):
+                process = self._process_snmp_response if kind == WORKER_JOB_SNMP else self._process_table_response
+                for item_formated, response in zip(items, responses):
+                    process(item_formated, response)
+        except Exception as e:
+            self.logger.error(f"[Snmper-{self.thread_id}] Error storing {kind} results for {items[0].get('host')}: {e}")
+
+    def _stop_workers(self) -> None:
+        self.worker_stop.set()
+        for worker in self.workers:
+            if worker is None:
+                continue
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        if self.collector is not None:
+            self.collector.join(timeout=5)
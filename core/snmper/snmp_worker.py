@@ -0,0 +1,121 @@
+"""
+snmp_worker.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script is the entry point of the poller worker processes used by the process engine.
+Each worker owns one asyncio event loop and one SnmpEngine, so BER encoding/decoding runs
+on its own interpreter (and GIL). Jobs arrive from the parent over a multiprocessing queue
+and results go back over a shared result queue; API writes stay in the parent.
+
+Messages:
+    parent -> worker: (kind, items), kind in WORKER_JOB_SNMP / WORKER_JOB_TABLE / WORKER_JOB_ICMP,
+        items a list of formatted items (one host batch, the ICMP items of one host, or a single
+        table item).
+    worker -> parent: (kind, items, responses, rtt), one response per item (a single response for
+        the shared ICMP probe) and the worker's RTT estimate of the host after the job (None for
+        ICMP jobs or hosts without samples), so the parent can expose it.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty
+from typing import Dict, List, Set, Tuple
+
+from pysnmp.hlapi.v3arch.asyncio import SnmpEngine
+
+from ..checkers.snmp.snmpnumber import SNMPCustomNumber
+from ..checkers.snmp.snmptable import SNMPTable
+from ..checkers.snmp.rtt import RttEstimator
+from ..checkers.snmp.objcache import SNMP_OBJECTS
+from ..checkers.snmp.fastget import FAST_GET
+from ..checkers.icmp import PINGER
+from ..checkers.ping import Ping
+
+WORKER_JOB_SNMP = "snmp"
+WORKER_JOB_TABLE = "table"
+WORKER_JOB_ICMP = "icmp"
+
+
+async def _run_job(kind: str, items: List[Dict], engine: SnmpEngine, rtt: RttEstimator, fast_get: bool) -> List[Dict]:
+    if kind == WORKER_JOB_SNMP:
+        return await SNMPCustomNumber().get_data_batch_async(items, engine=engine, rtt=rtt, fast=fast_get)
+    if kind == WORKER_JOB_TABLE:
+        return [await SNMPTable().get_data_async(items[0], engine=engine, rtt=rtt)]
+    return [await Ping.get_data_host_async(items)]
+
+
+async def _worker_loop(worker_id: int, job_queue, result_queue, stop_event, max_inflight: int,
+                       timeout_bounds: Tuple[float, float], max_retries: int, wait_budget: float,
+                       fast_get: bool) -> None:
+    loop = asyncio.get_running_loop()
+    engine = SNMP_OBJECTS.engine()
+    # Los hosts se asignan siempre al mismo worker, así su RTT vive en un solo proceso.
+    rtt = RttEstimator(min_timeout=timeout_bounds[0], max_timeout=timeout_bounds[1],
+                       max_retries=max_retries, wait_budget=wait_budget)
+    semaphore = asyncio.Semaphore(max(1, max_inflight))
+    feeder = ThreadPoolExecutor(max_workers=1)
+    tasks: Set[asyncio.Task] = set()
+
+    async def poll(kind: str, items: List[Dict]) -> None:
+        try:
+            responses = await _run_job(kind, items, engine, rtt, fast_get)
+        except Exception as e:
+            logging.error(f"[Worker-{worker_id}] Job {kind} for {items[0].get('host')} failed: {e}")
+            responses = [{
+                "itemid": int(item.get('itemid', -1)),
+                "error": "Exception",
+                "code": 1,
+                "message": f"Worker exception: {e}"
+            } for item in items]
+        finally:
+            semaphore.release()
+        host_rtt = None if kind == WORKER_JOB_ICMP else rtt.host_state(items[0].get('host'))
+        # multiprocessing.Queue.put no bloquea: serializa y envía desde su propio hilo.
+        result_queue.put((kind, items, responses, host_rtt))
+
+    try:
+        while not stop_event.is_set():
+            try:
+                kind, items = await loop.run_in_executor(feeder, job_queue.get, True, 1)
+            except Empty:
+                continue
+            await semaphore.acquire()
+            task = asyncio.create_task(poll(kind, items))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks, timeout=5)
+    finally:
+        SNMP_OBJECTS.release()
+        FAST_GET.release()
+        PINGER.release()
+        feeder.shutdown(wait=False)
+
+
+def worker_main(worker_id: int, job_queue, result_queue, stop_event, max_inflight: int,
+                timeout_bounds: Tuple[float, float], max_retries: int, wait_budget: float,
+                fast_get: bool = False) -> None:
+    """
+    Process target: runs the worker event loop until stop_event is set.
+
+    Args:
+        worker_id (int): Index of the worker (for logs).
+        job_queue: multiprocessing queue with the jobs of this worker.
+        result_queue: multiprocessing queue shared by all workers for results.
+        stop_event: multiprocessing Event signaling shutdown.
+        max_inflight (int): Maximum jobs polled concurrently in this worker.
+        timeout_bounds (Tuple[float, float]): Bounds of the adaptive SNMP timeout.
+        max_retries (int): Upper bound of the adaptive SNMP retries.
+        wait_budget (float): Worst case a request may block (s).
+        fast_get (bool): Send numeric v2c GETs over the raw UDP fast path (pysnmp fallback).
+    """
+    logging.info(f"[Worker-{worker_id}] Process started.")
+    try:
+        asyncio.run(_worker_loop(worker_id, job_queue, result_queue, stop_event, max_inflight,
+                                 timeout_bounds, max_retries, wait_budget, fast_get))
+    except KeyboardInterrupt:
+        pass
+    logging.info(f"[Worker-{worker_id}] Process exiting.")
@@ -9,11 +9,21 @@ This script defines the Snmpermanager class, which is responsible for managing m
 The Snmpermanager starts, stops, and monitors the snmpers, including checking if they are still alive
 and terminating them if necessary.
 """
-from typing import List
+from typing import List, Optional, Tuple
 from queue import Queue
 from threading import Event
 from .snmper_thread import Snmper
+from .async_snmper import AsyncSnmper
+from .process_snmper import ProcessSnmper
 from ..config.logger import CustomLogger
+from ..checkers.snmp.rtt import RttEstimator
+from ..checkers.snmp.delta import DeltaCache
+from .circuit_breaker import CircuitBreaker
+from ..includes.defines import (
+    SNMP_ENGINE_THREAD, SNMP_ENGINE_ASYNCIO, SNMP_ENGINE_PROCESS, SNMP_MAX_INFLIGHT, SNMP_MAX_VARBINDS,
+    SNMP_TIMEOUT_MIN, SNMP_TIMEOUT_MAX, SNMP_MAX_RETRIES, SNMP_WAIT_BUDGET,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_BACKOFF_BASE, CIRCUIT_BACKOFF_MAX,
+)
 
 
 class SnmperManager:
@@ -23,7 +33,12 @@ class SnmperManager:
     """
 
     def __init__(self, logger: CustomLogger, api_url: str, task_queue: Queue, response_queue: Queue, stop_event: Event,
-                 num_snmpers: int = 1, interval: float = 0.001) -> None:
+                 num_snmpers: int = 1, interval: float = 0.001, engine: str = SNMP_ENGINE_THREAD,
+                 max_inflight: int = SNMP_MAX_INFLIGHT, max_varbinds: int = SNMP_MAX_VARBINDS,
+                 timeout_bounds: Tuple[float, float] = (SNMP_TIMEOUT_MIN, SNMP_TIMEOUT_MAX),
+                 max_retries: int = SNMP_MAX_RETRIES,
+                 breaker_threshold: int = CIRCUIT_FAILURE_THRESHOLD, num_workers: int = 1,
+                 fast_get: bool = False, deltas: Optional[DeltaCache] = None) -> None:
         self.logger = logger
         self.api_url = api_url
         self.num_snmpers = num_snmpers
@@ -32,24 +47,55 @@ class SnmperManager:
         self.response_queue= response_queue
         self.stop_event = stop_event
         self.interval = interval
+        self.engine = engine
+        self.max_inflight = max_inflight
+        self.max_varbinds = max_varbinds
+        self.num_workers = num_workers
+        self.timeout_bounds = timeout_bounds
+        self.max_retries = max_retries
+        self.fast_get = fast_get
+        # Un único estimador de RTT por host compartido por todos los snmpers
+        self.rtt = RttEstimator(min_timeout=timeout_bounds[0], max_timeout=timeout_bounds[1],
+                                max_retries=max_retries, wait_budget=SNMP_WAIT_BUDGET)
+        # Circuit breaker por host compartido: un host caído no ocupa a ningún snmper
+        self.breaker = CircuitBreaker(breaker_threshold, CIRCUIT_BACKOFF_BASE, CIRCUIT_BACKOFF_MAX)
+        # Muestras previas de los items Delta: un item puede caer en cualquier snmper (los
+        # fetchers reciben la misma caché para olvidar los items que dejan de sondear)
+        self.deltas = deltas if deltas is not None else DeltaCache()
 
     def _create_snmpers(self) -> Snmper:
         """
         Factory method to create a snmper with the specified configurations.
 
         Returns:
-            Snmper: A new snmper instance.
+            Snmper: A new snmper instance (AsyncSnmper on the asyncio engine, ProcessSnmper on
+                the process engine).
         """
-        return Snmper(self.logger, self.api_url, self.task_queue, self.response_queue, self.stop_event, self.interval)
+        if self.engine == SNMP_ENGINE_PROCESS:
+            return ProcessSnmper(self.logger, self.api_url, self.task_queue, self.response_queue, self.stop_event,
+                                 self.interval, num_workers=self.num_workers, max_inflight=self.max_inflight,
+                                 max_varbinds=self.max_varbinds, timeout_bounds=self.timeout_bounds,
+                                 max_retries=self.max_retries, rtt=self.rtt, breaker=self.breaker, deltas=self.deltas,
+                                 fast_get=self.fast_get)
+        if self.engine == SNMP_ENGINE_ASYNCIO:
+            return AsyncSnmper(self.logger, self.api_url, self.task_queue, self.response_queue, self.stop_event,
+                               self.interval, max_inflight=self.max_inflight, max_varbinds=self.max_varbinds,
+                               rtt=self.rtt, breaker=self.breaker, deltas=self.deltas, fast_get=self.fast_get)
+        return Snmper(self.logger, self.api_url, self.task_queue, self.response_queue, self.stop_event, self.interval,
+                      max_varbinds=self.max_varbinds, rtt=self.rtt, breaker=self.breaker, deltas=self.deltas,
+                      fast_get=self.fast_get)
 
     def start_snmpers(self) -> None:
         """
         Starts all the snmper threads.
 
-        This method initializes each snmper and starts them.
+        This method initializes each snmper and starts them. The asyncio engine runs a single
+        event loop thread; concurrency comes from max_inflight instead of the thread count.
+        The process engine runs a single dispatcher thread that feeds num_workers processes.
         """
-        self.logger.debug("Manager starting snmpers...")
-        for _ in range(self.num_snmpers):
+        self.logger.debug(f"Manager starting snmpers ({self.engine} engine)...")
+        num_snmpers = 1 if self.engine in (SNMP_ENGINE_ASYNCIO, SNMP_ENGINE_PROCESS) else self.num_snmpers
+        for _ in range(num_snmpers):
             snmper = self._create_snmpers()
             self.snmpers.append(snmper)
             snmper.start()
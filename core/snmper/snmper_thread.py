@@ -8,7 +8,8 @@ Univalle
 This script is the definition of the snmper thread. This module is responsible for
     get item from task_queue, make snmpget and put the result in response_queue
 """
-from time import sleep
+import asyncio
+from time import sleep, monotonic
 from queue import Queue, Empty
 from threading import Thread, Event, get_ident
 from typing import Optional, Dict, List
@@ -16,17 +17,44 @@ from typing import Optional, Dict, List
 from core.trapper.trap_manager import TrapManager
 
 from ..config.logger import CustomLogger
-from ..includes.defines import ITEMS_URL, METERINGS_URL
+from ..includes.defines import (
+    SNMP_MAX_VARBINDS, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_BACKOFF_BASE, CIRCUIT_BACKOFF_MAX, ICMP_MAX_INFLIGHT,
+)
 from ..misc.fetch_data import FetchData
-from ..checkers.snmp.snmpnumber import SNMPCustomNumber
+from ..checkers.snmp.snmpnumber import SNMPCustomNumber, VALUE_TYPE_DELTA
+from ..checkers.snmp.snmptable import SNMPTable
+from ..checkers.snmp.rtt import RttEstimator
+from ..checkers.snmp.delta import DeltaCache
+from ..checkers.icmp import PINGER
+from .circuit_breaker import CircuitBreaker, CIRCUIT_CLOSED
 from ..checkers.ping import Ping
-from ..misc.ItemInterface import ItemPut, ItemPutWithStatusCode, MeteringPut
+from ..misc.ItemInterface import ItemPutWithStatusCode
+from ..writer.writer_thread import (
+    make_record, RECORD_METERING, RECORD_LATEST, RECORD_FAILURE, RECORD_TABLE, RECORD_REACHABILITY,
+)
+from ..metrics.registry import REGISTRY
+from ..misc.poll_requests import POLL_REQUESTS
+
+SNMP_REQUESTS = REGISTRY.counter("core_snmp_requests_total",
+                                 "SNMP requests (one per host batch or table walk) by result.")
+SNMP_TIMEOUTS = REGISTRY.counter("core_snmp_timeouts_total",
+                                 "SNMP requests without answer (timeout or transport error) per host.")
+SNMP_DELTA_RESETS = REGISTRY.counter("core_snmp_delta_resets_total",
+                                     "Delta samples without a rate (baseline, agent restart or discontinuity).")
+SNMP_RESPONSE_TIME = REGISTRY.histogram("core_snmp_response_seconds", "Response time of successful SNMP polls.")
+ICMP_PROBES = REGISTRY.counter("core_icmp_probes_total",
+                               "ICMP probe runs (one per host and cycle, shared by its items) by result.")
+
+
+# Tipos de item consultados con SNMP GET (agrupados por host)
+SNMP_GET_TYPES = (1, VALUE_TYPE_DELTA)
 
 
 class Snmper(Thread):
     """
     Class representing a snmper thread. This thread gets items from task_queue,
-    makes SNMP GET requests and puts the results in response_queue.
+    makes SNMP GET requests and puts the results in response_queue, where the
+    writer threads (core/writer) batch them into bulk API calls.
     """
 
     def __init__(
@@ -36,7 +64,12 @@ class Snmper(Thread):
         task_queue: Queue,
         response_queue: Queue,
         stop_event: Event,
-        interval: float = 0.001
+        interval: float = 0.001,
+        max_varbinds: int = SNMP_MAX_VARBINDS,
+        rtt: Optional[RttEstimator] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        deltas: Optional[DeltaCache] = None,
+        fast_get: bool = False
     ) -> None:
         """
         Initializes the snmper thread.
@@ -48,6 +81,11 @@ class Snmper(Thread):
             response_queue (Queue): Queue where SNMP results are placed.
             stop_event (Event): Event signaling when to stop the thread.
             interval (float): Minimal sleep interval between iterations. Default is 0.001s.
+            max_varbinds (int): Maximum varbinds per GET when batching items of the same host.
+            rtt (Optional[RttEstimator]): Shared per-host RTT estimator for adaptive timeouts.
+            breaker (Optional[CircuitBreaker]): Shared per-host circuit breaker.
+            deltas (Optional[DeltaCache]): Shared previous samples of Delta (tipo 5) items.
+            fast_get (bool): Send numeric v2c GETs over the raw UDP fast path (pysnmp fallback).
         """
         super().__init__()
         self.api_url = api_url
@@ -58,6 +96,17 @@ class Snmper(Thread):
         self.logger = logger
         self.thread_id: Optional[int] = None
         self.trap_manager = TrapManager(logger)
+        self.max_varbinds = max(1, max_varbinds)
+        self.rtt = rtt if rtt is not None else RttEstimator()
+        self.breaker = breaker if breaker is not None else CircuitBreaker(
+            CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_BACKOFF_BASE, CIRCUIT_BACKOFF_MAX)
+        self.deltas = deltas if deltas is not None else DeltaCache()
+        self.fast_get = fast_get
+        # Loop propio (hilo aparte) para los pings del motor de hilos: un host que no responde
+        # no detiene los GET SNMP de este snmper.
+        self.icmp_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.icmp_thread: Optional[Thread] = None
+        self.icmp_slots: Optional[asyncio.Semaphore] = None
     def _data_serialize(self, task_queue: Queue) -> Dict:
         """
         Retrieves and formats the next item from the task_queue.
@@ -70,20 +119,76 @@ class Snmper(Thread):
         """
         # self.logger.debug(f"[Snmper-{self.thread_id}] Waiting for data in queue...")
         raw = task_queue.get(timeout=1)
+        return self._format_item(raw)
+
+    def _next_items(self, limit: int) -> List[Dict]:
+        """
+        Waits for the next item and drains up to limit items already queued, so items of the
+        same host that fell due together can share one GET.
+
+        Raises:
+            Empty: If no item arrived within the timeout.
+        """
+        items: List[Dict] = [self._data_serialize(self.task_queue)]
+        while len(items) < limit:
+            try:
+                items.append(self._format_item(self.task_queue.get_nowait()))
+            except Empty:
+                break
+        return items
+
+    def _snmp_batches(self, items: List[Dict]) -> List[List[Dict]]:
+        """
+        Groups SNMP items by (host, port, community) and splits each group into GET-sized chunks.
+        """
+        groups: Dict[tuple, List[Dict]] = {}
+        for item in items:
+            groups.setdefault(SNMPCustomNumber.batch_key(item), []).append(item)
+        batches: List[List[Dict]] = []
+        for group in groups.values():
+            batches.extend(SNMPCustomNumber.chunk_items(group, self.max_varbinds))
+        return batches
+
+    @staticmethod
+    def _icmp_groups(items: List[Dict]) -> List[List[Dict]]:
+        """
+        Groups the ICMP items of a cycle by host, so each host gets a single probe run.
+        """
+        groups: Dict[str, List[Dict]] = {}
+        for item in items:
+            if item.get("value_type") == 2:
+                groups.setdefault(item['host'], []).append(item)
+        return list(groups.values())
+
+    def _format_item(self, raw: Dict) -> Dict:
+        """
+        Formats a raw task_queue payload for the checker of its item type.
+
+        Args:
+            raw (Dict): Payload built by the fetcher.
+
+        Returns:
+            Dict: Formatted data dict for the checker.
+        """
         self.logger.debug(f"[Snmper-{self.thread_id}] Items data: {raw}")
         data_formated: Dict ={}
-        if raw["tipo"]==1 or raw['tipo']==3: #SNMP
+        if raw["tipo"] in (1, 3, 4, 5): #SNMP, Trap, Tabla SNMP, Delta
             data_formated= FetchData.serializer_snmp(raw)
         elif raw["tipo"]==2: #ICMP
             data_formated= FetchData.serializer_icmp(raw)
+        if raw.get("requests"): #Consultas a pedido (canal de control)
+            data_formated["requests"] = raw["requests"]
+        if raw.get("refresh"): #Cambió el host u OID: invalidar objetos pysnmp cacheados (anteriores y actuales)
+            data_formated["refresh"] = raw["refresh"]
+            self.deltas.forget(int(raw["id"])) #La muestra anterior es de otro contador: no se compara
         # self.logger.debug(f"[Snmper-{self.thread_id}] Serialized data: {snmp_data_formated}")
         return data_formated
 
     def run(self) -> None:
         """
         Main snmper thread loop:
-          - Fetch and format items from task_queue.
-          - Execute SNMP GET and wait for response.
+          - Fetch and format items from task_queue (draining items that are already queued).
+          - Execute one SNMP GET per host batch and wait for the response.
           - Update item data via API and post metering if successful.
         Loop exits when stop_event is set.
         """
@@ -92,62 +197,28 @@ class Snmper(Thread):
 
         while not self.stop_event.is_set():
             try:
-                item_formated = self._data_serialize(self.task_queue)
+                items_formated = self._next_items(self.max_varbinds)
             except Empty:
                 continue
             # self.logger.debug(f"[Snmper-{self.thread_id}] Sending SNMP request for item {item_formatted.get('itemid')}")
-            if item_formated["value_type"]==1: ## SNMP
-                snmp_response: Dict = SNMPCustomNumber.get_data(item_formated)
-                if "error" not in snmp_response  and "channel" in snmp_response and snmp_response["channel"][0]["value"] is not None:
-                    item_id = int(snmp_response.get("itemid", 0))
-                    value = snmp_response["channel"][0]["value"]
-                    latencia_v = snmp_response["channel"][1]["value"] #Added
-                    data_item = ItemPut(id=item_id, latest_data=value)
-                    data_item_metering = MeteringPut(id=item_id, latest_data=value, latencia=latencia_v)
-                    self.logger.debug(f"[Snmper-{self.thread_id}] SNMP result for item {item_id}: {value}")
-
-                    response_put: Optional[Dict] = FetchData.put_item(ITEMS_URL, data=data_item)
-                    # Latency added
-                    response_post: Optional[Dict] = FetchData.post_metering(METERINGS_URL, data=data_item_metering)
-
-                    if response_put and response_post:
-                        self.logger.info(f"[Snmper-{self.thread_id}] Successfully inserted data for item ID {item_id}.")
-                    else:
-                        self.logger.error(
-                            f"[Snmper-{self.thread_id}] Failed to insert data for item ID {item_id}. "
-                            f"PUT response: {response_put}, POST response: {response_post}"
-                        )
-                else:
-                    data = {
-                        'itemid':snmp_response['itemid'],
-                        'ip':item_formated['host'],
-                        'oid':item_formated['oid'],
-                        'mensaje':'No se recibió respuesta SNMP antes de que se agotara el tiempo de espera.',
-                        'valor':'',
-                    }
-
-                    # dirty trick(Change new versions)
-                    data_item = ItemPut(id=snmp_response['itemid'], latest_data=0)
-                    response_put: Optional[Dict] = FetchData.put_item(ITEMS_URL, data=data_item)
-
-                    # Need migrate db
-                    # data_item = ItemPutWithStatusCode(id=snmp_response['itemid'], status_codes=456)
-                    # response_put: Optional[Dict] = FetchData.put_item_status_code(ITEMS_URL, data=data_item)
-                    
-                    response_post_snmp_failed: Optional[Dict] =  FetchData.post_snmp_failures('https://mwinsight-backend.onrender.com/api/v1/meterings/falla',data)
-                    self.logger.error(
-                        f"[Snmper-{self.thread_id}] SNMP error for item {snmp_response['itemid']}: {snmp_response['channel'][0].get('error')}"
-                    )
-
-            elif item_formated["value_type"]==2: ## ICMP
-                ping_response: Dict = Ping.get_data(item_formated)
-                if "error" in ping_response:
-                    ## Insert in table for alerts.
-                    print("generar alerta")
-                else:
-                    print("insertar en item ok!")
-            elif item_formated["value_type"]==3: ##Trap
-                self.handle_trap(item_formated)
+            snmp_items = [item for item in items_formated if item.get("value_type") in SNMP_GET_TYPES] ## SNMP, Delta
+            for batch in self._snmp_batches(snmp_items):
+                if not self._admit(batch):
+                    continue
+                snmp_responses: List[Dict] = SNMPCustomNumber.get_data_batch(batch, rtt=self.rtt, fast=self.fast_get)
+                if not self._track_host(batch[0], snmp_responses):
+                    continue
+                for item_formated, snmp_response in zip(batch, snmp_responses):
+                    self._process_snmp_response(item_formated, snmp_response)
+            for icmp_items in self._icmp_groups(items_formated): ## ICMP: una ronda por host, en el loop de pings
+                asyncio.run_coroutine_threadsafe(self._probe_icmp_slot(icmp_items), self._icmp_loop())
+            for item_formated in items_formated:
+                if item_formated.get("value_type")==3: ##Trap
+                    self.handle_trap(item_formated)
+                elif item_formated.get("value_type")==4 and self._admit([item_formated]): ##Tabla SNMP
+                    table_response: Dict = SNMPTable.get_data(item_formated, rtt=self.rtt)
+                    if self._track_host(item_formated, [table_response]):
+                        self._process_table_response(item_formated, table_response)
             # try:
             #     ping_response: Dict = self.response_queue.get(timeout=1)
             # except Empty:
@@ -156,8 +227,270 @@ class Snmper(Thread):
 
             sleep(self.interval)
 
+        self._stop_icmp_loop()
         self.logger.info(f"[Snmper-{self.thread_id}] Thread exiting.")
 
+    def _icmp_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Event loop (started on first use in its own daemon thread) where this snmper runs its
+        ICMP probes as tasks, at most ICMP_MAX_INFLIGHT hosts at once.
+        """
+        if self.icmp_loop is None:
+            self.icmp_loop = asyncio.new_event_loop()
+            self.icmp_slots = asyncio.Semaphore(ICMP_MAX_INFLIGHT)
+            self.icmp_thread = Thread(target=self._run_icmp_loop, name="snmper-icmp", daemon=True)
+            self.icmp_thread.start()
+        return self.icmp_loop
+
+    def _run_icmp_loop(self) -> None:
+        asyncio.set_event_loop(self.icmp_loop)
+        try:
+            self.icmp_loop.run_forever()
+        finally:
+            self.icmp_loop.run_until_complete(self._release_icmp())
+            self.icmp_loop.close()
+
+    async def _release_icmp(self) -> None:
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        PINGER.release()
+
+    def _stop_icmp_loop(self) -> None:
+        if self.icmp_loop is not None and self.icmp_thread is not None:
+            self.icmp_loop.call_soon_threadsafe(self.icmp_loop.stop)
+            self.icmp_thread.join(timeout=5)
+
+    async def _probe_icmp_slot(self, icmp_items: List[Dict]) -> None:
+        async with self.icmp_slots:
+            await self._probe_icmp(icmp_items)
+
+    async def _probe_icmp(self, icmp_items: List[Dict]) -> None:
+        """
+        Probes one host once for all its ICMP items and hands the result to the result handler.
+        """
+        try:
+            ping_response: Dict = await Ping.get_data_host_async(icmp_items)
+            self._process_icmp_response(icmp_items, ping_response)
+        except Exception as e:
+            self.logger.error(f"[Snmper-{self.thread_id}] Error probing {icmp_items[0].get('host')}: {e}")
+
+    @staticmethod
+    def _unreachable(snmp_response: Dict) -> bool:
+        """
+        True if the host did not answer (timeout or other transport error indication).
+        Error statuses (noSuchName, ...) come from a live agent and do not count.
+        """
+        error = snmp_response['channel'][0].get('error') if snmp_response.get('channel') else snmp_response.get('message')
+        return bool(error) and str(error).startswith("SNMP error indication")
+
+    def _admit(self, batch: List[Dict]) -> bool:
+        """
+        Checks the circuit breaker of the batch host. Items of an open host are dropped
+        without network traffic or API calls; the fetcher schedules them again.
+        """
+        if self.breaker.allow(batch[0]['host']):
+            return True
+        for item_formated in batch:
+            self._answer(item_formated, error="Host circuit open: the host is not answering SNMP.")
+        self.logger.debug(
+            f"[Snmper-{self.thread_id}] Host {batch[0]['host']} circuit open, skipping {len(batch)} item(s)."
+        )
+        return False
+
+    def _track_host(self, item_formated: Dict, snmp_responses: List[Dict]) -> bool:
+        """
+        Feeds the circuit breaker with the outcome of one request to a host.
+
+        Returns:
+            bool: True if the per-item results must be stored. While the host is open only the
+                synthetic "host unreachable" failure is recorded.
+        """
+        host = item_formated['host']
+        if snmp_responses and all(self._unreachable(response) for response in snmp_responses):
+            SNMP_REQUESTS.inc(result="unreachable")
+            SNMP_TIMEOUTS.inc(host=host)
+            if self.breaker.record_failure(host):
+                self._report_host_unreachable(item_formated)
+                return False
+            return self.breaker.state(host) == CIRCUIT_CLOSED
+        SNMP_REQUESTS.inc(result="answered")
+        if self.breaker.record_success(host):
+            self.logger.info(f"[Snmper-{self.thread_id}] Host {host} is reachable again, circuit closed.")
+        return True
+
+    def _report_host_unreachable(self, item_formated: Dict) -> None:
+        """
+        Records a single failure for a host whose circuit just opened.
+        """
+        self.response_queue.put(make_record(
+            RECORD_FAILURE,
+            itemid=item_formated['itemid'],
+            ip=item_formated['host'],
+            oid=item_formated['oid'],
+            mensaje=(f"Host inalcanzable: {self.breaker.threshold} consultas SNMP sin respuesta. "
+                     f"Se suspende el sondeo de sus items hasta que responda."),
+            valor='',
+        ))
+        self.logger.warning(
+            f"[Snmper-{self.thread_id}] Host {item_formated['host']} unreachable, circuit opened "
+            f"(next probe in {self.breaker.base_backoff:.0f}s)."
+        )
+
+    def _process_snmp_response(self, item_formated: Dict, snmp_response: Dict) -> None:
+        """
+        Hands the result of an SNMP GET to the writers: latest_data and a metering on success,
+        or the failure.
+
+        Args:
+            item_formated (Dict): Formatted item that was polled.
+            snmp_response (Dict): Result returned by SNMPCustomNumber.
+        """
+        if "error" not in snmp_response  and "channel" in snmp_response and snmp_response["channel"][0]["value"] is not None:
+            item_id = int(snmp_response.get("itemid", 0))
+            value = snmp_response["channel"][0]["value"]
+            if item_formated.get("value_type") == VALUE_TYPE_DELTA:
+                value = self._delta_rate(item_formated, snmp_response)
+                if value is None:
+                    self._answer(item_formated, value=None, raw=snmp_response["channel"][0]["value"],
+                                 message="Delta baseline stored, the rate is available from the next poll.")
+                    return
+            latencia_v = snmp_response["channel"][1]["value"] #Added
+            SNMP_RESPONSE_TIME.observe(latencia_v / 1000)
+            self.logger.debug(f"[Snmper-{self.thread_id}] SNMP result for item {item_id}: {value}")
+            self._answer(item_formated, value=value, latencia=latencia_v)
+            self.response_queue.put(make_record(RECORD_LATEST, itemid=item_id, latest_data=value))
+            # Latency added
+            self.response_queue.put(make_record(RECORD_METERING, itemid=item_id, valor=value, latencia=latencia_v))
+        else:
+            self._process_snmp_failure(item_formated, snmp_response)
+
+    @staticmethod
+    def _answer(item_formated: Dict, **result) -> None:
+        """
+        Hands the result of an on-demand poll back to every control channel request waiting for it.
+        """
+        for request in item_formated.get("requests", ()):
+            POLL_REQUESTS.resolve(request, item_formated["itemid"], result)
+
+    def _delta_rate(self, item_formated: Dict, snmp_response: Dict) -> Optional[float]:
+        """
+        Turns the raw counter of a Delta item into a per-second rate (with the item factors).
+
+        Returns:
+            Optional[float]: The rate, or None when there is no previous sample to compare with
+                (first poll, agent restart or discontinuity); nothing is stored then.
+        """
+        item_id = int(snmp_response.get("itemid", 0))
+        channel = snmp_response["channel"][0]
+        rate = self.deltas.rate(item_id, channel["value"], monotonic(), snmp_response.get("uptime"),
+                                channel.get("bits"))
+        if rate is None:
+            SNMP_DELTA_RESETS.inc()
+            self.logger.debug(f"[Snmper-{self.thread_id}] Delta item {item_id}: new baseline, no rate yet")
+            return None
+        return rate * int(item_formated.get("multiplication") or 1) / int(item_formated.get("division") or 1)
+
+    def _process_table_response(self, item_formated: Dict, table_response: Dict) -> None:
+        """
+        Hands the result of a table walk to the writers: one metering per row and index, and
+        latest_data set to the number of rows; or the failure.
+
+        Args:
+            item_formated (Dict): Formatted item that was polled.
+            table_response (Dict): Result returned by SNMPTable.
+        """
+        if "error" in table_response or "rows" not in table_response:
+            self._process_snmp_failure(item_formated, table_response)
+            return
+        item_id = int(table_response.get("itemid", 0))
+        rows: List[Dict] = table_response["rows"]
+        latencia_v = table_response["channel"][1]["value"]
+        SNMP_RESPONSE_TIME.observe(latencia_v / 1000)
+        self.logger.debug(f"[Snmper-{self.thread_id}] Table result for item {item_id}: {len(rows)} rows")
+        self._answer(item_formated, value=len(rows), rows=rows, latencia=latencia_v)
+        self.response_queue.put(make_record(RECORD_LATEST, itemid=item_id, latest_data=len(rows)))
+        self.response_queue.put(make_record(RECORD_TABLE, itemid=item_id, rows=rows, latencia=latencia_v))
+
+    def _process_snmp_failure(self, item_formated: Dict, snmp_response: Dict) -> None:
+        """
+        Records a failed SNMP request: sets latest_data to 0 and posts the failure.
+        """
+        # dirty trick(Change new versions)
+        self.response_queue.put(make_record(RECORD_LATEST, itemid=snmp_response['itemid'], latest_data=0))
+
+        # Need migrate db
+        # data_item = ItemPutWithStatusCode(id=snmp_response['itemid'], status_codes=456)
+        # response_put: Optional[Dict] = FetchData.put_item_status_code(ITEMS_URL, data=data_item)
+
+        self.response_queue.put(make_record(
+            RECORD_FAILURE,
+            itemid=snmp_response['itemid'],
+            ip=item_formated['host'],
+            oid=item_formated['oid'],
+            mensaje='No se recibió respuesta SNMP antes de que se agotara el tiempo de espera.',
+            valor='',
+        ))
+        error = snmp_response['channel'][0].get('error') if snmp_response.get('channel') else snmp_response.get('message')
+        self._answer(item_formated, error=error)
+        self.logger.error(
+            f"[Snmper-{self.thread_id}] SNMP error for item {snmp_response['itemid']}: {error}"
+        )
+
+    def _process_icmp_response(self, icmp_items: List[Dict], ping_response: Dict) -> None:
+        """
+        Hands the result of the probe run of one host to the writers: one reachability history
+        row for the host and, for each of its items, latest_data and a metering with the average
+        RTT (ms). When the host did not answer, each item gets latest_data 0 and a failure record,
+        as in the SNMP path.
+
+        Args:
+            icmp_items (List[Dict]): Formatted ICMP items of the host that shared the probe.
+            ping_response (Dict): Result returned by Ping.get_data_host_async.
+        """
+        host = icmp_items[0]['host']
+        channels = {channel["name"]: channel["value"] for channel in ping_response.get("channel", [])}
+        reachable = "error" not in ping_response and channels.get("Ping Time Avg") is not None
+        ping_min, ping_avg, ping_max = (
+            round(channels[name], 3) if channels.get(name) is not None else None
+            for name in ("Ping Time Min", "Ping Time Avg", "Ping Time Max")
+        )
+        loss = channels.get("Packet Loss")
+        packet_loss = round(loss) if loss is not None else 100
+        ICMP_PROBES.inc(result="reachable" if reachable else "unreachable")
+        self.response_queue.put(make_record(
+            RECORD_REACHABILITY,
+            host_ip=host,
+            alcanzable=reachable,
+            ping_min=ping_min,
+            ping_avg=ping_avg,
+            ping_max=ping_max,
+            packet_loss=packet_loss,
+        ))
+        for item_formated in icmp_items:
+            item_id = int(item_formated['itemid'])
+            if reachable:
+                self._answer(item_formated, value=ping_avg, latencia=ping_avg, packet_loss=packet_loss)
+                self.response_queue.put(make_record(RECORD_LATEST, itemid=item_id, latest_data=ping_avg))
+                self.response_queue.put(make_record(RECORD_METERING, itemid=item_id, valor=ping_avg, latencia=ping_avg))
+            else:
+                self._answer(item_formated, error=ping_response.get("message"), packet_loss=packet_loss)
+                self.response_queue.put(make_record(RECORD_LATEST, itemid=item_id, latest_data=0))
+                self.response_queue.put(make_record(
+                    RECORD_FAILURE,
+                    itemid=item_id,
+                    ip=host,
+                    oid=item_formated.get('oid') or '',
+                    mensaje=f"Sin respuesta ICMP: {packet_loss}% de paquetes perdidos.",
+                    valor='',
+                ))
+        if reachable:
+            self.logger.debug(f"[Snmper-{self.thread_id}] ICMP {host}: avg {ping_avg} ms, loss {packet_loss}% "
+                              f"({len(icmp_items)} item(s))")
+        else:
+            self.logger.warning(f"[Snmper-{self.thread_id}] ICMP {host} not reachable: {ping_response.get('message')}")
+
     def stop(self) -> None:
         """
         Stops the snmper thread by setting the stop event.
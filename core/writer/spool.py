@@ -0,0 +1,225 @@
+"""
+spool.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script defines the on-disk spool used by the writers when the API is unreachable, and
+the thread that replays it. The spool is an append-only SQLite table in WAL mode: each entry
+is one failed batch, so a crash never leaves a half-written batch and replay keeps the
+original batch size. The spool is bounded; when full, the oldest entries are dropped.
+A batch that keeps failing (the API answers but never accepts it) is moved to a dead-letter
+table after a few attempts, so it cannot block the entries behind it.
+"""
+import json
+import os
+import sqlite3
+from time import time
+from threading import Thread, Event, Lock, get_ident
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config.logger import CustomLogger
+from ..includes.defines import SPOOL_MAX_ROWS, SPOOL_REPLAY_RATE, SPOOL_REPLAY_BATCH, SPOOL_MAX_ATTEMPTS
+
+
+class ResultSpool:
+    """
+    Append-only, crash-safe FIFO of result batches.
+
+    Attributes:
+        max_rows (int): Maximum rows kept; older batches are dropped beyond it.
+        dropped (int): Rows dropped because the spool was full.
+
+    Entries moved out by dead_letter() are kept in the spool_dead table of the same file for
+    inspection; they are not replayed.
+    """
+
+    def __init__(self, path: str, max_rows: int = SPOOL_MAX_ROWS) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_rows = max_rows
+        self.dropped = 0
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " kind TEXT NOT NULL,"
+            " rows INTEGER NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(spool)")}
+        if "attempts" not in columns:  # Spool creado por una versión anterior
+            self._conn.execute("ALTER TABLE spool ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool_dead ("
+            " id INTEGER PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " rows INTEGER NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " attempts INTEGER NOT NULL,"
+            " failed REAL NOT NULL)"
+        )
+        self._rows = self._conn.execute("SELECT COALESCE(SUM(rows), 0) FROM spool").fetchone()[0]
+
+    def append(self, kind: str, rows: List[Dict]) -> None:
+        """
+        Stores one batch (a single transaction) and enforces the size bound.
+        """
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO spool (kind, rows, payload, created) VALUES (?, ?, ?, ?)",
+                    (kind, len(rows), json.dumps(rows, default=str), time()),
+                )
+                self._rows += len(rows)
+                while self._rows > self.max_rows:
+                    oldest = self._conn.execute("SELECT id, rows FROM spool ORDER BY id LIMIT 1").fetchone()
+                    if oldest is None:
+                        break
+                    self._conn.execute("DELETE FROM spool WHERE id = ?", (oldest[0],))
+                    self._rows -= oldest[1]
+                    self.dropped += oldest[1]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def peek(self, limit: int = 1) -> List[Tuple[int, str, List[Dict]]]:
+        """
+        Returns:
+            List[Tuple[int, str, List[Dict]]]: Oldest (id, kind, rows) entries, without removing them.
+        """
+        with self._lock:
+            entries = self._conn.execute(
+                "SELECT id, kind, payload FROM spool ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(entry_id, kind, json.loads(payload)) for entry_id, kind, payload in entries]
+
+    def ack(self, entry_id: int) -> None:
+        """Removes an entry once it has been delivered."""
+        with self._lock:
+            row = self._conn.execute("SELECT rows FROM spool WHERE id = ?", (entry_id,)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM spool WHERE id = ?", (entry_id,))
+                self._rows -= row[0]
+
+    def failed(self, entry_id: int) -> int:
+        """
+        Records a failed delivery of an entry.
+
+        Returns:
+            int: Failed deliveries of the entry so far (0 if it is no longer spooled).
+        """
+        with self._lock:
+            self._conn.execute("UPDATE spool SET attempts = attempts + 1 WHERE id = ?", (entry_id,))
+            row = self._conn.execute("SELECT attempts FROM spool WHERE id = ?", (entry_id,)).fetchone()
+        return row[0] if row is not None else 0
+
+    def dead_letter(self, entry_id: int) -> None:
+        """Moves an entry that keeps failing to the spool_dead table (one transaction)."""
+        with self._lock:
+            row = self._conn.execute("SELECT rows FROM spool WHERE id = ?", (entry_id,)).fetchone()
+            if row is None:
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO spool_dead (id, kind, rows, payload, created, attempts, failed)"
+                    " SELECT id, kind, rows, payload, created, attempts, ? FROM spool WHERE id = ?",
+                    (time(), entry_id),
+                )
+                self._conn.execute("DELETE FROM spool WHERE id = ?", (entry_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._rows -= row[0]
+
+    def backlog(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: Pending entries and rows, rows dropped so far, and dead-lettered rows.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+            dead = self._conn.execute("SELECT COALESCE(SUM(rows), 0) FROM spool_dead").fetchone()[0]
+            return {"entries": entries, "rows": self._rows, "dropped": self.dropped, "dead": dead}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SpoolReplayer(Thread):
+    """
+    Thread that replays the spool oldest first, at most rate rows per second. A failed
+    delivery leaves the entry in place and backs off until the API answers again; after
+    max_attempts failures the entry is dead-lettered and replay goes on with the next one.
+    """
+
+    def __init__(self, logger: CustomLogger, spool: ResultSpool, send: Callable[[str, List[Dict]], bool],
+                 stop_event: Event, rate: float = SPOOL_REPLAY_RATE, batch: int = SPOOL_REPLAY_BATCH,
+                 max_attempts: int = SPOOL_MAX_ATTEMPTS) -> None:
+        """
+        Args:
+            logger (CustomLogger): Custom logger instance for logging events.
+            spool (ResultSpool): Spool to replay.
+            send (Callable[[str, List[Dict]], bool]): Delivers (kind, rows); True on success.
+            stop_event (Event): Event signaling when to stop the thread.
+            rate (float): Maximum rows replayed per second.
+            batch (int): Entries read from the spool per round.
+            max_attempts (int): Failed deliveries of one entry before it is dead-lettered.
+        """
+        super().__init__(daemon=True)
+        self.logger = logger
+        self.spool = spool
+        self.send = send
+        self.stop_event = stop_event
+        self.rate = max(1.0, rate)
+        self.batch = max(1, batch)
+        self.max_attempts = max(1, max_attempts)
+        self.thread_id: Optional[int] = None
+
+    def run(self) -> None:
+        self.thread_id = get_ident()
+        backoff = 1.0
+        while not self.stop_event.is_set():
+            entries = self.spool.peek(self.batch)
+            if not entries:
+                self.stop_event.wait(5)
+                continue
+            for entry_id, kind, rows in entries:
+                if self.stop_event.is_set():
+                    break
+                if not self.send(kind, rows):
+                    if self.spool.failed(entry_id) >= self.max_attempts:
+                        self.spool.dead_letter(entry_id)
+                        self.logger.error(
+                            f"[Spool-{self.thread_id}] {len(rows)} {kind} rows failed {self.max_attempts} replays, "
+                            f"moved to the dead-letter table."
+                        )
+                        continue
+                    self.logger.warning(
+                        f"[Spool-{self.thread_id}] Replay failed, {self.spool.backlog()['rows']} rows pending. "
+                        f"Retrying in {backoff:.0f}s."
+                    )
+                    self.stop_event.wait(backoff)
+                    backoff = min(60.0, backoff * 2)
+                    break
+                backoff = 1.0
+                self.spool.ack(entry_id)
+                self.logger.debug(f"[Spool-{self.thread_id}] Replayed {len(rows)} {kind} rows.")
+                # Límite de velocidad: no saturar la API recién recuperada
+                self.stop_event.wait(len(rows) / self.rate)
@@ -0,0 +1,111 @@
+"""
+writer_manager.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script defines the WriterManager class, which is responsible for managing the result
+writer threads that persist snmper results from response_snmp_queue, and the local spool
+(with its replay thread) they fall back to when the API is unreachable.
+"""
+from typing import Dict, List, Optional
+from queue import Queue
+from threading import Event
+from .writer_thread import ResultWriter
+from .spool import ResultSpool, SpoolReplayer
+from ..config.logger import CustomLogger
+from ..includes.defines import WRITER_BATCH_SIZE, WRITER_FLUSH_INTERVAL, SPOOL_MAX_ROWS, SPOOL_REPLAY_RATE
+
+
+class WriterManager:
+    """
+    Class responsible for managing multiple writer threads. It starts, stops,
+    and monitors writers, checking their status and letting them finish if necessary.
+    """
+
+    def __init__(self, logger: CustomLogger, response_queue: Queue, stop_event: Event, num_writers: int = 1,
+                 batch_size: int = WRITER_BATCH_SIZE, flush_interval: float = WRITER_FLUSH_INTERVAL,
+                 spool_path: Optional[str] = None, spool_max_rows: int = SPOOL_MAX_ROWS,
+                 replay_rate: float = SPOOL_REPLAY_RATE) -> None:
+        self.logger = logger
+        self.response_queue = response_queue
+        self.stop_event = stop_event
+        self.num_writers = num_writers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.writers: List[ResultWriter] = []
+        self.spool: Optional[ResultSpool] = ResultSpool(spool_path, spool_max_rows) if spool_path else None
+        self.replay_rate = replay_rate
+        # El replayer tiene su propio evento: debe seguir vivo mientras los writers vacían la cola
+        self.replay_stop = Event()
+        self.replayer: Optional[SpoolReplayer] = None
+
+    def _create_writers(self) -> ResultWriter:
+        """
+        Factory method to create a writer with the specified configurations.
+
+        Returns:
+            ResultWriter: A new writer instance.
+        """
+        return ResultWriter(self.logger, self.response_queue, self.stop_event, self.batch_size, self.flush_interval,
+                            self.spool)
+
+    def start_writers(self) -> None:
+        """
+        Starts all the writer threads, and the spool replayer if the spool is enabled.
+        """
+        self.logger.debug("Manager starting writers...")
+        for _ in range(self.num_writers):
+            writer = self._create_writers()
+            self.writers.append(writer)
+            writer.start()
+        if self.spool is not None and self.writers:
+            backlog = self.spool.backlog()
+            if backlog["rows"]:
+                self.logger.warning(f"Spool has {backlog['rows']} rows pending from a previous run, replaying.")
+            self.replayer = SpoolReplayer(self.logger, self.spool, self.writers[0].send, self.replay_stop,
+                                          rate=self.replay_rate)
+            self.replayer.start()
+
+    def stop_writers(self) -> None:
+        """
+        Stops all the writer threads.
+
+        Writers flush whatever is left in response_queue before exiting, so this should be
+        called after the snmpers have stopped. Rows still spooled stay on disk for the next run.
+        """
+        self.stop_event.set()
+        for writer in self.writers:
+            writer.join(timeout=30)
+            if writer.is_alive():
+                self.logger.warning(f"Writer-{writer.thread_id} did not finish flushing in time.")
+            else:
+                self.logger.debug(f"Writer-{writer.thread_id} stopped")
+        self.replay_stop.set()
+        if self.replayer is not None:
+            self.replayer.join(timeout=10)
+        if self.spool is not None:
+            backlog = self.spool.backlog()
+            if backlog["rows"]:
+                self.logger.warning(f"{backlog['rows']} rows left in the spool ({self.spool.path}).")
+            if self.replayer is None or not self.replayer.is_alive():
+                self.spool.close()
+        self.logger.debug("All writers have been stopped.")
+
+    def spool_backlog(self) -> Optional[Dict[str, int]]:
+        """
+        Returns:
+            Optional[Dict[str, int]]: Spool backlog (entries, rows, dropped), None if disabled.
+        """
+        return self.spool.backlog() if self.spool is not None else None
+
+    @property
+    def all_writers_alive(self) -> bool:
+        """
+        Checks if all writer threads are currently alive.
+
+        Returns:
+            bool: True if all are alive, False otherwise.
+        """
+        return all(writer.is_alive() for writer in self.writers)
@@ -0,0 +1,307 @@
+"""
+writer_thread.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+This script is the definition of the result writer thread. Snmpers only put result records
+in response_queue; writers collect them into batches (by size or time window) and persist
+each batch with one bulk call per record type, so polling never waits on the API. When the
+API is unreachable, meterings, failures and table walks go to the local spool (spool.py) and
+are replayed later; latest values are not spooled since the next poll supersedes them.
+"""
+from time import monotonic
+from datetime import datetime
+from queue import Queue, Empty
+from threading import Thread, Event, get_ident
+from typing import Any, Dict, List, Optional
+
+from ..config.logger import CustomLogger
+from ..includes.defines import (
+    ITEMS_URL, METERINGS_URL, METERINGS_BULK_URL, ITEMS_LATEST_URL, TABLE_METERINGS_URL, FAILURES_URL,
+    REACHABILITY_BULK_URL,
+    WRITER_BATCH_SIZE, WRITER_FLUSH_INTERVAL,
+)
+from ..misc.fetch_data import FetchData
+from ..misc.ItemInterface import ItemPut, MeteringPut
+from ..metrics.registry import REGISTRY
+from .spool import ResultSpool
+
+# Record types placed in response_queue
+RECORD_METERING = "metering"  # {itemid, valor, latencia, tiempo}
+RECORD_LATEST = "latest"  # {itemid, latest_data, ts}
+RECORD_FAILURE = "failure"  # {itemid, ip, oid, mensaje, valor}
+RECORD_TABLE = "table"  # {itemid, rows, latencia}
+RECORD_REACHABILITY = "reachability"  # {host_ip, alcanzable, ping_min, ping_avg, ping_max, packet_loss, tiempo}
+
+REACHABILITY_FIELDS = ("host_ip", "alcanzable", "ping_min", "ping_avg", "ping_max", "packet_loss", "tiempo")
+
+# Backend sin el endpoint bulk todavía
+HTTP_UNSUPPORTED = (404, 405)
+
+WRITER_BATCH = REGISTRY.histogram("core_writer_batch_records", "Records per writer flush.",
+                                  buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000))
+WRITER_FLUSH_TIME = REGISTRY.histogram("core_writer_flush_seconds", "Time spent persisting one writer batch.")
+WRITER_SPOOLED = REGISTRY.counter("core_writer_spooled_rows_total", "Rows the API did not take, by record type.")
+
+
+def make_record(record_type: str, **fields: Any) -> Dict[str, Any]:
+    """
+    Builds a response_queue record stamped with the poll time.
+    """
+    record: Dict[str, Any] = {"type": record_type, "tiempo": datetime.now().isoformat(timespec="milliseconds")}
+    record.update(fields)
+    return record
+
+
+class ResultWriter(Thread):
+    """
+    Class representing a writer thread. Drains response_queue and flushes batches of
+    meterings and latest values with bulk API calls.
+    """
+
+    def __init__(
+        self,
+        logger: CustomLogger,
+        response_queue: Queue,
+        stop_event: Event,
+        batch_size: int = WRITER_BATCH_SIZE,
+        flush_interval: float = WRITER_FLUSH_INTERVAL,
+        spool: Optional[ResultSpool] = None
+    ) -> None:
+        """
+        Initializes the writer thread.
+
+        Args:
+            logger (CustomLogger): Custom logger instance for logging events.
+            response_queue (Queue): Queue where snmpers place result records.
+            stop_event (Event): Event signaling when to stop the thread.
+            batch_size (int): Records that trigger a flush.
+            flush_interval (float): Max seconds the oldest record waits before a flush.
+            spool (Optional[ResultSpool]): Local spool for batches the API could not take.
+        """
+        super().__init__()
+        self.logger = logger
+        self.response_queue = response_queue
+        self.stop_event = stop_event
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.spool = spool
+        self.thread_id: Optional[int] = None
+        # Se desactiva si el backend todavía no expone el endpoint bulk (404/405)
+        self.bulk_meterings = True
+        self.bulk_latest = True
+        self.bulk_reachability = True
+
+    def run(self) -> None:
+        """
+        Main writer loop: collect records until the batch is full or the window expires,
+        then flush. Remaining records are flushed when stop_event is set.
+        """
+        self.thread_id = get_ident()
+        self.logger.info(f"[Writer-{self.thread_id}] Thread started.")
+        batch: List[Dict] = []
+        deadline: float = 0.0
+        while not self.stop_event.is_set() or not self.response_queue.empty():
+            timeout: float = self.flush_interval if not batch else max(0.0, deadline - monotonic())
+            try:
+                record: Dict = self.response_queue.get(timeout=timeout)
+                if not batch:
+                    deadline = monotonic() + self.flush_interval
+                batch.append(record)
+            except Empty:
+                pass
+            if batch and (len(batch) >= self.batch_size or monotonic() >= deadline):
+                self._timed_flush(batch)
+                batch = []
+        if batch:
+            self._timed_flush(batch)
+        self.logger.info(f"[Writer-{self.thread_id}] Thread exiting.")
+
+    def _timed_flush(self, batch: List[Dict]) -> None:
+        started = monotonic()
+        self.flush(batch)
+        WRITER_BATCH.observe(len(batch))
+        WRITER_FLUSH_TIME.observe(monotonic() - started)
+
+    def flush(self, batch: List[Dict]) -> None:
+        """
+        Persists a batch: one bulk call for meterings, one for latest values (last value per
+        item wins), one for reachability history rows, and per-record calls for failures and
+        table walks. Whatever the API does not accept is spooled.
+        """
+        meterings: List[Dict] = []
+        latest: Dict[int, Dict] = {}
+        failures: List[Dict] = []
+        tables: List[Dict] = []
+        reachability: List[Dict] = []
+        for record in batch:
+            record_type = record.get("type")
+            try:
+                if record_type == RECORD_METERING:
+                    meterings.append({"itemid": record["itemid"], "valor": record["valor"],
+                                      "latencia": record["latencia"], "tiempo": record["tiempo"]})
+                elif record_type == RECORD_LATEST:
+                    latest[record["itemid"]] = {"id": record["itemid"], "latest_data": record["latest_data"],
+                                                "ts": record["tiempo"]}
+                elif record_type == RECORD_FAILURE:
+                    failures.append(record)
+                elif record_type == RECORD_TABLE:
+                    tables.append(record)
+                elif record_type == RECORD_REACHABILITY:
+                    reachability.append({field: record[field] for field in REACHABILITY_FIELDS})
+                else:
+                    self.logger.warning(f"[Writer-{self.thread_id}] Unknown record type: {record_type}")
+            except Exception as e:
+                self.logger.error(f"[Writer-{self.thread_id}] Error writing {record_type} record: {e}")
+        if meterings:
+            self._spool(RECORD_METERING, self._write_meterings(meterings))
+        if latest and not self._write_latest(list(latest.values())):
+            self.logger.error(f"[Writer-{self.thread_id}] {len(latest)} latest values not updated.")
+        if reachability and not self._write_reachability(reachability):
+            self._spool(RECORD_REACHABILITY, reachability)
+        if failures:
+            self._spool(RECORD_FAILURE, self._write_records(RECORD_FAILURE, failures))
+        if tables:
+            self._spool(RECORD_TABLE, self._write_records(RECORD_TABLE, tables))
+
+    def send(self, record_type: str, rows: List[Dict]) -> bool:
+        """
+        Delivers rows of one record type (used by the spool replayer).
+
+        Returns:
+            bool: True if the API accepted every row.
+        """
+        if record_type == RECORD_METERING:
+            return not self._write_meterings(rows)
+        if record_type == RECORD_REACHABILITY:
+            return self._write_reachability(rows)
+        if record_type in (RECORD_FAILURE, RECORD_TABLE):
+            return not self._write_records(record_type, rows)
+        self.logger.warning(f"[Writer-{self.thread_id}] Unknown spooled record type: {record_type}")
+        return True
+
+    def _spool(self, record_type: str, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        WRITER_SPOOLED.inc(len(rows), type=record_type)
+        if self.spool is None:
+            self.logger.error(f"[Writer-{self.thread_id}] API unavailable, {len(rows)} {record_type} rows lost.")
+            return
+        try:
+            self.spool.append(record_type, rows)
+            self.logger.warning(f"[Writer-{self.thread_id}] API unavailable, spooled {len(rows)} {record_type} rows.")
+        except Exception as e:
+            self.logger.error(f"[Writer-{self.thread_id}] Could not spool {len(rows)} {record_type} rows: {e}")
+
+    def _write_meterings(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Posts meterings with one bulk call, or one by one (keeping each row's tiempo) if the
+        backend has no bulk endpoint.
+
+        Returns:
+            List[Dict]: Rows the API did not accept and may accept later. Rejected rows (4xx)
+            are dropped; after the first failed row-by-row post the rest are not attempted.
+        """
+        if self.bulk_meterings:
+            status, _ = FetchData.post_meterings_bulk(METERINGS_BULK_URL, rows)
+            if status in HTTP_UNSUPPORTED:
+                self.logger.warning(f"[Writer-{self.thread_id}] Bulk meterings endpoint not found, posting one by one.")
+                self.bulk_meterings = False
+            elif 200 <= status < 300:
+                self.logger.debug(f"[Writer-{self.thread_id}] Flushed {len(rows)} meterings.")
+                return []
+            elif 400 <= status < 500:
+                # Rechazo del lote: reintentarlo no cambiaría el resultado
+                self.logger.error(f"[Writer-{self.thread_id}] Bulk meterings rejected (status {status}), {len(rows)} rows dropped.")
+                return []
+            else:
+                self.logger.error(f"[Writer-{self.thread_id}] Bulk meterings failed (status {status}).")
+                return rows
+        for position, row in enumerate(rows):
+            metering = MeteringPut(id=row["itemid"], latest_data=row["valor"], latencia=row["latencia"])
+            status, _ = FetchData.post_metering(METERINGS_URL, data=metering, tiempo=row.get("tiempo"))
+            if 400 <= status < 500:
+                self.logger.error(f"[Writer-{self.thread_id}] Metering of item {row['itemid']} rejected (status {status}), dropped.")
+            elif not 200 <= status < 300:
+                self.logger.error(f"[Writer-{self.thread_id}] Metering post failed (status {status}).")
+                return rows[position:]
+        return []
+
+    def _write_latest(self, rows: List[Dict]) -> bool:
+        if self.bulk_latest:
+            status, _ = FetchData.put_items_latest(ITEMS_LATEST_URL, rows)
+            if status in HTTP_UNSUPPORTED:
+                self.logger.warning(f"[Writer-{self.thread_id}] Bulk latest endpoint not found, updating one by one.")
+                self.bulk_latest = False
+            elif 200 <= status < 300:
+                self.logger.debug(f"[Writer-{self.thread_id}] Flushed {len(rows)} latest values.")
+                return True
+            else:
+                self.logger.error(f"[Writer-{self.thread_id}] Bulk latest update failed (status {status}).")
+                return False
+        for row in rows:
+            FetchData.put_item(ITEMS_URL, data=ItemPut(id=row["id"], latest_data=row["latest_data"]))
+        return True
+
+    def _write_reachability(self, rows: List[Dict]) -> bool:
+        if not self.bulk_reachability:
+            return True
+        status, _ = FetchData.post_reachability_bulk(REACHABILITY_BULK_URL, rows)
+        if status in HTTP_UNSUPPORTED:
+            # Sin endpoint por fila: el historial del core no se puede guardar en este backend
+            self.logger.warning(f"[Writer-{self.thread_id}] Bulk reachability endpoint not found, history disabled.")
+            self.bulk_reachability = False
+            return True
+        if 200 <= status < 300:
+            self.logger.debug(f"[Writer-{self.thread_id}] Flushed {len(rows)} reachability rows.")
+            return True
+        if 400 <= status < 500:
+            self.logger.error(f"[Writer-{self.thread_id}] Bulk reachability rejected (status {status}), {len(rows)} rows dropped.")
+            return True
+        self.logger.error(f"[Writer-{self.thread_id}] Bulk reachability failed (status {status}).")
+        return False
+
+    def _write_records(self, record_type: str, records: List[Dict]) -> List[Dict]:
+        """
+        Posts failure or table records one by one.
+
+        Returns:
+            List[Dict]: Records the API did not accept and may accept later. Rejected records
+            (4xx, e.g. the item was deleted) are dropped, since resending them cannot succeed.
+            After the first failure the rest are not attempted, so a down API does not cost one
+            timeout per record.
+        """
+        pending: List[Dict] = []
+        for record in records:
+            if pending:
+                pending.append(record)
+                continue
+            try:
+                if record_type == RECORD_FAILURE:
+                    status, _ = FetchData.post_snmp_failures(FAILURES_URL, record)
+                else:
+                    status, _ = FetchData.post_table_meterings(TABLE_METERINGS_URL, record["itemid"], record["rows"],
+                                                               record.get("latencia"))
+            except Exception as e:
+                self.logger.error(f"[Writer-{self.thread_id}] Error writing {record_type} record: {e}")
+                continue
+            if 400 <= status < 500:
+                self.logger.error(
+                    f"[Writer-{self.thread_id}] {record_type} record of item {record.get('itemid')} rejected "
+                    f"(status {status}), dropped."
+                )
+            elif not 200 <= status < 300:
+                pending.append(record)
+        return pending
+
+    def stop(self) -> None:
+        """
+        Stops the writer thread by setting the stop event.
+        """
+        if self.thread_id is None:
+            self.logger.warning("[Writer-?] Attempted to stop a writer thread before it started.")
+        else:
+            self.logger.info(f"[Writer-{self.thread_id}] Stopping thread.")
+        self.stop_event.set()
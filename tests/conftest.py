@@ -0,0 +1,45 @@
+"""
+conftest.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Makes the repository root importable (core.*, app.*) when pytest runs from any directory.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def api():
+    """
+    Test client of the item and metering blueprints over an in-memory SQLite database, with
+    one hostgroup and one host (id 1, 10.0.0.1) already created.
+    """
+    pytest.importorskip("flask")
+    pytest.importorskip("flask_sqlalchemy")
+    pytest.importorskip("marshmallow_sqlalchemy")
+    from flask import Flask
+    from app.models import db, Hostgroups, Hosts
+    from app.routes.item import item_bp
+    from app.routes.metering import metering_bp
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    app.register_blueprint(item_bp, url_prefix="/api/v1/items")
+    app.register_blueprint(metering_bp, url_prefix="/api/v1/meterings")
+    with app.app_context():
+        db.create_all()
+        db.session.add(Hostgroups(id=1, name="core", model="test", description="test"))
+        db.session.add(Hosts(id=1, hostname="host1", groupid=1, ip="10.0.0.1", community="public",
+                             description="", tag="test"))
+        db.session.commit()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
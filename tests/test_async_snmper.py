@@ -0,0 +1,76 @@
+"""
+test_async_snmper.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the asyncio snmper engine (core/snmper/async_snmper.py): host batches taken from
+task_queue are polled concurrently on one event loop and their results reach response_queue.
+"""
+import asyncio
+import logging
+import time
+from queue import Queue, Empty
+from threading import Event
+
+import pytest
+
+pytest.importorskip("pysnmp")
+pytest.importorskip("requests")
+
+from core.misc.deadline_queue import DeadlineQueue  # noqa: E402
+from core.snmper import async_snmper  # noqa: E402
+from core.snmper.async_snmper import AsyncSnmper  # noqa: E402
+
+HOSTS = 20
+POLL_DELAY = 0.3
+
+
+def _payload(item_id: int, host: str) -> dict:
+    return {"id": item_id, "oid": "1.3.6.1.2.1.1.3.0", "ip": host, "community": "public", "tipo": 1,
+            "factor_division": 1, "factor_multiplicacion": 1}
+
+
+def _records(response_queue: Queue, count: int, timeout: float) -> list:
+    records, end = [], time.monotonic() + timeout
+    while len(records) < count and time.monotonic() < end:
+        try:
+            records.append(response_queue.get(timeout=0.05))
+        except Empty:
+            pass
+    return records
+
+
+def test_host_batches_are_polled_concurrently(monkeypatch):
+    polled = []
+
+    async def fake_batch(self, items, engine=None, rtt=None, fast=False):
+        polled.append([item["itemid"] for item in items])
+        await asyncio.sleep(POLL_DELAY)
+        return [{"itemid": item["itemid"], "channel": [{"value": 42}, {"value": 1.5}]} for item in items]
+
+    monkeypatch.setattr(async_snmper.SNMPCustomNumber, "get_data_batch_async", fake_batch)
+    task_queue, response_queue = DeadlineQueue(), Queue()
+    snmper = AsyncSnmper(logging.getLogger("test"), "", task_queue, response_queue, Event())
+    for index in range(HOSTS):
+        task_queue.put(_payload(2 * index + 1, f"10.0.0.{index + 1}"))
+        task_queue.put(_payload(2 * index + 2, f"10.0.0.{index + 1}"))
+
+    started = time.monotonic()
+    snmper.start()
+    try:
+        # Two records (latest + metering) per item
+        records = _records(response_queue, 4 * HOSTS, timeout=5)
+        elapsed = time.monotonic() - started
+    finally:
+        snmper.stop()
+        snmper.join(timeout=10)
+
+    assert len(records) == 4 * HOSTS
+    assert sorted(len(batch) for batch in polled) == [2] * HOSTS  # One GET per host
+    assert elapsed < HOSTS * POLL_DELAY / 2  # Not one host after the other
+    meterings = [record for record in records if record["type"] == "metering"]
+    assert {record["itemid"] for record in meterings} == set(range(1, 2 * HOSTS + 1))
+    assert all(record["valor"] == 42 and record["latencia"] == 1.5 for record in meterings)
+    assert not snmper.is_alive()
@@ -0,0 +1,72 @@
+"""
+test_circuit_breaker.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the per-host circuit breaker state transitions (core/snmper/circuit_breaker.py).
+"""
+from core.snmper.circuit_breaker import CircuitBreaker, CIRCUIT_CLOSED, CIRCUIT_OPEN, CIRCUIT_HALF_OPEN
+
+HOST = "10.0.0.1"
+
+
+def _opened(now: float = 0.0) -> CircuitBreaker:
+    breaker = CircuitBreaker(threshold=3, base_backoff=30.0, max_backoff=100.0)
+    assert breaker.record_failure(HOST, now=now) is False
+    assert breaker.record_failure(HOST, now=now) is False
+    assert breaker.record_failure(HOST, now=now) is True  # Only the opening failure reports
+    return breaker
+
+
+def test_threshold_consecutive_failures_open_the_host():
+    breaker = _opened()
+    assert breaker.state(HOST) == CIRCUIT_OPEN
+    assert breaker.open_hosts == [HOST]
+    assert breaker.allow(HOST, now=10.0) is False
+    assert breaker.allow("10.0.0.2", now=10.0) is True  # Other hosts are not affected
+
+
+def test_a_success_resets_the_failure_count():
+    breaker = CircuitBreaker(threshold=3, base_backoff=30.0, max_backoff=100.0)
+    breaker.record_failure(HOST, now=0.0)
+    breaker.record_failure(HOST, now=0.0)
+    assert breaker.record_success(HOST) is False  # It was never open
+    assert breaker.record_failure(HOST, now=0.0) is False
+    assert breaker.state(HOST) == CIRCUIT_CLOSED
+
+
+def test_one_probe_per_backoff_period_moves_to_half_open():
+    breaker = _opened()
+    assert breaker.allow(HOST, now=30.0) is True
+    assert breaker.state(HOST) == CIRCUIT_HALF_OPEN
+    assert breaker.allow(HOST, now=31.0) is False  # Probe still pending
+
+
+def test_a_successful_probe_closes_the_host():
+    breaker = _opened()
+    breaker.allow(HOST, now=30.0)
+    assert breaker.record_success(HOST) is True
+    assert breaker.state(HOST) == CIRCUIT_CLOSED and breaker.open_hosts == []
+    assert breaker.allow(HOST, now=31.0) is True
+
+
+def test_a_failed_probe_reopens_with_exponential_backoff_up_to_the_max():
+    breaker = _opened()
+    now = 30.0
+    expected_backoffs = [60.0, 100.0, 100.0]
+    for backoff in expected_backoffs:
+        assert breaker.allow(HOST, now=now) is True
+        assert breaker.record_failure(HOST, now=now) is False  # Not reported again
+        assert breaker.state(HOST) == CIRCUIT_OPEN
+        assert breaker.allow(HOST, now=now + backoff - 0.1) is False
+        now += backoff
+
+
+def test_threshold_zero_disables_the_breaker():
+    breaker = CircuitBreaker(threshold=0, base_backoff=30.0, max_backoff=100.0)
+    for _ in range(10):
+        assert breaker.record_failure(HOST, now=0.0) is False
+    assert breaker.allow(HOST, now=0.0) is True
+    assert breaker.state(HOST) == CIRCUIT_CLOSED
@@ -0,0 +1,85 @@
+"""
+test_deadline_queue.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the deadline-ordered task queue between fetchers and snmpers (core/misc/deadline_queue.py).
+"""
+from queue import Empty
+from time import monotonic
+
+import pytest
+
+from core.misc.deadline_queue import DeadlineQueue
+
+
+def test_payloads_pop_in_deadline_order():
+    queue = DeadlineQueue()
+    now = monotonic()
+    for item_id, due in ((1, now - 1.0), (2, now - 3.0), (3, now - 2.0)):
+        queue.put({"id": item_id, "due": due})
+    assert [queue.get_nowait()["id"] for _ in range(3)] == [2, 3, 1]
+    with pytest.raises(Empty):
+        queue.get_nowait()
+
+
+def test_reenqueue_coalesces_and_keeps_earliest_deadline():
+    queue = DeadlineQueue()
+    now = monotonic()
+    queue.put({"id": 1, "due": now - 5.0, "seq": "old"})
+    queue.put({"id": 2, "due": now - 3.0})
+    queue.put({"id": 1, "due": now - 1.0, "seq": "new"})
+    assert queue.qsize() == 2
+    assert queue.coalesced == 1
+    first = queue.get_nowait()
+    # Keeps the earliest deadline but carries the newest payload
+    assert first["id"] == 1 and first["seq"] == "new"
+    assert queue.get_nowait()["id"] == 2
+    assert queue.empty()
+
+
+def test_stale_polls_are_dropped_and_counted():
+    queue = DeadlineQueue(max_staleness=10.0)
+    now = monotonic()
+    queue.put({"id": 1, "due": now - 60.0})
+    queue.put({"id": 2, "due": now - 1.0})
+    assert queue.get_nowait()["id"] == 2
+    assert queue.dropped == 1
+    assert queue.stats() == {"pending": 0, "dropped": 1, "coalesced": 0}
+
+
+def test_priority_goes_first_and_never_expires():
+    queue = DeadlineQueue(max_staleness=10.0)
+    now = monotonic()
+    queue.put({"id": 1, "due": now - 5.0})
+    queue.put({"id": 2, "due": now - 60.0, "priority": True})
+    assert queue.get_nowait()["id"] == 2
+    assert queue.get_nowait()["id"] == 1
+    assert queue.dropped == 0
+
+
+def test_scheduled_put_does_not_replace_pending_priority():
+    queue = DeadlineQueue()
+    now = monotonic()
+    queue.put({"id": 1, "due": now, "priority": True, "requests": ("a",)})
+    queue.put({"id": 1, "due": now - 5.0})
+    payload = queue.get_nowait()
+    assert payload["priority"] and payload["requests"] == ("a",)
+    assert queue.empty()
+
+
+def test_get_times_out_when_empty():
+    with pytest.raises(Empty):
+        DeadlineQueue().get(timeout=0.01)
+
+
+def test_priority_puts_merge_request_ids():
+    queue = DeadlineQueue()
+    now = monotonic()
+    queue.put({"id": 1, "due": now, "priority": True, "requests": ("a",)})
+    queue.put({"id": 1, "due": now, "priority": True, "requests": ("b",)})
+    queue.put({"id": 1, "due": now, "priority": True, "requests": ("a",)})
+    assert queue.get_nowait()["requests"] == ("a", "b")
+    assert queue.empty()
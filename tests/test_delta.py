@@ -0,0 +1,67 @@
+"""
+test_delta.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the per-item counter rate cache of Delta items (core/checkers/snmp/delta.py).
+"""
+import pytest
+
+from core.checkers.snmp.delta import DeltaCache
+
+COUNTER32 = 1 << 32
+
+
+def test_first_sample_only_stores_the_baseline():
+    deltas = DeltaCache()
+    assert deltas.rate(1, 1000, timestamp=10.0, uptime=500, bits=32) is None
+    assert len(deltas) == 1
+    assert deltas.rate(1, 3000, timestamp=20.0, uptime=1500, bits=32) == pytest.approx(200.0)
+
+
+def test_elapsed_time_comes_from_uptime_when_known():
+    deltas = DeltaCache()
+    deltas.rate(1, 0, timestamp=10.0, uptime=1000)
+    # Polled 5 s apart on the core clock, but the agent sampled 10 s apart
+    assert deltas.rate(1, 1000, timestamp=15.0, uptime=2000) == pytest.approx(100.0)
+
+
+def test_counter32_wrap_without_uptime():
+    deltas = DeltaCache()
+    deltas.rate(1, COUNTER32 - 100, timestamp=0.0, bits=32)
+    assert deltas.rate(1, 400, timestamp=10.0, bits=32) == pytest.approx(50.0)
+
+
+def test_counter32_wrap_with_uptime():
+    deltas = DeltaCache()
+    deltas.rate(1, COUNTER32 - 100, timestamp=0.0, uptime=0, bits=32)
+    assert deltas.rate(1, 400, timestamp=10.0, uptime=1000, bits=32) == pytest.approx(50.0)
+
+
+def test_wrap_over_half_the_range_is_kept_only_when_uptime_is_known():
+    start, end = COUNTER32 - 10, (COUNTER32 // 2) + 10  # Delta of half the range plus 20
+    with_uptime = DeltaCache()
+    with_uptime.rate(1, start, timestamp=0.0, uptime=0, bits=32)
+    assert with_uptime.rate(1, end, timestamp=2.0, uptime=200, bits=32) == pytest.approx((COUNTER32 // 2 + 20) / 2)
+
+    without_uptime = DeltaCache()
+    without_uptime.rate(1, start, timestamp=0.0, bits=32)
+    assert without_uptime.rate(1, end, timestamp=2.0, bits=32) is None  # Taken as an undetected restart
+
+
+def test_uptime_going_backwards_is_a_restart():
+    deltas = DeltaCache()
+    deltas.rate(1, 5000, timestamp=0.0, uptime=100000, bits=32)
+    assert deltas.rate(1, 100, timestamp=10.0, uptime=500, bits=32) is None
+    # The restart sample becomes the new baseline
+    assert deltas.rate(1, 1100, timestamp=20.0, uptime=1500, bits=32) == pytest.approx(100.0)
+
+
+def test_forget_drops_the_baseline():
+    deltas = DeltaCache()
+    deltas.rate(1, 0, timestamp=0.0)
+    deltas.forget(1)
+    assert len(deltas) == 0
+    assert deltas.rate(1, 100, timestamp=10.0) is None
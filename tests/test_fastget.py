@@ -0,0 +1,117 @@
+"""
+test_fastget.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the raw UDP SNMPv2c GET fast path (core/checkers/snmp/fastget.py): the pre-encoded
+requests and the response decoder are checked against the pyasn1 BER codec used by pysnmp.
+"""
+import pytest
+
+pytest.importorskip("pyasn1")
+pytest.importorskip("pysnmp")
+
+from pyasn1.codec.ber import decoder, encoder  # noqa: E402
+from pysnmp.proto import api  # noqa: E402
+
+from core.checkers.snmp.fastget import (  # noqa: E402
+    GetTemplate, decode_response, encode_oid, Counter32Value, Counter64Value, _Unusual,
+)
+
+v2c = api.PROTOCOL_MODULES[api.SNMP_VERSION_2C]
+OIDS = ("1.3.6.1.2.1.1.3.0", "1.3.6.1.2.1.2.2.1.10.4294967295", "1.3.6.1.4.1.2021.10.1.5.1")
+
+
+def _response(varbinds, request_id: int = 0x01020304, error_status: int = 0, community: str = "public") -> bytes:
+    pdu = v2c.ResponsePDU()
+    v2c.apiPDU.set_defaults(pdu)
+    v2c.apiPDU.set_request_id(pdu, request_id)
+    v2c.apiPDU.set_error_status(pdu, error_status)
+    v2c.apiPDU.set_varbinds(pdu, [(v2c.ObjectIdentifier(oid), value) for oid, value in varbinds])
+    message = v2c.Message()
+    v2c.apiMessage.set_defaults(message)
+    v2c.apiMessage.set_community(message, community)
+    v2c.apiMessage.set_pdu(message, pdu)
+    return encoder.encode(message)
+
+
+def test_encode_oid_matches_pyasn1():
+    for oid in OIDS + ("2.999.3", "1.3"):
+        tlv = encoder.encode(v2c.ObjectIdentifier(oid))
+        assert encode_oid(oid) == tlv[2:]
+    assert encode_oid(".1.3.6.1.2.1.1.3.0") == encode_oid("1.3.6.1.2.1.1.3.0")
+    for bad in ("sysUpTime.0", "1", "3.1.2", "1.40.1"):
+        with pytest.raises(ValueError):
+            encode_oid(bad)
+
+
+@pytest.mark.parametrize("community,oids", [
+    ("public", OIDS[:1]),
+    ("public", OIDS),
+    ("c" * 200, OIDS * 10),  # Long-form BER lengths
+])
+def test_template_packets_decode_as_get_requests(community, oids):
+    template = GetTemplate(community, oids)
+    for request_id in (0x01000000, 0x12345678, 0x7FFFFFFF):
+        message, rest = decoder.decode(template.packet(request_id), asn1Spec=v2c.Message())
+        assert not rest
+        assert int(v2c.apiMessage.get_version(message)) == 1
+        assert str(v2c.apiMessage.get_community(message)) == community
+        pdu = v2c.apiMessage.get_pdu(message)
+        assert pdu.isSameTypeWith(v2c.GetRequestPDU())
+        assert int(v2c.apiPDU.get_request_id(pdu)) == request_id
+        assert int(v2c.apiPDU.get_error_status(pdu)) == 0
+        varbinds = v2c.apiPDU.get_varbinds(pdu)
+        assert [str(oid) for oid, _ in varbinds] == list(oids)
+        assert all(value.isSameTypeWith(v2c.Null()) for _, value in varbinds)
+
+
+def test_decode_response_numeric_types():
+    values = [
+        (OIDS[0], v2c.TimeTicks(123456)),
+        (OIDS[1], v2c.Counter32(4294967295)),
+        (OIDS[2], v2c.Counter64(18446744073709551615)),
+        ("1.3.6.1.2.1.2.2.1.5.1", v2c.Gauge32(1000000000)),
+        ("1.3.6.1.2.1.2.2.1.8.1", v2c.Integer(-42)),
+        ("1.3.6.1.2.1.2.2.1.9.1", v2c.Unsigned32(7)),
+    ]
+    request_id, error_status, varbinds = decode_response(_response(values, request_id=0x7FFFFFFE))
+    assert (request_id, error_status) == (0x7FFFFFFE, 0)
+    assert [oid for oid, _ in varbinds] == [encode_oid(oid) for oid, _ in values]
+    assert [value for _, value in varbinds] == [123456, 4294967295, 18446744073709551615, 1000000000, -42, 7]
+    assert isinstance(varbinds[1][1], Counter32Value) and varbinds[1][1].bits == 32
+    assert isinstance(varbinds[2][1], Counter64Value) and varbinds[2][1].bits == 64
+    assert not isinstance(varbinds[3][1], Counter32Value)  # Gauges do not wrap
+
+
+def test_decode_response_matches_template_oids():
+    template = GetTemplate("public", OIDS)
+    _, _, varbinds = decode_response(_response([(oid, v2c.Counter32(1)) for oid in OIDS]))
+    assert tuple(oid for oid, _ in varbinds) == template.oids
+
+
+def test_decode_response_reports_error_status():
+    _, error_status, _ = decode_response(_response([], error_status=2))
+    assert error_status == 2
+
+
+@pytest.mark.parametrize("value", [
+    v2c.OctetString("eth0"),
+    v2c.ObjectIdentifier("1.3.6.1"),
+    v2c.IpAddress("10.0.0.1"),
+    v2c.NoSuchObject(""),
+    v2c.NoSuchInstance(""),
+    v2c.EndOfMibView(""),
+])
+def test_unusual_values_fall_back_to_pysnmp(value):
+    with pytest.raises(_Unusual):
+        decode_response(_response([(OIDS[0], value)]))
+
+
+def test_non_responses_fall_back_to_pysnmp():
+    with pytest.raises(_Unusual):
+        decode_response(GetTemplate("public", OIDS).packet(0x01000000))  # A request, not a response
+    with pytest.raises(_Unusual):
+        decode_response(_response([(OIDS[0], v2c.Counter32(1))])[:-3])  # Truncated
@@ -0,0 +1,57 @@
+"""
+test_icmp.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the native pinger statistics and the ICMP checksum (core/checkers/icmp.py).
+"""
+import struct
+
+import pytest
+
+from core.checkers.icmp import PingStats, checksum, ICMP_HEADER, ICMP_ECHO_REQUEST
+
+
+def test_checksum_rfc1071_example():
+    assert checksum(bytes.fromhex("0001f203f4f5f6f7")) == 0x220D
+    assert checksum(b"\x01") == checksum(b"\x01\x00")  # Odd lengths are padded with a zero byte
+
+
+def test_checksum_of_a_packet_including_its_checksum_is_zero():
+    payload = bytes(range(37))
+    header = ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, 0x1234, 7)
+    value = checksum(header + payload)
+    packet = header[:2] + struct.pack("!H", value) + header[4:] + payload
+    assert checksum(packet) == 0
+
+
+def test_stats_match_iputils_summary():
+    stats = PingStats("10.0.0.1")
+    stats.sent = 8
+    stats.rtts = [1.0, 2.0, 3.0, 4.0]
+    assert stats.reachable and stats.received == 4
+    assert stats.loss == 50.0
+    assert (stats.min, stats.avg, stats.max) == (1.0, 2.5, 4.0)
+    assert stats.mdev == pytest.approx(1.118034, abs=1e-6)
+
+
+def test_unanswered_host_has_full_loss_and_no_times():
+    stats = PingStats("10.0.0.1")
+    assert stats.loss == 100.0  # Nothing sent yet
+    stats.sent = 4
+    assert not stats.reachable and stats.loss == 100.0
+    assert stats.min is None and stats.avg is None and stats.max is None and stats.mdev is None
+
+
+def test_channels_keep_the_ping_format():
+    stats = PingStats("10.0.0.1")
+    stats.sent = 4
+    stats.rtts = [2.0, 2.0, 2.0]
+    channels = stats.channels()
+    assert [channel["name"] for channel in channels] == [
+        "Ping Time Min", "Ping Time Avg", "Ping Time Max", "Ping Time MDEV", "Packet Loss"]
+    assert [channel["value"] for channel in channels] == [2.0, 2.0, 2.0, 0.0, 25.0]
+    assert [channel["kind"] for channel in channels] == ["TimeResponse"] * 4 + ["Percent"]
+    assert all(channel["mode"] == "float" for channel in channels)
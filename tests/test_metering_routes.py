@@ -0,0 +1,54 @@
+"""
+test_metering_routes.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the metering routes used by the core writers (POST /meterings/ and /meterings/bulk).
+"""
+METERINGS = "/api/v1/meterings/"
+
+
+def _create_item(api) -> int:
+    response = api.post("/api/v1/items/", json={
+        "name": "uptime", "tipo": 1, "hostid": 1, "snmp_oid": "1.3.6.1.2.1.1.3.0", "acronimo": "uptime",
+        "units": "", "factor_multiplicacion": 1, "factor_division": 1, "updateinterval": "00:00:30",
+        "description": "", "enabled": True,
+    })
+    return response.json["data"]["id"]
+
+
+def _stored_times(item_id: int) -> list:
+    from app.models import Meterings, db
+    return [metering.tiempo.isoformat() for metering in db.session.query(Meterings).filter_by(itemid=item_id)]
+
+
+def test_single_metering_keeps_the_poll_time(api):
+    item_id = _create_item(api)
+    response = api.post(METERINGS, json={"itemid": item_id, "valor": "42", "latencia": 1.5,
+                                         "tiempo": "2025-03-01T10:00:00.250"})
+    assert response.status_code == 201
+    assert _stored_times(item_id) == ["2025-03-01T10:00:00.250000"]
+    assert api.post(METERINGS, json={"itemid": item_id, "valor": "1", "latencia": 1.0, "tiempo": "ayer"}).status_code == 400
+
+
+def test_bulk_meterings_keep_the_poll_time_and_skip_unknown_items(api):
+    item_id = _create_item(api)
+    rows = [{"itemid": item_id, "valor": 1, "latencia": 1.0, "tiempo": "2025-03-01T10:00:00"},
+            {"itemid": 999, "valor": 2}]
+    response = api.post(f"{METERINGS}bulk", json={"rows": rows})
+    assert response.status_code == 201
+    assert response.json["data"] == {"inserted": 1, "rejected": 1}
+    assert _stored_times(item_id) == ["2025-03-01T10:00:00"]
+
+
+def test_failure_of_a_deleted_item_is_a_404_and_long_texts_are_truncated(api):
+    item_id = _create_item(api)
+    failure = {"host_ip": "10.0.0.1", "oid": "1.3.6.1.2.1.1.3.0", "mensaje": "x" * 400, "valor": "y" * 50}
+    assert api.post(f"{METERINGS}falla", json=dict(failure, itemid=item_id)).status_code == 201
+    assert api.post(f"{METERINGS}falla", json=dict(failure, itemid=999)).status_code == 404
+
+    from app.models import SNMPFailures, db
+    [stored] = db.session.query(SNMPFailures).all()
+    assert (len(stored.mensaje), len(stored.valor)) == (255, 30)
@@ -0,0 +1,105 @@
+"""
+test_monitoring_feed.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the incremental monitoring feed (GET /items/monitoring): cursor, ETag/304, the
+tombstone feed of deleted items, and config changes vs. runtime writes (latest_data).
+"""
+FEED = "/api/v1/items/monitoring"
+
+
+def _create_item(api, acronimo: str = "uptime", oid: str = "1.3.6.1.2.1.1.3.0") -> int:
+    response = api.post("/api/v1/items/", json={
+        "name": acronimo, "tipo": 1, "hostid": 1, "snmp_oid": oid, "acronimo": acronimo, "units": "",
+        "factor_multiplicacion": 1, "factor_division": 1, "updateinterval": "00:00:30", "description": "",
+        "enabled": True,
+    })
+    assert response.status_code == 201
+    return response.json["data"]["id"]
+
+
+def test_snapshot_then_unchanged_feed_is_a_304(api):
+    item_id = _create_item(api)
+    snapshot = api.get(f"{FEED}?since=0")
+    assert snapshot.status_code == 200
+    assert snapshot.json["full"] is True and snapshot.json["deleted"] == []
+    assert [item["id"] for item in snapshot.json["items"]] == [item_id]
+    assert snapshot.json["items"][0]["host"] == {"id": 1, "hostname": "host1", "ip": "10.0.0.1", "community": "public"}
+
+    cursor = snapshot.json["cursor"]
+    delta = api.get(f"{FEED}?since={cursor}")
+    again = api.get(f"{FEED}?since={cursor}", headers={"If-None-Match": delta.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_each_cursor_has_its_own_etag(api):
+    _create_item(api)
+    snapshot = api.get(f"{FEED}?since=0")
+    delta = api.get(f"{FEED}?since={snapshot.json['cursor']}")
+    listing = api.get(FEED)
+    assert len({snapshot.headers["ETag"], delta.headers["ETag"], listing.headers["ETag"]}) == 3
+    assert isinstance(listing.json, list)  # Original format without since
+
+
+def test_runtime_writes_do_not_show_up_as_changes_but_move_updated_at(api):
+    item_id = _create_item(api)
+    snapshot = api.get(f"{FEED}?since=0")
+    cursor, polled_at = snapshot.json["cursor"], snapshot.json["items"][0]["updatedAt"]
+    delta = api.get(f"{FEED}?since={cursor}")
+
+    assert api.put(f"/api/v1/items/{item_id}", json={"latest_data": "42", "status_codes": 200}).status_code == 200
+
+    assert api.get(f"{FEED}?since={cursor}", headers={"If-None-Match": delta.headers["ETag"]}).status_code == 304
+    # updatedAt is the last poll time read by /items/core
+    assert api.get(f"{FEED}?since=0").json["items"][0]["updatedAt"] > polled_at
+
+
+def test_config_change_is_in_the_delta(api):
+    other_id = _create_item(api, "other", "1.3.6.1.2.1.1.5.0")
+    item_id = _create_item(api)
+    cursor = api.get(f"{FEED}?since=0").json["cursor"]
+    before = api.get(f"{FEED}?since={cursor}")
+
+    assert api.put(f"/api/v1/items/{item_id}", json={"updateinterval": "00:01:00"}).status_code == 200
+
+    after = api.get(f"{FEED}?since={cursor}", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.json["full"] is False
+    assert [item["id"] for item in after.json["items"]] == [item_id]
+    assert after.json["items"][0]["updateinterval"] == "00:01:00"
+    assert other_id not in [item["id"] for item in after.json["items"]]
+    assert after.json["cursor"] > cursor
+
+
+def test_deleted_items_come_as_tombstones(api):
+    item_id = _create_item(api)
+    cursor = api.get(f"{FEED}?since=0").json["cursor"]
+
+    assert api.delete(f"/api/v1/items/{item_id}").status_code == 200
+
+    delta = api.get(f"{FEED}?since={cursor}")
+    assert delta.json["items"] == [] and delta.json["deleted"] == [item_id]
+    assert api.get(f"{FEED}?since=0").json["items"] == []
+
+
+def test_old_or_invalid_cursor(api):
+    item_id = _create_item(api)
+    old = api.get(f"{FEED}?since=2000-01-01T00:00:00")
+    assert old.json["full"] is True and [item["id"] for item in old.json["items"]] == [item_id]
+    assert api.get(f"{FEED}?since=yesterday").status_code == 400
+
+
+def test_bulk_latest_moves_updated_at_but_not_the_feed(api):
+    item_id = _create_item(api)
+    snapshot = api.get(f"{FEED}?since=0")
+    cursor, polled_at = snapshot.json["cursor"], snapshot.json["items"][0]["updatedAt"]
+    delta = api.get(f"{FEED}?since={cursor}")
+
+    response = api.put("/api/v1/items/latest", json={"rows": [{"id": item_id, "latest_data": 7}]})
+    assert response.status_code == 200
+
+    assert api.get(f"{FEED}?since={cursor}", headers={"If-None-Match": delta.headers["ETag"]}).status_code == 304
+    assert api.get(f"{FEED}?since=0").json["items"][0]["updatedAt"] > polled_at
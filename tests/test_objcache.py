@@ -0,0 +1,81 @@
+"""
+test_objcache.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the per-event-loop cache of pysnmp objects (core/checkers/snmp/objcache.py).
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("pysnmp")
+
+from core.checkers.snmp import objcache  # noqa: E402
+from core.checkers.snmp.objcache import SnmpObjects, quantize_timeout  # noqa: E402
+
+OID = "1.3.6.1.2.1.1.3.0"
+
+
+def test_quantize_timeout_rounds_up_to_few_steps():
+    assert quantize_timeout(1.0) == 1.0
+    assert quantize_timeout(2.0) == 2.0
+    assert 1.0 < quantize_timeout(1.01) == quantize_timeout(1.15) <= 1.19
+    assert quantize_timeout(0.0) == 0.0
+    steps = {quantize_timeout(0.5 + index / 1000) for index in range(1500)}
+    assert len(steps) <= 2 * objcache.TIMEOUT_STEPS_PER_OCTAVE + 1  # 0.5 s .. 2 s
+
+
+def test_targets_are_reused_and_resolved_once_per_address():
+    objects = SnmpObjects()
+
+    async def scenario():
+        first = await objects.target("127.0.0.1", 161, 1.0, 1)
+        again = await objects.target("127.0.0.1", 161, 1.0, 1)
+        longer = await objects.target("127.0.0.1", 161, 2.0, 0)
+        loop_objects = objects._objects()
+        assert again is first
+        assert longer is not first and (longer.timeout, longer.retries) == (2.0, 0)
+        assert list(loop_objects.addresses) == [("127.0.0.1", 161)]
+        objects.release()
+
+    asyncio.run(scenario())
+
+
+def test_resolved_addresses_are_bounded(monkeypatch):
+    monkeypatch.setattr(objcache, "MAX_TARGETS", 3)
+    objects = SnmpObjects()
+
+    async def scenario():
+        for index in range(1, 6):
+            await objects.target(f"127.0.0.{index}", 161, 1.0, 1)
+        await objects.target("127.0.0.4", 161, 2.0, 1)  # Hit: 127.0.0.4 becomes the newest
+        await objects.target("127.0.0.6", 161, 1.0, 1)
+        loop_objects = objects._objects()
+        assert [host for host, _ in loop_objects.addresses] == ["127.0.0.5", "127.0.0.4", "127.0.0.6"]
+        assert len(loop_objects.targets) == 3
+        objects.release()
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_item_forgets_previous_and_current_address():
+    objects = SnmpObjects()
+
+    async def scenario():
+        await objects.target("127.0.0.1", 161, 1.0, 1)
+        await objects.target("127.0.0.2", 161, 1.0, 1)
+        await objects.target("127.0.0.3", 161, 1.0, 1)
+        objects.object_type(OID)
+        objects.object_type("1.3.6.1.2.1.2.2.1.10")
+        # The item moved from 127.0.0.1/OID to 127.0.0.2 and a new OID
+        objects.invalidate_item({"host": "127.0.0.2", "oid": "1.3.6.1.2.1.2.2.1.10", "refresh": [("127.0.0.1", OID)]})
+        loop_objects = objects._objects()
+        assert [host for host, _ in loop_objects.addresses] == ["127.0.0.3"]
+        assert {key[0] for key in loop_objects.targets} == {"127.0.0.3"}
+        assert not loop_objects.oids
+        objects.release()
+
+    asyncio.run(scenario())
@@ -0,0 +1,101 @@
+"""
+test_process_snmper.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the process-pool snmper dispatcher (core/snmper/process_snmper.py): hosts stay pinned
+to one worker and the results sent back by the workers reach response_queue.
+"""
+import logging
+from queue import Queue
+from threading import Event
+
+import pytest
+
+pytest.importorskip("pysnmp")
+pytest.importorskip("requests")
+
+from core.snmper.circuit_breaker import CircuitBreaker  # noqa: E402
+from core.snmper.process_snmper import ProcessSnmper  # noqa: E402
+from core.snmper.snmp_worker import WORKER_JOB_SNMP  # noqa: E402
+
+TIMEOUT_ERROR = "SNMP error indication: No SNMP response received before timeout"
+
+
+def _snmper(num_workers: int = 4, breaker: CircuitBreaker = None) -> ProcessSnmper:
+    return ProcessSnmper(logging.getLogger("test"), "", Queue(), Queue(), Event(), num_workers=num_workers,
+                         breaker=breaker)
+
+
+def _item(item_id: int, host: str = "10.0.0.1") -> dict:
+    return {"itemid": item_id, "host": host, "oid": "1.3.6.1.2.1.1.3.0", "value_type": 1}
+
+
+def _drain(queue: Queue) -> list:
+    records = []
+    while not queue.empty():
+        records.append(queue.get_nowait())
+    return records
+
+
+def test_hosts_are_pinned_to_one_worker_and_spread():
+    snmper = _snmper()
+    hosts = [f"10.0.{index // 256}.{index % 256}" for index in range(400)]
+    assignment = {host: snmper._worker_for(host) for host in hosts}
+    assert all(snmper._worker_for(host) == worker for host, worker in assignment.items())
+    assert all(0 <= worker < 4 for worker in assignment.values())
+    loads = [list(assignment.values()).count(worker) for worker in range(4)]
+    assert min(loads) > 50  # Every worker gets a share of the hosts
+
+
+def test_worker_results_reach_response_queue():
+    snmper = _snmper()
+    items = [_item(1), _item(2)]
+    responses = [{"itemid": 1, "channel": [{"value": 7}, {"value": 2.5}]},
+                 {"itemid": 2, "channel": [{"value": 9}, {"value": 2.5}]}]
+    snmper._store(WORKER_JOB_SNMP, items, responses)
+    meterings = [record for record in _drain(snmper.response_queue) if record["type"] == "metering"]
+    assert [(record["itemid"], record["valor"]) for record in meterings] == [(1, 7), (2, 9)]
+
+
+def test_unreachable_host_reports_once_when_its_circuit_opens():
+    snmper = _snmper(breaker=CircuitBreaker(threshold=2, base_backoff=30.0, max_backoff=60.0))
+    timeout = [{"itemid": 1, "channel": [{"value": None, "error": TIMEOUT_ERROR}]}]
+    snmper._store(WORKER_JOB_SNMP, [_item(1)], timeout)
+    first = _drain(snmper.response_queue)
+    assert [record["type"] for record in first].count("failure") == 1  # Per-item failure while closed
+    snmper._store(WORKER_JOB_SNMP, [_item(1)], timeout)
+    opened = _drain(snmper.response_queue)
+    assert len(opened) == 1 and opened[0]["type"] == "failure"
+    assert opened[0]["mensaje"].startswith("Host inalcanzable")
+    assert snmper.breaker.open_hosts == ["10.0.0.1"]
+
+
+def test_worker_rtt_estimates_are_mirrored_for_the_metrics():
+    snmper = _snmper()
+    responses = [{"itemid": 1, "channel": [{"value": 7}, {"value": 0.05}]}]
+    snmper._store(WORKER_JOB_SNMP, [_item(1)], responses, {"srtt": 0.05, "rttvar": 0.025, "rto": 0.2})
+    assert snmper.rtt.snapshot() == {"10.0.0.1": {"srtt": 0.05, "rttvar": 0.025, "rto": 0.2}}
+    snmper._store(WORKER_JOB_SNMP, [_item(1)], responses, {"srtt": 0.07, "rttvar": 0.03, "rto": 0.25})
+    assert snmper.rtt.snapshot()["10.0.0.1"]["srtt"] == 0.07  # Replaced, not re-smoothed
+
+
+def test_delta_item_starts_a_new_baseline_after_a_host_change():
+    snmper = _snmper()
+    oid = "1.3.6.1.2.1.2.2.1.10.1"
+    payload = {"id": 7, "oid": oid, "ip": "10.0.0.1", "community": "public", "tipo": 5,
+               "factor_division": 1, "factor_multiplicacion": 1}
+
+    def poll(raw: dict, value: int, uptime: int) -> list:
+        response = {"itemid": 7, "uptime": uptime, "channel": [{"value": value, "bits": 32}, {"value": 0.01}]}
+        snmper._store(WORKER_JOB_SNMP, [snmper._format_item(raw)], [response])
+        return [record["valor"] for record in _drain(snmper.response_queue) if record["type"] == "metering"]
+
+    assert poll(payload, 1000, 0) == []
+    assert poll(payload, 2000, 1000) == [100.0]
+    # Same item id on another host: its counter must not be compared with the old host's
+    moved = dict(payload, ip="10.0.0.2", refresh=[("10.0.0.1", oid)])
+    assert poll(moved, 50, 5000) == []
+    assert poll(dict(payload, ip="10.0.0.2"), 150, 6000) == [10.0]
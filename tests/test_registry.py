@@ -0,0 +1,73 @@
+"""
+test_registry.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the fetcher in-memory item registry (core/fetcher/registry.py).
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from core.fetcher.registry import ItemRegistry, parse_interval, parse_timestamp  # noqa: E402
+
+
+def _row(item_id: int, host_id: int = 1, ip: str = "10.0.0.1", **changes) -> dict:
+    row = {
+        "id": item_id, "name": f"item {item_id}", "tipo": 1, "snmp_oid": "1.3.6.1.2.1.1.3.0", "enabled": True,
+        "updateinterval": "00:01:00", "factor_multiplicacion": 1, "factor_division": 1,
+        "updatedAt": "2025-01-01T00:00:00", "createdAt": "2025-01-01T00:00:00",
+        "host": {"id": host_id, "hostname": f"host{host_id}", "ip": ip, "community": "public"},
+    }
+    row.update(changes)
+    return row
+
+
+def test_parse_interval_and_timestamp():
+    assert parse_interval("01:02:03.5") == 3723.5
+    assert parse_interval(30) == 30.0
+    assert parse_timestamp(None) == 0.0
+    assert parse_timestamp("2025-01-01T00:01:00") - parse_timestamp("2025-01-01T00:00:00") == 60.0
+
+
+def test_items_of_a_host_share_one_host_record():
+    registry = ItemRegistry()
+    registry.upsert_many([_row(1), _row(2), _row(3, host_id=2, ip="10.0.0.2")])
+    assert len(registry) == 3 and registry.host_count == 2
+    assert registry.get(1).host is registry.get(2).host
+    assert registry.get(1).interval == 60.0
+    assert sorted(record.id for record in registry.of_hosts([1])) == [1, 2]
+
+
+def test_upsert_returns_the_previous_record_and_releases_its_host():
+    registry = ItemRegistry()
+    registry.upsert_many([_row(1)])
+    [(record, previous)] = registry.upsert_many([_row(1, ip="10.0.0.9")])
+    assert previous.host.ip == "10.0.0.1" and record.host.ip == "10.0.0.9"
+    assert registry.host_count == 1  # The old host is no longer referenced
+
+
+def test_delete_and_retain_release_hosts():
+    registry = ItemRegistry()
+    registry.upsert_many([_row(1), _row(2), _row(3, host_id=2, ip="10.0.0.2")])
+    assert registry.delete_many([1, 42]) == [1]
+    assert registry.host_count == 2
+    assert registry.retain([2]) == [3]
+    assert list(registry) == [2] and registry.host_count == 1
+
+
+def test_due_times_are_clamped_to_one_interval():
+    registry = ItemRegistry()
+    registry.upsert_many([_row(1), _row(2, updatedAt="2025-01-01T00:00:30"), _row(3, updatedAt="2030-01-01T00:00:00")])
+    records = [registry.get(item_id) for item_id in (1, 2, 3)]
+    now_wall = parse_timestamp("2025-01-01T00:01:00")
+    due = ItemRegistry.due_times(records, now_monotonic=1000.0, now_wall=now_wall)
+    assert due[0] == pytest.approx(1000.0)  # Exactly due now
+    assert due[1] == pytest.approx(1030.0)  # Polled 30 s ago, 60 s interval
+    assert due[2] == pytest.approx(1060.0)  # Future updatedAt: at most one interval away
+
+
+def test_due_times_of_an_empty_batch():
+    assert ItemRegistry.due_times([], now_monotonic=1000.0, now_wall=0.0) == []
@@ -0,0 +1,79 @@
+"""
+test_rtt.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the per-host RTT estimator (RFC 6298) behind the adaptive SNMP timeouts
+(core/checkers/snmp/rtt.py).
+"""
+import pytest
+
+from core.checkers.snmp.rtt import RttEstimator, DEFAULT_TIMEOUT, DEFAULT_RETRIES
+
+
+def test_unknown_host_gets_the_default_parameters():
+    assert RttEstimator().parameters("10.0.0.1") == (DEFAULT_TIMEOUT, DEFAULT_RETRIES)
+
+
+def test_first_sample_sets_srtt_and_half_rttvar():
+    estimator = RttEstimator(min_timeout=0.01)
+    estimator.sample("h", 0.1)
+    state = estimator.snapshot()["h"]
+    assert state["srtt"] == pytest.approx(0.1)
+    assert state["rttvar"] == pytest.approx(0.05)
+    assert state["rto"] == pytest.approx(0.1 + 4 * 0.05)  # SRTT + K * RTTVAR
+
+
+def test_later_samples_use_the_rfc_6298_gains():
+    estimator = RttEstimator(min_timeout=0.01)
+    estimator.sample("h", 0.1)
+    estimator.sample("h", 0.2)
+    state = estimator.snapshot()["h"]
+    rttvar = 3 / 4 * 0.05 + 1 / 4 * abs(0.1 - 0.2)
+    srtt = 7 / 8 * 0.1 + 1 / 8 * 0.2
+    assert state["rttvar"] == pytest.approx(rttvar)
+    assert state["srtt"] == pytest.approx(srtt)
+    assert state["rto"] == pytest.approx(srtt + 4 * rttvar)
+
+
+def test_rto_is_clamped_and_has_a_clock_granularity_floor():
+    estimator = RttEstimator(min_timeout=0.2, max_timeout=5.0)
+    for _ in range(50):
+        estimator.sample("lan", 0.001)  # RTTVAR decays towards 0
+    assert estimator.parameters("lan")[0] == 0.2
+    estimator.sample("far", 4.0)
+    assert estimator.parameters("far")[0] == 5.0
+
+
+def test_timeouts_double_the_rto_up_to_the_maximum():
+    estimator = RttEstimator(min_timeout=0.2, max_timeout=5.0)
+    estimator.sample("h", 0.1)  # RTO 0.3
+    estimator.timeout("h")
+    assert estimator.parameters("h")[0] == pytest.approx(0.6)
+    for _ in range(10):
+        estimator.timeout("h")
+    assert estimator.parameters("h")[0] == 5.0
+
+
+def test_retries_fit_in_the_wait_budget():
+    estimator = RttEstimator(min_timeout=0.01, max_timeout=5.0, max_retries=3, wait_budget=3.0)
+    estimator.sample("fast", 0.1)  # RTO 0.3: budget allows 9 retries, capped at 3
+    assert estimator.parameters("fast")[1] == 3
+    estimator.sample("slow", 0.5)  # RTO 1.5: 3.0 / 1.5 - 1 = 1 retry
+    timeout, retries = estimator.parameters("slow")
+    assert timeout * (retries + 1) <= 3.0 and retries == 1
+    estimator.forget("slow")
+    assert estimator.parameters("slow") == (DEFAULT_TIMEOUT, DEFAULT_RETRIES)
+
+
+def test_host_state_round_trips_between_estimators():
+    worker = RttEstimator(min_timeout=0.2, max_timeout=5.0)
+    assert worker.host_state("h") is None
+    worker.sample("h", 0.1)
+    worker.timeout("h")
+    parent = RttEstimator(min_timeout=0.2, max_timeout=5.0)
+    parent.restore("h", worker.host_state("h"))
+    assert parent.snapshot() == worker.snapshot()
+    assert parent.parameters("h") == worker.parameters("h")
@@ -0,0 +1,97 @@
+"""
+test_scheduler.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the fetcher PollScheduler (core/fetcher/scheduler.py).
+"""
+from core.fetcher.scheduler import PollScheduler
+
+
+def test_pop_due_returns_only_due_items_in_due_order():
+    scheduler = PollScheduler()
+    scheduler.schedule(1, 10.0, due=105.0)
+    scheduler.schedule(2, 10.0, due=101.0)
+    scheduler.schedule(3, 10.0, due=150.0)
+
+    assert scheduler.next_due() == 101.0
+    assert scheduler.pop_due(now=110.0) == [(2, 101.0), (1, 105.0)]
+    assert scheduler.lateness == {2: 9.0, 1: 5.0}
+    assert scheduler.next_due() == 150.0
+    # Popped items stay registered until they are rescheduled
+    assert len(scheduler) == 3 and 1 in scheduler
+
+
+def test_reschedule_puts_the_item_back_one_interval_later():
+    scheduler = PollScheduler()
+    first = scheduler.next_slot(1, 10.0, 100.0)
+    scheduler.schedule(1, 10.0, due=first)
+    [(item_id, due)] = scheduler.pop_due(now=first)
+
+    scheduler.reschedule(item_id, due, now=first)
+
+    assert scheduler.next_due() == first + 10.0
+    assert scheduler.pop_due(now=first + 9.9) == []
+    assert scheduler.pop_due(now=first + 10.0) == [(1, first + 10.0)]
+
+
+def test_rescheduling_an_item_discards_its_stale_heap_entry():
+    scheduler = PollScheduler()
+    scheduler.schedule(1, 10.0, due=100.0)
+    scheduler.schedule(1, 10.0, due=200.0)
+
+    assert scheduler.pop_due(now=150.0) == []
+    assert scheduler.next_due() == 200.0
+
+
+def test_removed_items_are_never_popped():
+    scheduler = PollScheduler()
+    scheduler.schedule(1, 10.0, due=100.0)
+    scheduler.schedule(2, 10.0, due=100.0)
+    scheduler.remove(1)
+
+    assert scheduler.pop_due(now=100.0) == [(2, 100.0)]
+    scheduler.reschedule(1, 100.0, now=100.0)  # Unknown item: ignored
+    assert 1 not in scheduler and len(scheduler) == 1
+
+
+def test_next_due_is_none_when_empty():
+    scheduler = PollScheduler()
+    assert scheduler.next_due() is None
+    scheduler.schedule(1, 5.0, due=1.0)
+    scheduler.clear()
+    assert scheduler.next_due() is None and len(scheduler) == 0
+
+
+def test_next_slot_falls_on_the_item_phase():
+    scheduler = PollScheduler()
+    for item_id in (1, 7, 1234):
+        phase = PollScheduler.phase(item_id, 30.0)
+        assert 0.0 <= phase < 30.0
+        slot = scheduler.next_slot(item_id, 30.0, 1000.0)
+        assert 1000.0 <= slot < 1030.0
+        assert abs((slot - phase) / 30.0 - round((slot - phase) / 30.0)) < 1e-9
+        assert scheduler.next_slot(item_id, 30.0, slot) == slot  # Already on the slot
+
+
+def test_bulk_created_items_are_spread_over_the_interval():
+    interval = 60.0
+    phases = sorted(PollScheduler.phase(item_id, interval) for item_id in range(500, 600))
+    gaps = [after - before for before, after in zip(phases, phases[1:])]
+    gaps.append(phases[0] + interval - phases[-1])
+    # 100 items over 60 s: no burst and no large hole
+    assert max(gaps) < 3 * interval / 100
+    assert len({round(phase, 6) for phase in phases}) == 100
+
+
+def test_reschedule_skips_missed_slots_when_behind():
+    scheduler = PollScheduler()
+    first = scheduler.next_slot(1, 10.0, 100.0)
+    scheduler.schedule(1, 10.0, due=first)
+    scheduler.pop_due(now=first)
+
+    scheduler.reschedule(1, first, now=first + 35.0)
+
+    assert scheduler.next_due() == first + 40.0  # One poll, not a burst of three
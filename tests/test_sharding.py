@@ -0,0 +1,57 @@
+"""
+test_sharding.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the consistent hash ring that partitions items between fetchers (core/fetcher/sharding.py).
+"""
+from collections import Counter
+
+from core.fetcher.sharding import HashRing
+
+ITEM_IDS = range(1, 20001)
+
+
+def test_empty_ring_has_no_owner():
+    assert HashRing().owner(1) == -1
+
+
+def test_owner_is_deterministic_across_instances():
+    first, second = HashRing([0, 1, 2, 3]), HashRing([3, 2, 1, 0])
+    assert all(first.owner(item_id) == second.owner(item_id) for item_id in ITEM_IDS)
+
+
+def test_items_are_spread_over_every_shard():
+    ring = HashRing([0, 1, 2, 3])
+    shares = Counter(ring.owner(item_id) for item_id in ITEM_IDS)
+    assert set(shares) == {0, 1, 2, 3}
+    assert min(shares.values()) > len(ITEM_IDS) / 4 * 0.7
+
+
+def test_adding_a_shard_only_moves_items_to_the_new_shard():
+    ring = HashRing([0, 1, 2, 3])
+    before = {item_id: ring.owner(item_id) for item_id in ITEM_IDS}
+    version = ring.version
+
+    ring.set_nodes([0, 1, 2, 3, 4])
+
+    assert ring.version == version + 1
+    moved = [item_id for item_id in ITEM_IDS if ring.owner(item_id) != before[item_id]]
+    assert all(ring.owner(item_id) == 4 for item_id in moved)
+    assert len(moved) < len(ITEM_IDS) / 5 * 1.3
+
+
+def test_removing_a_shard_only_moves_its_items():
+    ring = HashRing([0, 1, 2, 3])
+    before = {item_id: ring.owner(item_id) for item_id in ITEM_IDS}
+
+    ring.set_nodes([0, 1, 3])
+
+    assert ring.nodes == [0, 1, 3]
+    for item_id in ITEM_IDS:
+        if before[item_id] != 2:
+            assert ring.owner(item_id) == before[item_id]
+        else:
+            assert ring.owner(item_id) in (0, 1, 3)
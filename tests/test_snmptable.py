@@ -0,0 +1,113 @@
+"""
+test_snmptable.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the GETBULK table checker (core/checkers/snmp/snmptable.py) with the walk replaced
+by canned agent answers.
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("pysnmp")
+
+from pysnmp.hlapi.v3arch.asyncio import ObjectType, ObjectIdentity, SnmpEngine  # noqa: E402
+from pysnmp.proto.rfc1902 import Counter32, OctetString  # noqa: E402
+from pysnmp.smi import view  # noqa: E402
+
+from core.checkers.snmp import snmptable  # noqa: E402
+from core.checkers.snmp.snmptable import SNMPTable  # noqa: E402
+
+IF_DESCR = "1.3.6.1.2.1.2.2.1.2"
+IF_IN_OCTETS = "1.3.6.1.2.1.2.2.1.10"
+
+
+def _item(columns: str) -> dict:
+    return {"itemid": 7, "oid": columns, "host": "127.0.0.1", "community": "public", "port": 161,
+            "multiplication": 8, "division": 1}
+
+
+def test_parse_columns():
+    assert SNMPTable.parse_columns(f" .{IF_DESCR}. , {IF_IN_OCTETS},") == [IF_DESCR, IF_IN_OCTETS]
+
+
+def _var_bind(oid: str, value):
+    """Resolved ObjectType, as yielded by bulk_walk_cmd."""
+    mib_view = view.MibViewController(SnmpEngine().get_mib_builder())
+    return ObjectType(ObjectIdentity(oid), value).resolve_with_mib(mib_view)
+
+
+def test_walk_keeps_only_rows_of_the_column(monkeypatch):
+    answers = [
+        [_var_bind(f"{IF_IN_OCTETS}.1", Counter32(10)), _var_bind(f"{IF_IN_OCTETS}.2", Counter32(20))],
+        [_var_bind(f"{IF_IN_OCTETS}.10", Counter32(30)), _var_bind(f"{IF_IN_OCTETS}1.1", Counter32(99))],
+    ]
+
+    async def fake_bulk_walk(*args, **kwargs):
+        for var_binds in answers:
+            yield None, 0, 0, var_binds
+
+    monkeypatch.setattr(snmptable, "bulk_walk_cmd", fake_bulk_walk)
+
+    async def walk():
+        from core.checkers.snmp.objcache import SNMP_OBJECTS
+        try:
+            return await SNMPTable().walk_column(IF_IN_OCTETS, "127.0.0.1", "public", 161, object())
+        finally:
+            SNMP_OBJECTS.release()
+
+    rows = asyncio.run(walk())
+    # ifInOctets1.1 (another column sharing the prefix text) is not part of the table
+    assert [(index, int(value)) for index, value in rows] == [("1", 10), ("2", 20), ("10", 30)]
+
+
+def test_walk_raises_on_error_indication(monkeypatch):
+    async def fake_bulk_walk(*args, **kwargs):
+        yield "No SNMP response received before timeout", 0, 0, []
+
+    monkeypatch.setattr(snmptable, "bulk_walk_cmd", fake_bulk_walk)
+
+    async def walk():
+        from core.checkers.snmp.objcache import SNMP_OBJECTS
+        try:
+            return await SNMPTable().walk_column(IF_IN_OCTETS, "127.0.0.1", "public", 161, object())
+        finally:
+            SNMP_OBJECTS.release()
+
+    with pytest.raises(RuntimeError, match="SNMP error indication"):
+        asyncio.run(walk())
+
+
+def test_columns_are_walked_and_merged_by_index(monkeypatch):
+    walked = {
+        IF_DESCR: [("1", OctetString("eth0")), ("2", OctetString("eth1"))],
+        IF_IN_OCTETS: [("1", Counter32(100)), ("2", Counter32(200))],
+    }
+
+    async def fake_walk(self, column, *args):
+        return walked[column]
+
+    monkeypatch.setattr(SNMPTable, "walk_column", fake_walk)
+    result = asyncio.run(SNMPTable().get_data_async(_item(f"{IF_DESCR},{IF_IN_OCTETS}"), engine=object()))
+
+    assert result["itemid"] == 7 and result["type"] == 4 and result["message"] == "OK"
+    assert result["rows"] == [
+        {"index": "1", "oid": IF_DESCR, "valor": "eth0"},
+        {"index": "2", "oid": IF_DESCR, "valor": "eth1"},
+        {"index": "1", "oid": IF_IN_OCTETS, "valor": 800.0},  # Factors applied to numbers
+        {"index": "2", "oid": IF_IN_OCTETS, "valor": 1600.0},
+    ]
+    assert result["channel"][0]["value"] == 4
+
+
+def test_a_failed_column_fails_the_item(monkeypatch):
+    async def fake_walk(self, column, *args):
+        raise RuntimeError("SNMP error indication: timeout")
+
+    monkeypatch.setattr(SNMPTable, "walk_column", fake_walk)
+    result = asyncio.run(SNMPTable().get_data_async(_item(IF_IN_OCTETS), engine=object()))
+    assert result["error"] == "Exception" and "timeout" in result["message"]
+    assert "rows" not in result
@@ -0,0 +1,133 @@
+"""
+test_spool.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the on-disk result spool and its replayer (core/writer/spool.py).
+"""
+import logging
+import sqlite3
+from threading import Event
+
+from core.writer.spool import ResultSpool, SpoolReplayer
+
+
+def _rows(start: int, count: int) -> list:
+    return [{"itemid": itemid, "valor": itemid * 10} for itemid in range(start, start + count)]
+
+
+def test_batches_are_kept_whole_and_in_order(tmp_path):
+    spool = ResultSpool(str(tmp_path / "spool.db"))
+    spool.append("metering", _rows(1, 3))
+    spool.append("failure", _rows(4, 2))
+    spool.append("metering", [])  # Empty batches are not stored
+    entries = spool.peek(10)
+    assert [(kind, rows) for _, kind, rows in entries] == [("metering", _rows(1, 3)), ("failure", _rows(4, 2))]
+    assert spool.backlog() == {"entries": 2, "rows": 5, "dropped": 0, "dead": 0}
+    spool.close()
+
+
+def test_full_spool_drops_oldest_batches(tmp_path):
+    spool = ResultSpool(str(tmp_path / "spool.db"), max_rows=5)
+    spool.append("metering", _rows(1, 3))
+    spool.append("metering", _rows(4, 2))
+    spool.append("metering", _rows(6, 2))
+    assert [rows[0]["itemid"] for _, _, rows in spool.peek(10)] == [4, 6]
+    assert spool.backlog() == {"entries": 2, "rows": 4, "dropped": 3, "dead": 0}
+    spool.close()
+
+
+def test_ack_removes_only_delivered_entry(tmp_path):
+    spool = ResultSpool(str(tmp_path / "spool.db"))
+    spool.append("metering", _rows(1, 3))
+    spool.append("metering", _rows(4, 1))
+    first_id = spool.peek()[0][0]
+    spool.ack(first_id)
+    spool.ack(first_id)  # Acking twice is harmless
+    assert [rows for _, _, rows in spool.peek(10)] == [_rows(4, 1)]
+    assert spool.backlog()["rows"] == 1
+    spool.close()
+
+
+def test_spool_survives_reopening(tmp_path):
+    path = str(tmp_path / "spool.db")
+    spool = ResultSpool(path)
+    spool.append("metering", _rows(1, 2))
+    spool.close()
+    reopened = ResultSpool(path)
+    assert reopened.backlog() == {"entries": 1, "rows": 2, "dropped": 0, "dead": 0}
+    assert reopened.peek()[0][2] == _rows(1, 2)
+    reopened.close()
+
+
+def test_replayer_delivers_and_acks_oldest_first(tmp_path):
+    spool = ResultSpool(str(tmp_path / "spool.db"))
+    spool.append("metering", _rows(1, 2))
+    spool.append("failure", _rows(3, 1))
+    stop_event, delivered = Event(), []
+
+    def send(kind, rows):
+        delivered.append((kind, [row["itemid"] for row in rows]))
+        if spool.backlog()["entries"] == 1:
+            stop_event.set()
+        return True
+
+    replayer = SpoolReplayer(logging.getLogger("test"), spool, send, stop_event, rate=1000.0)
+    replayer.start()
+    replayer.join(timeout=5)
+    assert delivered == [("metering", [1, 2]), ("failure", [3])]
+    assert spool.backlog()["entries"] == 0
+    spool.close()
+
+
+def test_dead_letter_moves_the_entry_out_of_the_queue(tmp_path):
+    spool = ResultSpool(str(tmp_path / "spool.db"))
+    spool.append("failure", _rows(1, 2))
+    spool.append("failure", _rows(3, 1))
+    head = spool.peek()[0][0]
+    assert spool.failed(head) == 1
+    assert spool.failed(head) == 2
+    spool.dead_letter(head)
+    assert [rows for _, _, rows in spool.peek(10)] == [_rows(3, 1)]
+    assert spool.backlog() == {"entries": 1, "rows": 1, "dropped": 0, "dead": 2}
+    assert spool.failed(head) == 0  # No longer spooled
+    spool.close()
+
+
+def test_spool_of_a_previous_version_gets_the_attempts_column(tmp_path):
+    path = str(tmp_path / "spool.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE spool (id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL,"
+                 " rows INTEGER NOT NULL, payload TEXT NOT NULL, created REAL NOT NULL)")
+    conn.execute("INSERT INTO spool (kind, rows, payload, created) VALUES ('metering', 1, '[{\"itemid\": 1}]', 0)")
+    conn.commit()
+    conn.close()
+    spool = ResultSpool(path)
+    assert spool.failed(spool.peek()[0][0]) == 1
+    spool.close()
+
+
+def test_replayer_dead_letters_a_batch_that_keeps_failing(tmp_path):
+    spool = ResultSpool(str(tmp_path / "spool.db"))
+    spool.append("failure", _rows(1, 1))  # Rejected by the API forever
+    spool.append("metering", _rows(2, 2))
+    stop_event, attempts, delivered = Event(), [], []
+
+    def send(kind, rows):
+        if kind == "failure":
+            attempts.append(rows)
+            return False
+        delivered.append(rows)
+        stop_event.set()
+        return True
+
+    replayer = SpoolReplayer(logging.getLogger("test"), spool, send, stop_event, rate=1000.0, max_attempts=2)
+    replayer.start()
+    replayer.join(timeout=10)
+    assert not replayer.is_alive()
+    assert len(attempts) == 2
+    assert delivered == [_rows(2, 2)]  # The entry behind it is no longer blocked
+    assert spool.backlog() == {"entries": 0, "rows": 0, "dropped": 0, "dead": 1}
+    spool.close()
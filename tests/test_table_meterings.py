@@ -0,0 +1,64 @@
+"""
+test_table_meterings.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the table item meterings route (POST/GET /meterings/table).
+"""
+TABLE = "/api/v1/meterings/table"
+IF_DESCR = "1.3.6.1.2.1.2.2.1.2"
+IF_IN_OCTETS = "1.3.6.1.2.1.2.2.1.10"
+
+
+def _create_table_item(api, columns: str) -> int:
+    response = api.post("/api/v1/items/", json={
+        "name": "ifTable", "tipo": 4, "hostid": 1, "snmp_oid": columns, "acronimo": "iftable", "units": "",
+        "factor_multiplicacion": 1, "factor_division": 1, "updateinterval": "00:01:00", "description": "",
+        "enabled": True,
+    })
+    assert response.status_code == 201
+    return response.json["data"]["id"]
+
+
+def test_rows_are_stored_and_grouped_by_column_and_index(api):
+    item_id = _create_table_item(api, f"{IF_DESCR},{IF_IN_OCTETS}")
+    rows = [{"indice": index, "oid": IF_IN_OCTETS, "valor": 1000 * index} for index in range(1, 4)]
+    response = api.post(TABLE, json={"itemid": item_id, "latencia": 2.5, "rows": rows})
+    assert response.status_code == 201
+
+    series = api.get(f"{TABLE}?itemid={item_id}").json["data"]
+    assert sorted((serie["indice"], serie["values"]) for serie in series) == [
+        ("1", ["1000"]), ("2", ["2000"]), ("3", ["3000"])]
+
+
+def test_long_strings_are_truncated(api):
+    item_id = _create_table_item(api, IF_DESCR)
+    alias = "x" * 300
+    response = api.post(TABLE, json={"itemid": item_id, "rows": [{"indice": 1, "oid": IF_DESCR, "valor": alias}]})
+    assert response.status_code == 201
+    [serie] = api.get(f"{TABLE}?itemid={item_id}").json["data"]
+    assert serie["values"] == [alias[:60]]
+
+
+def test_deleted_item_is_a_404_not_a_database_error(api):
+    response = api.post(TABLE, json={"itemid": 999, "rows": [{"indice": 1, "oid": IF_IN_OCTETS, "valor": 1}]})
+    assert response.status_code == 404
+
+
+def test_malformed_rows_are_rejected(api):
+    item_id = _create_table_item(api, IF_IN_OCTETS)
+    assert api.post(TABLE, json={"itemid": item_id, "rows": [{"indice": 1}]}).status_code == 400
+    assert api.post(TABLE, json={"itemid": str(item_id), "rows": []}).status_code == 400
+    assert api.post(TABLE, json={"itemid": item_id, "rows": [], "extra": 1}).status_code == 400
+
+
+def test_a_table_item_holds_many_enterprise_columns(api):
+    from app.models import Items, SNMPFailures
+    columns = ",".join(f"1.3.6.1.4.1.14988.1.1.1.3.1.{column}" for column in range(1, 15))
+    # SQLite does not enforce VARCHAR lengths: check the declared ones (MySQL does)
+    assert Items.__table__.c.snmp_oid.type.length >= len(columns)
+    assert SNMPFailures.__table__.c.oid.type.length >= len(columns)
+    item_id = _create_table_item(api, columns)
+    assert api.get(f"/api/v1/items/{item_id}").json["data"]["snmp_oid"] == columns
@@ -0,0 +1,106 @@
+"""
+test_writer.py
+
+2025 Carlos Arze
+Trabajo de grado
+Univalle
+
+Tests of the result writer (core/writer/writer_thread.py): what reaches the API and what is
+spooled when the API does not take it.
+"""
+import logging
+from queue import Queue
+from threading import Event
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("pydantic")
+
+from core.misc.fetch_data import FetchData  # noqa: E402
+from core.writer.spool import ResultSpool  # noqa: E402
+from core.writer.writer_thread import ResultWriter, make_record, RECORD_METERING  # noqa: E402
+
+
+def _writer(tmp_path) -> ResultWriter:
+    return ResultWriter(logging.getLogger("test"), Queue(), Event(), spool=ResultSpool(str(tmp_path / "spool.db")))
+
+
+def _meterings(count: int) -> list:
+    return [make_record(RECORD_METERING, itemid=itemid, valor=itemid * 10, latencia=1.5) for itemid in range(1, count + 1)]
+
+
+def _spooled(writer: ResultWriter) -> list:
+    return [(kind, rows) for _, kind, rows in writer.spool.peek(100)]
+
+
+def test_bulk_server_error_spools_the_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(FetchData, "post_meterings_bulk", staticmethod(lambda url, rows: (503, None)))
+    writer = _writer(tmp_path)
+    writer.flush(_meterings(3))
+    [(kind, rows)] = _spooled(writer)
+    assert kind == RECORD_METERING and [row["itemid"] for row in rows] == [1, 2, 3]
+    assert all(row["tiempo"] for row in rows)
+
+
+def test_bulk_rejection_is_not_spooled(tmp_path, monkeypatch):
+    monkeypatch.setattr(FetchData, "post_meterings_bulk", staticmethod(lambda url, rows: (400, None)))
+    writer = _writer(tmp_path)
+    writer.flush(_meterings(3))
+    assert _spooled(writer) == []
+
+
+def test_row_by_row_fallback_keeps_tiempo_and_spools_what_failed(tmp_path, monkeypatch):
+    posted = []
+
+    def post_metering(url, data, tiempo=None):
+        posted.append((data.id, tiempo))
+        if data.id == 2:
+            return 422, None  # Rejected: dropped
+        if data.id == 3:
+            return 0, None  # API unreachable: this row and the rest are spooled
+        return 201, {}
+
+    monkeypatch.setattr(FetchData, "post_meterings_bulk", staticmethod(lambda url, rows: (404, None)))
+    monkeypatch.setattr(FetchData, "post_metering", staticmethod(post_metering))
+    writer = _writer(tmp_path)
+    batch = _meterings(5)
+    writer.flush(batch)
+
+    assert writer.bulk_meterings is False
+    assert posted == [(1, batch[0]["tiempo"]), (2, batch[1]["tiempo"]), (3, batch[2]["tiempo"])]
+    [(kind, rows)] = _spooled(writer)
+    assert [(row["itemid"], row["tiempo"]) for row in rows] == [(3, batch[2]["tiempo"]), (4, batch[3]["tiempo"]),
+                                                                  (5, batch[4]["tiempo"])]
+
+
+def test_replay_send_reports_row_by_row_failures(tmp_path, monkeypatch):
+    monkeypatch.setattr(FetchData, "post_metering", staticmethod(lambda url, data, tiempo=None: (0, None)))
+    writer = _writer(tmp_path)
+    writer.bulk_meterings = False
+    rows = [{"itemid": 1, "valor": 1, "latencia": 1.0, "tiempo": "2025-01-01T00:00:00.000"}]
+    assert writer.send(RECORD_METERING, rows) is False
+    monkeypatch.setattr(FetchData, "post_metering", staticmethod(lambda url, data, tiempo=None: (201, {})))
+    assert writer.send(RECORD_METERING, rows) is True
+
+
+def test_rejected_failure_records_are_dropped_and_unanswered_ones_spooled(tmp_path, monkeypatch):
+    from core.writer.writer_thread import RECORD_FAILURE
+    answers = {1: (201, {}), 2: (404, None), 3: (503, None)}
+    posted = []
+
+    def post_snmp_failures(url, data):
+        posted.append(data["itemid"])
+        return answers[data["itemid"]]
+
+    monkeypatch.setattr(FetchData, "post_snmp_failures", staticmethod(post_snmp_failures))
+    writer = _writer(tmp_path)
+    records = [make_record(RECORD_FAILURE, itemid=itemid, ip="10.0.0.1", oid="1.3.6.1.2.1.1.3.0",
+                           mensaje="timeout", valor="") for itemid in (1, 2, 3, 4)]
+    writer.flush(records)
+
+    assert posted == [1, 2, 3]  # Item 4 is not attempted after the 503
+    [(kind, rows)] = _spooled(writer)
+    assert kind == RECORD_FAILURE and [row["itemid"] for row in rows] == [3, 4]
+    # Replaying a batch whose item was deleted meanwhile succeeds (the 404 row is dropped)
+    assert writer.send(RECORD_FAILURE, records[1:2]) is True